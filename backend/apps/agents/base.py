@@ -1,7 +1,8 @@
 """
 Base agent class.
 """
-from typing import Any
+import json
+from typing import Any, Callable, Optional
 from apps.observability.services import log_event
 from apps.observability.context import ExecutionContext
 
@@ -16,14 +17,67 @@ class BaseAgent:
         """Log an agent event."""
         log_event(ctx, message, level='info', source='agent', agent=self.name, **data)
     
-    def _call_llm(self, ctx: ExecutionContext, prompt: str, **kwargs) -> dict:
-        """Call LLM with logging."""
+    def _call_llm(self, ctx: ExecutionContext, prompt: str, cache: bool = True,
+                  on_chunk: Optional[Callable[[str], Any]] = None, **kwargs) -> dict:
+        """
+        Call LLM with logging.
+        
+        Responses are cached by (provider, model, prompt, kwargs); pass
+        cache=False when sampling should produce a fresh answer each time.
+        With ``on_chunk`` the completion is streamed and each text chunk is
+        passed to it as it arrives (under the async worker the stream is read
+        on its event loop and ``on_chunk`` runs back in this thread). Tokens
+        are charged to the job owner's ``ai_tokens_per_day`` quota
+        (QuotaExceededError when exhausted).
+        """
+        from asgiref.sync import async_to_sync
+        from django.conf import settings
+        from apps.llm import cache as llm_cache
         from apps.llm.client import get_llm_client
+        from apps.llm.http import use_event_loop
+        from apps.llm.usage import TokenMeter
+        from apps.observability.metrics import LLM_LATENCY
         
         self._log(ctx, f"Calling LLM", prompt_length=len(prompt))
         
         client = get_llm_client()
-        response = client.complete(prompt, **kwargs)
+        key = None
+        if cache and llm_cache.enabled():
+            key = llm_cache.cache_key(settings.LLM_PROVIDER, client.model_name, prompt, kwargs)
+            response = llm_cache.get(key, self.name)
+            if response is not None:
+                log_event(ctx, "LLM response served from cache", level='info', source='llm',
+                          response_length=len(str(response)), model=client.model_name, cached=True)
+                if on_chunk:
+                    on_chunk(_response_text(response))
+                return response
+        
+        meter = TokenMeter(ctx.user_id)
+        meter.reserve(prompt, kwargs.get('max_tokens', 500))
+        response = {}
+        try:
+            if on_chunk and use_event_loop.get():
+                response = async_to_sync(_astream)(client, prompt, on_chunk, **kwargs)
+            elif on_chunk:
+                for event in client.stream(prompt, **kwargs):
+                    if event.get('done'):
+                        response = event['response']
+                    else:
+                        on_chunk(event['text'])
+            elif use_event_loop.get():
+                # Under the async worker: the request is awaited on its event loop
+                response = async_to_sync(client.acomplete)(prompt, **kwargs)
+            else:
+                response = client.complete(prompt, **kwargs)
+        finally:
+            meter.settle(response.get('usage'))
+        
+        if response.get('latency_ms') is not None:
+            LLM_LATENCY.observe(response['latency_ms'] / 1000, provider=settings.LLM_PROVIDER, model=client.model_name)
+        
+        # Provider fallbacks carry 'error' and must not be replayed
+        if key and 'error' not in response:
+            llm_cache.put(key, response)
         
         log_event(
             ctx,
@@ -31,7 +85,31 @@ class BaseAgent:
             level='info',
             source='llm',
             response_length=len(str(response)),
-            model=client.model_name
+            model=client.model_name,
+            usage=response.get('usage'),
+            latency_ms=response.get('latency_ms')
         )
         
         return response
+
+
+async def _astream(client, prompt: str, on_chunk: Callable[[str], Any], **kwargs) -> dict:
+    """Read ``client.astream`` on the event loop; returns the final response."""
+    from asgiref.sync import sync_to_async
+
+    # Thread-sensitive: runs in the workflow thread blocked in async_to_sync
+    emit = sync_to_async(on_chunk)
+    response = {}
+    async for event in client.astream(prompt, **kwargs):
+        if event.get('done'):
+            response = event['response']
+        else:
+            await emit(event['text'])
+    return response
+
+
+def _response_text(response: dict) -> str:
+    """Text of a response: the completion, or the structured fields as JSON."""
+    if isinstance(response.get('response'), str):
+        return response['response']
+    return json.dumps({key: value for key, value in response.items() if key not in ('usage', 'latency_ms', 'raw')})
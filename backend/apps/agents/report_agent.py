@@ -19,9 +19,11 @@ class ReportAgent(BaseAgent):
         # Gather data
         data = self._gather_report_data(user, kind, window_days)
         
-        # Call LLM
+        # Call LLM, streaming the text to the job's output as it is generated
+        from apps.jobs.output import append_output
+        
         prompt = self._build_report_prompt(kind, data)
-        response = self._call_llm(ctx, prompt)
+        response = self._call_llm(ctx, prompt, on_chunk=lambda text: append_output(ctx.job_id, text))
         
         # Structure content (MVP stub)
         content = {
@@ -0,0 +1,134 @@
+"""
+API pagination classes.
+"""
+import base64
+from collections import OrderedDict
+from datetime import date, datetime
+from urllib import parse
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class WorkLogKeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination for WorkLog lists.
+
+    Orders by (-occurred_on, -created_at, -id) and encodes the last row of
+    each page into an opaque cursor. The next page is fetched with a
+    row-value comparison against that key instead of an OFFSET, so page N
+    costs the same as page 1 and is served from the
+    (user, -occurred_on, -created_at, -id) index.
+
+    Enabled per request with ``?pagination=cursor`` (or any ``cursor`` param)
+    so existing page-number clients keep working. The order is fixed, so
+    ``ordering`` and ``search`` (relevance order) are rejected with a 400
+    rather than silently ignored.
+    """
+
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('-occurred_on', '-created_at', '-id')
+    # Params that would reorder the results
+    unsupported_query_params = ('ordering', 'search')
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE or 50
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        """Whether the client asked for cursor pagination."""
+        params = request.query_params
+        return params.get(cls.mode_query_param) == 'cursor' or cls.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        unsupported = [param for param in self.unsupported_query_params if request.query_params.get(param)]
+        if unsupported:
+            raise ValidationError({
+                param: 'Not supported with cursor pagination; use page-number pagination.'
+                for param in unsupported
+            })
+
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            occurred_on, created_at, pk = position
+            queryset = queryset.filter(
+                Q(occurred_on__lt=occurred_on)
+                | Q(occurred_on=occurred_on, created_at__lt=created_at)
+                | Q(occurred_on=occurred_on, created_at=created_at, id__lt=pk)
+            )
+
+        # Fetch one extra row to know whether another page exists.
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        last = self.page[-1]
+        cursor = self.encode_cursor((last.occurred_on, last.created_at, last.id))
+        url = replace_query_param(self.base_url, self.cursor_query_param, cursor)
+        return replace_query_param(url, self.mode_query_param, 'cursor')
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def encode_cursor(self, position) -> str:
+        occurred_on, created_at, pk = position
+        querystring = parse.urlencode({
+            'o': occurred_on.isoformat(),
+            'c': created_at.isoformat(),
+            'i': pk,
+        })
+        return base64.urlsafe_b64encode(querystring.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            querystring = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            occurred_on = date.fromisoformat(tokens['o'][0])
+            created_at = datetime.fromisoformat(tokens['c'][0])
+            pk = int(tokens['i'][0])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return occurred_on, created_at, pk
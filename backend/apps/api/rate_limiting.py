@@ -1,21 +1,78 @@
 """
 Rate limiting for abuse protection.
 Protects auth endpoints, share links, and expensive operations.
+
+Two algorithms, selected per limiter:
+
+- ``gcra``: generic cell rate algorithm, i.e. a token bucket holding
+  ``max_requests`` tokens refilled at ``max_requests / window_seconds``.
+  State is a single "theoretical arrival time", so it is cheap, and it
+  smooths traffic instead of resetting at window edges.
+- ``sliding_log``: timestamps of accepted requests in a sorted set; never
+  more than ``max_requests`` in any ``window_seconds`` span. Stricter and
+  costlier (one member per request), used for auth and AI actions.
+
+On Redis each check is one Lua script using the server clock, so it is
+atomic across web workers. Other caches (tests, dev) run the same maths
+under a process lock.
 """
+import math
+import threading
 import time
-from typing import Optional
+import uuid
+from typing import Optional, Tuple
 from functools import wraps
 from django.core.cache import cache
 from django.http import JsonResponse
 from django.conf import settings
 
+from apps.system.redis_client import get_redis_client, redis_key
+
+ALGORITHMS = ('gcra', 'sliding_log')
+
+# KEYS[1]: TAT key. ARGV: emission interval ms, burst size.
+# Returns {allowed, retry_after_ms}.
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local emission = tonumber(ARGV[1])
+local tolerance = emission * tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local new_tat = tat + emission
+local allow_at = new_tat - tolerance
+if allow_at > now then
+    return {0, allow_at - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {1, 0}
+"""
+
+# KEYS[1]: log key. ARGV: window ms, limit, unique member.
+# Returns {allowed, retry_after_ms}.
+_SLIDING_LOG_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local window = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, tonumber(oldest[2]) + window - now}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, 0}
+"""
+
+# Non-Redis caches are per-process, so a process lock makes them atomic
+_local_lock = threading.Lock()
+
 
 class RateLimiter:
     """
-    Rate limiter using Django cache backend.
+    Rate limiter on the Django cache backend (Redis in production).
     """
     
-    def __init__(self, key_prefix: str, max_requests: int, window_seconds: int):
+    def __init__(self, key_prefix: str, max_requests: int, window_seconds: int, algorithm: str = 'gcra'):
         """
         Initialize rate limiter.
         
@@ -23,10 +80,14 @@ class RateLimiter:
             key_prefix: Cache key prefix for this limiter
             max_requests: Maximum requests allowed in window
             window_seconds: Time window in seconds
+            algorithm: 'gcra' (token bucket) or 'sliding_log'
         """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
         self.key_prefix = key_prefix
         self.max_requests = max_requests
         self.window_seconds = window_seconds
+        self.algorithm = algorithm
     
     def get_key(self, identifier: str) -> str:
         """Get cache key for identifier."""
@@ -34,31 +95,54 @@ class RateLimiter:
     
     def is_allowed(self, identifier: str) -> tuple[bool, Optional[int]]:
         """
-        Check if request is allowed.
+        Check if request is allowed, counting it if so.
         
         Args:
             identifier: Unique identifier (IP, user ID, etc.)
         
         Returns:
-            Tuple of (is_allowed, retry_after_seconds)
+            Tuple of (is_allowed, retry_after_seconds) - retry_after is the
+            time until this identifier's next request would be accepted
         """
         key = self.get_key(identifier)
+        window_ms = self.window_seconds * 1000
         
-        # Get current count
-        current = cache.get(key, 0)
-        
-        if current >= self.max_requests:
-            # Rate limit exceeded - return window seconds as retry_after
-            return False, self.window_seconds
-        
-        # Increment counter
-        if current == 0:
-            # First request in window
-            cache.set(key, 1, self.window_seconds)
+        client = get_redis_client()
+        if client is not None:
+            if self.algorithm == 'gcra':
+                allowed, retry_ms = client.eval(
+                    _GCRA_LUA, 1, redis_key(key), window_ms / self.max_requests, self.max_requests
+                )
+            else:
+                allowed, retry_ms = client.eval(
+                    _SLIDING_LOG_LUA, 1, redis_key(key), window_ms, self.max_requests, uuid.uuid4().hex
+                )
         else:
-            cache.incr(key)
+            with _local_lock:
+                check = self._gcra_local if self.algorithm == 'gcra' else self._sliding_log_local
+                allowed, retry_ms = check(key, time.time() * 1000, window_ms)
         
-        return True, None
+        if allowed:
+            return True, None
+        return False, max(1, math.ceil(retry_ms / 1000))
+    
+    def _gcra_local(self, key: str, now: float, window_ms: int) -> Tuple[int, float]:
+        emission = window_ms / self.max_requests
+        tat = max(cache.get(key) or now, now)
+        new_tat = tat + emission
+        allow_at = new_tat - emission * self.max_requests
+        if allow_at > now:
+            return 0, allow_at - now
+        cache.set(key, new_tat, math.ceil((new_tat - now) / 1000))
+        return 1, 0
+    
+    def _sliding_log_local(self, key: str, now: float, window_ms: int) -> Tuple[int, float]:
+        log = [stamp for stamp in cache.get(key) or [] if stamp > now - window_ms]
+        if len(log) >= self.max_requests:
+            return 0, log[0] + window_ms - now
+        log.append(now)
+        cache.set(key, log, self.window_seconds)
+        return 1, 0
     
     def reset(self, identifier: str):
         """Reset rate limit for identifier."""
@@ -70,7 +154,8 @@ class RateLimiter:
 AUTH_RATE_LIMITER = RateLimiter(
     key_prefix='auth',
     max_requests=5,
-    window_seconds=300  # 5 requests per 5 minutes
+    window_seconds=300,  # 5 requests per 5 minutes
+    algorithm='sliding_log'
 )
 
 SIGNUP_RATE_LIMITER = RateLimiter(
@@ -100,7 +185,8 @@ EXPORT_RATE_LIMITER = RateLimiter(
 AI_ACTION_RATE_LIMITER = RateLimiter(
     key_prefix='ai_action',
     max_requests=20,
-    window_seconds=3600  # 20 AI actions per hour
+    window_seconds=3600,  # 20 AI actions per hour
+    algorithm='sliding_log'
 )
 
 REPORT_RATE_LIMITER = RateLimiter(
@@ -185,7 +271,9 @@ class RateLimitMiddleware:
                 return JsonResponse({
                     'error': 'Too many login attempts',
                     'retry_after': retry_after
-                }, status=429)
+                }, status=429, headers={
+                    'Retry-After': str(retry_after)
+                })
         
         # Signup/passkey endpoints
         elif request.path in ['/api/auth/signup/', '/api/auth/passkey/validate/']:
@@ -194,6 +282,8 @@ class RateLimitMiddleware:
                 return JsonResponse({
                     'error': 'Too many signup attempts',
                     'retry_after': retry_after
-                }, status=429)
+                }, status=429, headers={
+                    'Retry-After': str(retry_after)
+                })
         
         return self.get_response(request)
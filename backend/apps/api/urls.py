@@ -39,6 +39,9 @@ urlpatterns = [
     path('admin/system-controls/feature-flag/', system_controls.toggle_feature_flag, name='toggle-feature-flag'),
     path('admin/failed-jobs/', system_controls.failed_jobs_view, name='failed-jobs'),
     path('admin/failed-jobs/<uuid:job_id>/retry/', system_controls.retry_failed_job, name='retry-failed-job'),
+    path('admin/queue-lanes/', system_controls.queue_lanes_view, name='queue-lanes'),
+    path('admin/llm-cache/', system_controls.llm_cache_view, name='llm-cache'),
+    path('admin/slow-endpoints/', system_controls.slow_endpoints_view, name='slow-endpoints'),
     path('admin/rate-limits/', system_controls.rate_limit_status_view, name='rate-limits'),
     path('admin/rate-limits/reset/', system_controls.reset_rate_limit, name='reset-rate-limit'),
     
@@ -55,6 +58,7 @@ urlpatterns = [
     
     # Worklogs
     path('worklogs/', worklog.WorkLogListCreateView.as_view(), name='worklog-list'),
+    path('worklogs/import/', worklog.import_worklogs, name='worklog-import'),
     path('worklogs/<int:pk>/', worklog.WorkLogDetailView.as_view(), name='worklog-detail'),
     path('worklogs/<int:pk>/analyze/', worklog.analyze_worklog, name='worklog-analyze'),
     
@@ -66,6 +70,9 @@ urlpatterns = [
     path('worklogs/<int:worklog_id>/external-links/', worklog.WorkLogExternalLinkListView.as_view(), name='worklog-external-links'),
     path('worklogs/<int:worklog_id>/external-links/<int:pk>/', worklog.WorkLogExternalLinkDetailView.as_view(), name='worklog-external-link-detail'),
     
+    # Hierarchy tree (clients -> projects -> epics -> ... -> tasks)
+    path('hierarchy/tree/', worklog.hierarchy_tree, name='hierarchy-tree'),
+    
     # Clients
     path('clients/', worklog.ClientListCreateView.as_view(), name='client-list'),
     path('clients/<int:pk>/', worklog.ClientDetailView.as_view(), name='client-detail'),
@@ -114,6 +121,8 @@ urlpatterns = [
     # Jobs
     path('jobs/<uuid:job_id>/', jobs.job_detail, name='job-detail'),
     path('jobs/<uuid:job_id>/events/', jobs.job_events, name='job-events'),
+    path('jobs/<uuid:job_id>/output/', jobs.job_output, name='job-output'),
+    path('jobs/<uuid:job_id>/stream/', jobs.job_stream, name='job-stream'),
     
     # Billing - User endpoints
     path('billing/reserve/balance/', billing.reserve_balance, name='billing-reserve-balance'),
@@ -134,6 +143,7 @@ urlpatterns = [
     path('gamification/badges/', gamification.BadgesView.as_view(), name='gamification-badges'),
     path('gamification/challenges/', gamification.ChallengesView.as_view(), name='gamification-challenges'),
     path('gamification/settings/', gamification.GamificationSettingsView.as_view(), name='gamification-settings'),
+    path('gamification/leaderboard/', gamification.LeaderboardView.as_view(), name='gamification-leaderboard'),
     
     # Gamification - Admin endpoints
     path('admin/gamification/metrics/', gamification.AdminGamificationMetricsView.as_view(), name='admin-gamification-metrics'),
@@ -8,7 +8,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
 
-from apps.gamification import selectors, services
+from apps.gamification import leaderboard, selectors, services
 from apps.gamification.serializers import (
     GamificationSettingsSerializer,
     ManualXPGrantSerializer,
@@ -118,6 +118,52 @@ class GamificationSettingsView(APIView):
             )
 
 
+class LeaderboardView(APIView):
+    """
+    XP leaderboard: top entries, the caller's rank and the places around it.
+    
+    Query params:
+        board: global (default), tenant or weekly
+        limit: top-N size (default 10, max 100)
+        radius: places above/below the caller (default 2, max 25)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        board = request.query_params.get('board', 'global')
+        if board not in leaderboard.BOARDS:
+            return Response(
+                {'error': f"board must be one of: {', '.join(leaderboard.BOARDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+            radius = min(max(int(request.query_params.get('radius', 2)), 0), 25)
+        except ValueError:
+            return Response({'error': 'limit and radius must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        tenant_id = None
+        if board == 'tenant':
+            tenant_id = leaderboard.tenant_ids_for_users([request.user.id]).get(request.user.id)
+            if tenant_id is None:
+                return Response({'error': 'No tenant for user'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        top = leaderboard.get_top(board, limit, tenant_id=tenant_id)
+        around = leaderboard.get_around(request.user.id, board, radius, tenant_id=tenant_id)
+        usernames = dict(
+            User.objects.filter(id__in={row['user_id'] for row in top + around}).values_list('id', 'username')
+        )
+        for row in top + around:
+            row['username'] = usernames.get(row['user_id'], '')
+        
+        return Response({
+            'board': board,
+            'top': top,
+            'me': leaderboard.get_rank(request.user.id, board, tenant_id=tenant_id),
+            'around': around,
+        }, status=status.HTTP_200_OK)
+
+
 class AdminGamificationMetricsView(APIView):
     """Get platform-wide gamification metrics (admin only)."""
     permission_classes = [IsAuthenticated]
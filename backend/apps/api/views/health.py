@@ -1,6 +1,9 @@
 """
 Health check endpoints.
 """
+import hmac
+import logging
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -9,6 +12,8 @@ from django.db import connection
 from apps.storage.minio import get_minio_client
 from django.conf import settings as django_settings
 
+logger = logging.getLogger(__name__)
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -93,3 +98,34 @@ def readyz(request):
         'status': 'ready' if all_ok else 'not_ready',
         'checks': checks
     }, status=status_code)
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint (text exposition format).
+    
+    GET /metrics
+    
+    Serves counters, gauges and histograms aggregated across API and worker
+    processes (see apps.observability.metrics). Requires
+    ``Authorization: Bearer <METRICS_TOKEN>``; without a configured token
+    the endpoint is only open when DEBUG is on.
+    """
+    from django.http import HttpResponse, HttpResponseForbidden
+    from apps.jobs.lanes import lane_depths
+    from apps.observability import metrics as registry
+    
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponseForbidden('METRICS_TOKEN is not configured')
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden('Invalid metrics token')
+    
+    try:
+        for lane, depth in lane_depths().items():
+            registry.JOB_QUEUE_DEPTH.set(depth, lane=lane)
+    except Exception as e:
+        logger.warning(f"Could not read queue depths: {e}")
+    
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,7 +1,12 @@
 """
 Jobs API views.
 """
-from rest_framework.decorators import api_view
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from apps.jobs.models import Job
@@ -54,3 +59,97 @@ def job_events(request, job_id):
             for event in events
         ]
     })
+
+
+@api_view(['GET'])
+def job_output(request, job_id):
+    """
+    Get streamed job output incrementally.
+    
+    GET /api/jobs/<id>/output/?cursor=N returns the chunks from position N
+    on; pass the returned cursor on the next poll.
+    """
+    from apps.jobs.output import read_output
+    
+    try:
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if job.user_id != request.user.id and not request.user.is_staff:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        cursor = int(request.query_params.get('cursor', 0))
+    except ValueError:
+        return Response({'error': 'cursor must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    chunks, next_cursor = read_output(job.id, cursor)
+    
+    return Response({
+        'job_id': str(job.id),
+        'status': job.status,
+        'chunks': chunks,
+        'cursor': next_cursor,
+        'done': job.status in ('success', 'failed', 'cancelled'),
+    })
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets EventSource clients (Accept: text/event-stream) through negotiation."""
+    
+    media_type = 'text/event-stream'
+    format = 'sse'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error responses are rendered; the stream itself is not a Response
+        return json.dumps(data).encode()
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def job_stream(request, job_id):
+    """
+    Stream a job's timeline as server-sent events.
+    
+    GET /api/jobs/<id>/stream/ sends each new event (``event: event``) and
+    status transition (``event: status``) as it happens, with the entry's
+    position as its SSE id. Reconnect with ``Last-Event-ID`` (or
+    ``?last_event_id=N``) to resume after entry N. The stream ends after a
+    terminal status or JOB_STREAM_MAX_SECONDS; EventSource reconnects.
+    """
+    from apps.jobs.timeline import TERMINAL_STATUSES, follow, read
+    
+    try:
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if job.user_id != request.user.id and not request.user.is_staff:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    last_event_id = request.headers.get('Last-Event-ID', request.query_params.get('last_event_id', -1))
+    try:
+        cursor = int(last_event_id) + 1
+    except ValueError:
+        return Response({'error': 'Last-Event-ID must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    def stream():
+        yield 'retry: 3000\n\n'
+        # Job finished before its timeline existed (or after it expired)
+        if job.status in TERMINAL_STATUSES and cursor == 0:
+            if not read(job.id)[0]:
+                yield f"event: status\ndata: {json.dumps({'type': 'status', 'status': job.status})}\n\n"
+                return
+        
+        for item in follow(job.id, cursor, max_seconds=getattr(settings, 'JOB_STREAM_MAX_SECONDS', 300)):
+            if item is None:
+                yield ': keepalive\n\n'
+                continue
+            position, entry = item
+            yield f"id: {position}\nevent: {entry['type']}\ndata: {json.dumps(entry)}\n\n"
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
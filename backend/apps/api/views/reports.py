@@ -43,7 +43,8 @@ def generate_report_view(request):
             'window_days': window_days
         },
         trigger='api',
-        user=request.user if request.user.is_authenticated else None
+        user=request.user if request.user.is_authenticated else None,
+        quotas={'reports_per_day': 1}
     )
     
     if not success:
@@ -170,6 +170,58 @@ def failed_jobs_view(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def queue_lanes_view(request):
+    """
+    Per-lane queue depth and wait-time percentiles.
+    
+    GET /api/admin/queue-lanes/?window_minutes=60
+    """
+    from apps.jobs.lanes import lane_metrics
+    
+    window_minutes = int(request.query_params.get('window_minutes', 60))
+    
+    return Response({
+        'lanes': lane_metrics(window_minutes),
+        'window_minutes': window_minutes,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def slow_endpoints_view(request):
+    """
+    Slowest API endpoints by p95 over recent requests, with query,
+    duplicate-query and cache round-trip counts and stored cProfile captures.
+    
+    GET /api/admin/slow-endpoints/?limit=20
+    """
+    from apps.observability.profiling import slowest_endpoints
+    
+    limit = int(request.query_params.get('limit', 20))
+    
+    return Response({
+        'endpoints': slowest_endpoints(limit),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def llm_cache_view(request):
+    """
+    LLM response cache hit/miss counts per agent.
+    
+    GET /api/admin/llm-cache/
+    """
+    from apps.llm import cache as llm_cache
+    
+    return Response({
+        'enabled': llm_cache.enabled(),
+        'agents': llm_cache.stats(),
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def retry_failed_job(request, job_id):
@@ -238,6 +290,7 @@ def rate_limit_status_view(request):
         status_data[name] = {
             'max_requests': limiter.max_requests,
             'window_seconds': limiter.window_seconds,
+            'algorithm': limiter.algorithm,
             'description': f'{limiter.max_requests} requests per {limiter.window_seconds}s',
         }
     
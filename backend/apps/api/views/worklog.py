@@ -1,10 +1,10 @@
 """
 Worklog API views.
 """
-from django.db import models
 from rest_framework import generics, status, filters
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from django.utils.http import parse_etags
 from django_filters import rest_framework as django_filters
 from apps.worklog.models import (
     WorkLog, Client, Project, Epic, Feature, Story, Task, Sprint,
@@ -15,9 +15,14 @@ from apps.worklog.serializers import (
     ClientSerializer, ProjectSerializer,
     EpicSerializer, FeatureSerializer, StorySerializer, TaskSerializer, SprintSerializer,
     WorkLogSkillSignalSerializer, WorkLogBulletSerializer,
-    WorkLogPresetSerializer, WorkLogReportSerializer, WorkLogExternalLinkSerializer
+    WorkLogPresetSerializer, WorkLogReportSerializer, WorkLogExternalLinkSerializer,
+    WorkLogImportSerializer
 )
+from apps.worklog.services import bulk_import_worklogs
+from apps.worklog.selectors import get_hierarchy_tree
+from apps.worklog.search import search_worklogs
 from apps.jobs.dispatcher import enqueue
+from apps.api.pagination import WorkLogKeysetPagination
 from apps.api.rate_limiting import rate_limit, AI_ACTION_RATE_LIMITER
 
 
@@ -33,24 +38,52 @@ class WorkLogFilter(django_filters.FilterSet):
                   'work_type', 'status', 'enrichment_status']
     
     def filter_search(self, queryset, name, value):
-        """Search across content, outcome, tags, title."""
-        return queryset.filter(
-            models.Q(content__icontains=value) |
-            models.Q(outcome__icontains=value) |
-            models.Q(title__icontains=value) |
-            models.Q(tags__icontains=value)
-        )
+        """Full-text search across title, content, outcome, impact and tags."""
+        return search_worklogs(queryset, value)
+
+
+class WorkLogOrderingFilter(filters.OrderingFilter):
+    """Default to relevance ordering while a search term is active."""
+    
+    def get_default_ordering(self, view):
+        if view.request.query_params.get('search'):
+            return ['-search_rank', '-occurred_on', '-created_at']
+        return super().get_default_ordering(view)
+    
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        valid = super().remove_invalid_fields(queryset, fields, view, request)
+        if not request.query_params.get('search'):
+            # search_rank only exists as an annotation on searched querysets
+            valid = [term for term in valid if term.lstrip('-') != 'search_rank']
+        return valid
 
 
 class WorkLogListCreateView(generics.ListCreateAPIView):
-    """List and create work logs."""
+    """
+    List and create work logs.
+
+    Page-number pagination by default; pass ``?pagination=cursor`` to switch
+    to keyset pagination (fixed ordering, constant cost per page; cannot be
+    combined with ``ordering`` or ``search``).
+    """
     queryset = WorkLog.objects.all()
     serializer_class = WorkLogListSerializer
-    filter_backends = [django_filters.DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [django_filters.DjangoFilterBackend, WorkLogOrderingFilter]
     filterset_class = WorkLogFilter
-    ordering_fields = ['occurred_on', 'created_at', 'updated_at', 'status']
+    ordering_fields = ['occurred_on', 'created_at', 'updated_at', 'status', 'search_rank']
     ordering = ['-occurred_on', '-created_at']
     
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if WorkLogKeysetPagination.is_requested(self.request):
+                self._paginator = WorkLogKeysetPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+    
     def get_queryset(self):
         qs = super().get_queryset()
         if not self.request.user.is_staff:
@@ -143,6 +176,27 @@ def analyze_worklog(request, pk):
     }, status=status.HTTP_202_ACCEPTED)
 
 
+@api_view(['POST'])
+def import_worklogs(request):
+    """
+    Bulk import work log entries.
+    
+    Entries already imported from the same source (matched on source_ref)
+    are skipped; invalid entries are reported by index and do not block
+    the rest of the batch.
+    """
+    serializer = WorkLogImportSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    result = bulk_import_worklogs(
+        user=request.user,
+        entries=serializer.validated_data['entries'],
+        source=serializer.validated_data['source'],
+    )
+    
+    return Response(result, status=status.HTTP_201_CREATED)
+
+
 # ================================
 # Client management views
 # ================================
@@ -170,6 +224,27 @@ class ClientDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Client.objects.filter(user=self.request.user)
 
 
+@api_view(['GET'])
+def hierarchy_tree(request):
+    """
+    Return the user's whole client/project/agile hierarchy as one nested tree.
+    
+    Served from a per-user cache that is invalidated on any hierarchy change.
+    Supports conditional requests: a matching If-None-Match returns 304.
+    """
+    tree, etag = get_hierarchy_tree(request.user)
+    etag = f'"{etag}"'
+    
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in client_etags or '*' in client_etags:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response({'clients': tree})
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 # ================================
 # Project management views
 # ================================
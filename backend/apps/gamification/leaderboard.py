@@ -0,0 +1,228 @@
+"""
+XP leaderboards backed by Redis sorted sets.
+
+Boards:
+    global  - every user, scored by total XP
+    tenant  - users of one tenant, scored by total XP
+    weekly  - XP earned in the current ISO week (global)
+
+Sets are written after each XP grant commits (``record_xp``); rank, top-N
+and around-me reads are ZREVRANK/ZREVRANGE calls, O(log n + m). When the
+default cache is not Redis (tests, local dev) reads fall back to ordering
+UserXP/XPEvent rows in the database, which is O(n) and meant for small data.
+
+``rebuild`` repopulates every board from the XPEvent ledger.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from apps.system.redis_client import decode, get_redis_client, redis_key
+
+logger = logging.getLogger(__name__)
+
+BOARDS = ('global', 'tenant', 'weekly')
+
+# Weekly sets outlive their week so last week's board can still be read
+WEEKLY_TTL_SECONDS = 35 * 24 * 3600
+
+
+def week_start(day: Optional[date] = None) -> date:
+    """Monday of the ISO week containing ``day`` (default: today)."""
+    day = day or timezone.now().date()
+    return day - timedelta(days=day.weekday())
+
+
+def board_key(board: str, tenant_id: Optional[int] = None, week: Optional[date] = None) -> str:
+    """Redis key of a board."""
+    if board == 'global':
+        return redis_key('leaderboard:global')
+    if board == 'tenant':
+        return redis_key(f'leaderboard:tenant:{tenant_id}')
+    if board == 'weekly':
+        return redis_key(f'leaderboard:weekly:{week_start(week).isoformat()}')
+    raise ValueError(f"Unknown leaderboard: {board}")
+
+
+def tenant_ids_for_users(user_ids: Iterable[int]) -> Dict[int, int]:
+    """Map user id -> tenant id (profile tenant, else owned tenant)."""
+    from apps.accounts.models import UserProfile
+    from apps.tenants.models import Tenant
+
+    user_ids = list(user_ids)
+    mapping = dict(Tenant.objects.filter(owner_id__in=user_ids).values_list('owner_id', 'id'))
+    mapping.update(UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'tenant_id'))
+    return mapping
+
+
+# ================================
+# Writes
+# ================================
+
+def record_xp(user_id: int, amount: int, total_xp: int) -> None:
+    """
+    Update the boards for an XP grant once the surrounding transaction commits.
+
+    Args:
+        user_id: User who earned the XP
+        amount: XP granted (added to the weekly board)
+        total_xp: User's new total (written to global/tenant boards)
+    """
+    if amount <= 0 or get_redis_client() is None:
+        return
+    tenant_id = tenant_ids_for_users([user_id]).get(user_id)
+    transaction.on_commit(lambda: _write(user_id, amount, total_xp, tenant_id))
+
+
+def _write(user_id, amount, total_xp, tenant_id):
+    client = get_redis_client()
+    if client is None:
+        return
+    weekly = board_key('weekly')
+    try:
+        pipe = client.pipeline(transaction=False)
+        # Concurrent grants can commit (and get here) out of order; GT keeps
+        # the highest total so a late, older snapshot never lowers a score
+        pipe.zadd(board_key('global'), {user_id: total_xp}, gt=True)
+        if tenant_id:
+            pipe.zadd(board_key('tenant', tenant_id), {user_id: total_xp}, gt=True)
+        pipe.zincrby(weekly, amount, user_id)
+        pipe.expire(weekly, WEEKLY_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        # The ledger is authoritative; a missed update is fixed by rebuild
+        logger.warning(f"Leaderboard update failed for user {user_id}: {e}")
+
+
+def rebuild(batch_size: int = 1000) -> int:
+    """
+    Repopulate all boards from XPEvent.
+
+    Returns:
+        Number of users written to the global board
+    """
+    from apps.gamification.models import XPEvent
+
+    client = get_redis_client()
+    if client is None:
+        logger.warning("Leaderboard rebuild skipped: default cache is not Redis")
+        return 0
+
+    totals = dict(
+        XPEvent.objects.order_by().values('user_id').annotate(total=Sum('amount')).values_list('user_id', 'total')
+    )
+    weekly = dict(
+        XPEvent.objects.filter(created_at__gte=_week_start_datetime())
+        .order_by().values('user_id').annotate(total=Sum('amount')).values_list('user_id', 'total')
+    )
+    tenants = tenant_ids_for_users(totals)
+
+    stale = list(client.scan_iter(match=redis_key('leaderboard:*'), count=500))
+    pipe = client.pipeline(transaction=True)
+    if stale:
+        pipe.delete(*stale)
+    user_ids = list(totals)
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        pipe.zadd(board_key('global'), {user_id: totals[user_id] for user_id in chunk})
+        by_tenant = {}
+        for user_id in chunk:
+            if tenants.get(user_id):
+                by_tenant.setdefault(tenants[user_id], {})[user_id] = totals[user_id]
+        for tenant_id, scores in by_tenant.items():
+            pipe.zadd(board_key('tenant', tenant_id), scores)
+    if weekly:
+        pipe.zadd(board_key('weekly'), weekly)
+        pipe.expire(board_key('weekly'), WEEKLY_TTL_SECONDS)
+    pipe.execute()
+
+    logger.info(f"Rebuilt leaderboards for {len(totals)} users")
+    return len(totals)
+
+
+# ================================
+# Reads
+# ================================
+
+def get_rank(user_id: int, board: str = 'global', tenant_id: Optional[int] = None) -> Optional[Dict]:
+    """
+    Position of a user on a board.
+
+    Returns:
+        {'rank': int (1-based), 'score': int}, or None if the user is not ranked
+    """
+    client = get_redis_client()
+    if client is None:
+        ranking = _db_ranking(board, tenant_id)
+        for index, (member, score) in enumerate(ranking):
+            if member == user_id:
+                return {'rank': index + 1, 'score': score}
+        return None
+
+    key = board_key(board, tenant_id)
+    pipe = client.pipeline(transaction=False)
+    pipe.zrevrank(key, user_id)
+    pipe.zscore(key, user_id)
+    rank, score = pipe.execute()
+    if rank is None:
+        return None
+    return {'rank': rank + 1, 'score': int(score)}
+
+
+def get_top(board: str = 'global', limit: int = 10, tenant_id: Optional[int] = None) -> List[Dict]:
+    """Top ``limit`` entries of a board as [{'rank', 'user_id', 'score'}]."""
+    return _range(board, tenant_id, 0, limit - 1)
+
+
+def get_around(user_id: int, board: str = 'global', radius: int = 2,
+               tenant_id: Optional[int] = None) -> List[Dict]:
+    """Entries within ``radius`` places of a user (empty if the user is not ranked)."""
+    position = get_rank(user_id, board, tenant_id)
+    if position is None:
+        return []
+    index = position['rank'] - 1
+    return _range(board, tenant_id, max(index - radius, 0), index + radius)
+
+
+def _range(board, tenant_id, start, stop):
+    client = get_redis_client()
+    if client is None:
+        rows = _db_ranking(board, tenant_id)[start:stop + 1]
+    else:
+        rows = [
+            (int(decode(member)), int(score))
+            for member, score in client.zrevrange(board_key(board, tenant_id), start, stop, withscores=True)
+        ]
+    return [
+        {'rank': start + offset + 1, 'user_id': member, 'score': score}
+        for offset, (member, score) in enumerate(rows)
+    ]
+
+
+def _week_start_datetime():
+    return timezone.make_aware(datetime.combine(week_start(), time.min))
+
+
+def _db_ranking(board, tenant_id):
+    """Full (user_id, score) ordering from the database - fallback only."""
+    from apps.gamification.models import UserXP, XPEvent
+
+    if board not in BOARDS:
+        raise ValueError(f"Unknown leaderboard: {board}")
+
+    if board == 'weekly':
+        rows = (
+            XPEvent.objects.filter(created_at__gte=_week_start_datetime())
+            .order_by().values('user_id').annotate(score=Sum('amount'))
+            .filter(score__gt=0).values_list('user_id', 'score')
+        )
+    else:
+        queryset = UserXP.objects.filter(total_xp__gt=0)
+        if board == 'tenant':
+            queryset = queryset.filter(Q(user__profile__tenant_id=tenant_id) | Q(user__tenant__id=tenant_id))
+        rows = queryset.values_list('user_id', 'total_xp').distinct()
+    return sorted(rows, key=lambda row: (-row[1], row[0]))
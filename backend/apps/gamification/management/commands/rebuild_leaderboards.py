@@ -0,0 +1,17 @@
+"""
+Django management command to repopulate the Redis leaderboards from XPEvent.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.gamification.leaderboard import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the global, per-tenant and weekly XP leaderboards from the XP ledger'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per ZADD')
+    
+    def handle(self, *args, **options):
+        count = rebuild(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt leaderboards for {count} users'))
@@ -0,0 +1,35 @@
+"""
+Django management command to rebuild user streaks from logged dates.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.gamification.models import RewardConfig
+from apps.gamification.tools import recompute_streaks
+from apps.orchestration.workflows.reward_evaluate import DEFAULT_REWARD_CONFIG
+
+
+class Command(BaseCommand):
+    help = 'Recompute current/longest streaks and freeze usage for all users, in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users per batch')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only recompute this user id (repeatable)')
+    
+    def handle(self, *args, **options):
+        config_obj = RewardConfig.objects.filter(is_active=True).first()
+        config = config_obj.config if config_obj else DEFAULT_REWARD_CONFIG
+        batch_size = max(options['batch_size'], 1)
+        
+        users = get_user_model().objects.order_by('id')
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+        user_ids = list(users.values_list('id', flat=True))
+        
+        written = 0
+        for start in range(0, len(user_ids), batch_size):
+            written += recompute_streaks(user_ids[start:start + batch_size], config)
+            self.stdout.write(f'Processed {min(start + batch_size, len(user_ids))}/{len(user_ids)} users')
+        
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {written} streaks'))
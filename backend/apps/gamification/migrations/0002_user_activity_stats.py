@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivityStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_entries', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('total_attachments', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('distinct_days', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('entries_with_outcomes', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='activity_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'gamification_user_activity_stats',
+            },
+        ),
+    ]
@@ -49,6 +49,22 @@ class UserXP(models.Model):
         return f"{self.user.username} - Level {self.level} ({self.total_xp} XP)"
 
 
+class UserActivityStats(models.Model):
+    """Running activity totals per user, maintained by signals (see apps.gamification.stats)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='activity_stats')
+    total_entries = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    total_attachments = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    distinct_days = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    entries_with_outcomes = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'gamification_user_activity_stats'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.total_entries} entries"
+
+
 class XPEvent(models.Model):
     """Immutable ledger of XP grants."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -2,11 +2,12 @@
 Gamification business logic services.
 """
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 from django.contrib.auth import get_user_model
 from django.db import transaction
 
-from apps.jobs.dispatcher import enqueue
+from apps.jobs.dispatcher import enqueue_coalesced
+from apps.gamification.leaderboard import record_xp
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -16,6 +17,9 @@ def trigger_reward_evaluation(entry_id: int, user_id: int) -> Dict[str, Any]:
     """
     Enqueue reward evaluation job for a worklog entry.
     
+    Triggers for the same user within the coalescing window share one job
+    whose payload carries the union of entry ids.
+    
     Args:
         entry_id: WorkLog ID
         user_id: User ID (for tenant scoping)
@@ -29,9 +33,10 @@ def trigger_reward_evaluation(entry_id: int, user_id: int) -> Dict[str, Any]:
         logger.error(f"User {user_id} not found")
         return {'success': False, 'error': 'User not found'}
     
-    job = enqueue(
+    job = enqueue_coalesced(
         job_type='gamification.reward_evaluate',
-        payload={'entry_id': entry_id},
+        dedupe_key=f'user:{user.id}',
+        ids=[entry_id],
         user=user,
         trigger='api'
     )
@@ -45,6 +50,46 @@ def trigger_reward_evaluation(entry_id: int, user_id: int) -> Dict[str, Any]:
     }
 
 
+def trigger_bulk_reward_evaluation(entry_ids: List[int], user_id: int) -> Dict[str, Any]:
+    """
+    Enqueue a single reward evaluation job covering many worklog entries.
+    
+    Used by bulk imports so N new entries cost one job instead of N.
+    Imported entries are evaluated as a backfill: the per-hour rate limit
+    and duplicate rules target live logging, not a batch written at once.
+    
+    Args:
+        entry_ids: WorkLog IDs
+        user_id: User ID (for tenant scoping)
+    
+    Returns:
+        Job details
+    """
+    try:
+        user = User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        logger.error(f"User {user_id} not found")
+        return {'success': False, 'error': 'User not found'}
+    
+    # Own coalescing key, so imported ids never merge into a live-entry job
+    job = enqueue_coalesced(
+        job_type='gamification.reward_evaluate',
+        dedupe_key=f'user:{user.id}:import',
+        ids=entry_ids,
+        payload={'backfill': True},
+        user=user,
+        trigger='api'
+    )
+    
+    logger.info(f"Enqueued reward evaluation job {job.id} for {len(entry_ids)} entries")
+    
+    return {
+        'success': True,
+        'job_id': str(job.id),
+        'status': job.status
+    }
+
+
 @transaction.atomic
 def manual_grant_xp(user_id: int, amount: int, reason: str, granted_by_user_id: int) -> Dict[str, Any]:
     """
@@ -83,6 +128,7 @@ def manual_grant_xp(user_id: int, amount: int, reason: str, granted_by_user_id:
     new_level = 1 + (user_xp.total_xp // 100)
     user_xp.level = new_level
     user_xp.save()
+    record_xp(user.id, amount, user_xp.total_xp)
     
     logger.info(f"Admin {granted_by.id} granted {amount} XP to user {user.id}")
     
@@ -0,0 +1,77 @@
+"""
+Gamification signals - keep per-user activity counters in sync.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.worklog.models import WorkLog, Attachment
+from .stats import apply_delta, has_outcome
+
+
+def _is_new_day(user_id, day, exclude_pk) -> bool:
+    """Whether no other entry of the user is logged on ``day``."""
+    return not WorkLog.objects.filter(user_id=user_id, occurred_on=day).exclude(pk=exclude_pk).exists()
+
+
+@receiver(pre_save, sender=WorkLog)
+def remember_worklog_activity(sender, instance, update_fields=None, **kwargs):
+    """Stash the stored day/outcome so post_save can compute deltas on update."""
+    instance._activity_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & {'occurred_on', 'outcome', 'impact'}:
+        return
+    instance._activity_before = (
+        WorkLog.objects.filter(pk=instance.pk).values_list('occurred_on', 'outcome', 'impact').first()
+    )
+
+
+@receiver(post_save, sender=WorkLog)
+def count_worklog_save(sender, instance, created, **kwargs):
+    if created:
+        apply_delta(
+            instance.user_id,
+            total_entries=1,
+            distinct_days=int(_is_new_day(instance.user_id, instance.occurred_on, instance.pk)),
+            entries_with_outcomes=int(has_outcome(instance)),
+        )
+        return
+
+    before = getattr(instance, '_activity_before', None)
+    if before is None:
+        return
+    old_day, old_outcome, old_impact = before
+    deltas = {'entries_with_outcomes': int(has_outcome(instance)) - int(bool(old_outcome or old_impact))}
+    if old_day != instance.occurred_on:
+        deltas['distinct_days'] = (
+            int(_is_new_day(instance.user_id, instance.occurred_on, instance.pk))
+            - int(_is_new_day(instance.user_id, old_day, instance.pk))
+        )
+    apply_delta(instance.user_id, **deltas)
+
+
+@receiver(post_delete, sender=WorkLog)
+def count_worklog_delete(sender, instance, **kwargs):
+    apply_delta(
+        instance.user_id,
+        create_missing=False,
+        total_entries=-1,
+        distinct_days=-int(_is_new_day(instance.user_id, instance.occurred_on, instance.pk)),
+        entries_with_outcomes=-int(has_outcome(instance)),
+    )
+
+
+def _attachment_owner(instance):
+    return WorkLog.objects.filter(pk=instance.worklog_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=Attachment)
+def count_attachment_save(sender, instance, created, **kwargs):
+    if created:
+        apply_delta(_attachment_owner(instance), total_attachments=1)
+
+
+@receiver(post_delete, sender=Attachment)
+def count_attachment_delete(sender, instance, **kwargs):
+    # Cascades delete attachments before their worklog, so the owner is still resolvable
+    apply_delta(_attachment_owner(instance), create_missing=False, total_attachments=-1)
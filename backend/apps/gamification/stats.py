@@ -0,0 +1,69 @@
+"""
+Per-user activity counters used by badge evaluation.
+
+``UserActivityStats`` is kept current by WorkLog/Attachment signals with
+F() increments, so badge checks read one row instead of counting the
+user's whole history. A missing row is rebuilt from aggregates on demand.
+"""
+import logging
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import UserActivityStats
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('total_entries', 'total_attachments', 'distinct_days', 'entries_with_outcomes')
+
+
+def has_outcome(entry) -> bool:
+    """Whether a WorkLog records an outcome or impact."""
+    return bool(entry.outcome or entry.impact)
+
+
+def recompute_activity_stats(user_id: int) -> UserActivityStats:
+    """Rebuild a user's counters from their WorkLogs and Attachments."""
+    from apps.worklog.models import WorkLog, Attachment
+
+    entries = WorkLog.objects.filter(user_id=user_id)
+    totals = entries.aggregate(
+        total_entries=Count('id'),
+        distinct_days=Count('occurred_on', distinct=True),
+        entries_with_outcomes=Count('id', filter=~Q(outcome='') | ~Q(impact='')),
+    )
+    totals['total_attachments'] = Attachment.objects.filter(worklog__user_id=user_id).count()
+
+    try:
+        with transaction.atomic():
+            stats, _ = UserActivityStats.objects.update_or_create(user_id=user_id, defaults=totals)
+    except IntegrityError:
+        # Created concurrently; that writer saw the same history
+        stats = UserActivityStats.objects.get(user_id=user_id)
+    return stats
+
+
+def get_activity_stats(user_id: int) -> UserActivityStats:
+    """Return a user's counters, building the row if it does not exist yet."""
+    stats = UserActivityStats.objects.filter(user_id=user_id).first()
+    return stats or recompute_activity_stats(user_id)
+
+
+def apply_delta(user_id: Optional[int], create_missing: bool = True, **deltas: int) -> None:
+    """
+    Atomically add ``deltas`` to a user's counters.
+
+    When the row does not exist it is rebuilt from aggregates instead (which
+    already reflect the change), unless ``create_missing`` is False - deletes
+    pass False so a cascading user delete never re-creates the row.
+    """
+    if user_id is None:
+        return
+    changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+    if not changes:
+        return
+    updated = UserActivityStats.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **changes)
+    if not updated and create_missing:
+        recompute_activity_stats(user_id)
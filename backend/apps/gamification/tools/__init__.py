@@ -6,16 +6,21 @@ All tools are pure functions or have explicit side effects documented.
 
 from .entry_validator import is_meaningful_entry
 from .xp_calculator import compute_xp
-from .streak_updater import update_streak
+from .streak_updater import update_streak, compute_streak, recompute_streak, recompute_streaks
 from .badge_awarder import award_badges
 from .challenge_updater import update_challenges
 from .persister import persist_events
+from .batch_evaluator import evaluate_batch
 
 __all__ = [
     'is_meaningful_entry',
     'compute_xp',
     'update_streak',
+    'compute_streak',
+    'recompute_streak',
+    'recompute_streaks',
     'award_badges',
     'update_challenges',
     'persist_events',
+    'evaluate_batch',
 ]
@@ -23,10 +23,13 @@ def award_badges(user, triggers: Dict, config: Dict, job_id: str) -> List[Dict[s
         List of awarded badges with details
     """
     from apps.gamification.models import BadgeDefinition, UserBadge, UserStreak, UserXP
-    from apps.worklog.models import WorkLog
+    from apps.gamification.stats import get_activity_stats
     
     awarded = []
     
+    # Maintained counters - one row instead of counting the user's history per badge
+    stats = get_activity_stats(user.id)
+    
     # Get badge definitions for active badges
     all_badges = BadgeDefinition.objects.filter(is_active=True)
     
@@ -36,7 +39,7 @@ def award_badges(user, triggers: Dict, config: Dict, job_id: str) -> List[Dict[s
         
         # Check trigger conditions
         if badge_def.trigger_type == 'first_entry':
-            entry_count = WorkLog.objects.filter(user=user).count()
+            entry_count = stats.total_entries
             if entry_count == 1:
                 should_award = True
                 trigger_data = {'entry_count': entry_count}
@@ -54,16 +57,14 @@ def award_badges(user, triggers: Dict, config: Dict, job_id: str) -> List[Dict[s
         elif badge_def.trigger_type == 'first_attachment':
             if triggers.get('has_attachment'):
                 # Check if this is their first attachment ever
-                from apps.worklog.models import Attachment
-                attachment_count = Attachment.objects.filter(worklog__user=user).count()
-                if attachment_count == 1:
+                if stats.total_attachments == 1:
                     should_award = True
                     trigger_data = {'first_attachment': True}
         
         elif badge_def.trigger_type.startswith('total_entries_'):
             try:
                 threshold = int(badge_def.trigger_type.split('_')[-1])
-                entry_count = WorkLog.objects.filter(user=user).count()
+                entry_count = stats.total_entries
                 if entry_count >= threshold:
                     should_award = True
                     trigger_data = {'total_entries': entry_count}
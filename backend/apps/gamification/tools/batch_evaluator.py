@@ -0,0 +1,391 @@
+"""
+Tool: Evaluate rewards for many worklog entries of one user in one pass.
+
+The per-entry tools re-read config, counts and streak state for every
+entry. Here config, badge definitions and challenge templates are loaded
+once by the caller, the user's aggregates are computed in a handful of
+queries, and XP, streak, badge and challenge changes are written in bulk.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.gamification.leaderboard import record_xp
+
+from .streak_updater import advance_streak, recompute_streak
+from .xp_calculator import xp_breakdown
+
+logger = logging.getLogger(__name__)
+
+
+def evaluate_batch(user, entries: List, config: Dict, badges: List, templates: List,
+                   job_id: str, backfill: bool = False) -> Dict[str, Any]:
+    """
+    Evaluate rewards for a batch of one user's entries.
+
+    Args:
+        user: User instance
+        entries: WorkLog instances of this user, annotated with ``attachment_count``
+        config: Reward configuration
+        badges: Active BadgeDefinition instances
+        templates: Active weekly ChallengeTemplate instances
+        job_id: Job ID for idempotency and provenance
+        backfill: Entries were written together (an import), so only the
+            content rule applies; the rate limit and duplicate rules would
+            count the batch against itself
+
+    Returns:
+        {
+            'valid_entries': List[int],
+            'invalid_entries': Dict[int, List[str]],
+            'xp_awarded': int,
+            'level_up': bool,
+            'streak': Dict,
+            'badges_awarded': List[Dict],
+            'challenges_updated': List[Dict],
+        }
+    """
+    from apps.gamification.models import UserStreak, UserXP
+
+    entries = sorted(entries, key=lambda e: (e.occurred_on, e.created_at, e.id))
+    valid, invalid = _validate(user, entries, config, backfill)
+
+    result = {
+        'valid_entries': [entry.id for entry in valid],
+        'invalid_entries': invalid,
+        'xp_awarded': 0,
+        'level_up': False,
+        'streak': None,
+        'badges_awarded': [],
+        'challenges_updated': [],
+    }
+    if not valid:
+        # The streak counts every entry that meets the content rule, so
+        # rejected back-dated entries can still change its history
+        if entries:
+            with transaction.atomic():
+                streak = UserStreak.objects.select_for_update().filter(user=user).first()
+                if streak and streak.last_counted_date and entries[0].occurred_on < streak.last_counted_date:
+                    freeze_used = _recompute_streak(user, streak, config)
+                    result['streak'] = _streak_result(streak, freeze_used)
+        return result
+
+    with transaction.atomic():
+        user_xp, _ = UserXP.objects.select_for_update().get_or_create(user=user)
+        streak, _ = UserStreak.objects.select_for_update().get_or_create(user=user)
+
+        # XP for each entry, applying the daily cap across the whole batch
+        grants = _entry_xp_grants(user, user_xp, valid, config, job_id)
+
+        # Streak: walk the new logged dates in order, save once. Back-dated
+        # entries can join runs already counted, so rebuild from history.
+        freeze_used = False
+        logged_dates = sorted({entry.occurred_on for entry in valid})
+        if streak.last_counted_date and logged_dates[0] < streak.last_counted_date:
+            freeze_used = _recompute_streak(user, streak, config)
+        else:
+            for logged_on in logged_dates:
+                if streak.last_counted_date and logged_on <= streak.last_counted_date:
+                    continue
+                freeze_used = advance_streak(streak, logged_on)['freeze_used'] or freeze_used
+            streak.save()
+        result['streak'] = _streak_result(streak, freeze_used)
+
+        # Badges see the level the entry XP brings the user to
+        projected_level = 1 + (user_xp.total_xp + sum(grant['amount'] for grant in grants)) // 100
+        result['badges_awarded'] = _award_badges(user, valid, badges, streak, projected_level, job_id)
+
+        challenge_updates, challenge_grants = _update_challenges(user, valid, templates)
+        result['challenges_updated'] = challenge_updates
+
+        xp_result = _persist_xp(user, user_xp, grants + challenge_grants)
+        result['xp_awarded'] = xp_result['amount']
+        result['level_up'] = xp_result['level_up']
+
+    logger.info(
+        f"Batch reward evaluation for user {user.id}: {len(valid)}/{len(entries)} valid, "
+        f"XP={result['xp_awarded']}, badges={len(result['badges_awarded'])}, "
+        f"challenges={len(result['challenges_updated'])}"
+    )
+    return result
+
+
+def _recompute_streak(user, streak, config) -> bool:
+    """Rebuild the (locked) streak from history and save it; returns whether a freeze was used."""
+    freezes_before = streak.freezes_used
+    recompute_streak(user, config, streak=streak)
+    streak.save()
+    return streak.freezes_used > freezes_before
+
+
+def _streak_result(streak, freeze_used):
+    return {
+        'current': streak.current_streak,
+        'longest': streak.longest_streak,
+        'freeze_used': freeze_used,
+    }
+
+
+def _validate(user, entries, config, backfill=False):
+    """Apply the is_meaningful_entry rules to the batch from one activity query."""
+    from apps.worklog.models import WorkLog
+
+    min_length = config.get('min_entry_length', 20)
+    max_entries_per_hour = config.get('max_entries_per_hour', 10)
+    duplicate_threshold_seconds = config.get('duplicate_threshold_seconds', 60)
+
+    now = timezone.now()
+    hour_cutoff = now - timedelta(hours=1)
+    duplicate_cutoff = now - timedelta(seconds=duplicate_threshold_seconds)
+    recent = [] if backfill else list(
+        WorkLog.objects.filter(user=user, created_at__gte=min(hour_cutoff, duplicate_cutoff))
+        .values_list('id', 'occurred_on', 'created_at')
+    )
+    recent_count = sum(1 for _, _, created_at in recent if created_at >= hour_cutoff)
+
+    valid, invalid = [], {}
+    for entry in entries:
+        failures = []
+
+        content_length = len(entry.content.strip()) if entry.content else 0
+        if content_length < min_length:
+            failures.append(f'Content too short: {content_length} < {min_length} chars')
+
+        if recent_count > max_entries_per_hour:
+            failures.append(f'Too many entries in last hour: {recent_count} > {max_entries_per_hour}')
+
+        # Only an earlier entry for the same day counts as the original
+        if any(
+            pk != entry.id and occurred_on == entry.occurred_on
+            and created_at >= duplicate_cutoff and (created_at, pk) < (entry.created_at, entry.id)
+            for pk, occurred_on, created_at in recent
+        ):
+            failures.append(f'Duplicate entry detected within {duplicate_threshold_seconds}s')
+
+        if failures:
+            invalid[entry.id] = failures
+        else:
+            valid.append(entry)
+    return valid, invalid
+
+
+def _entry_xp_grants(user, user_xp, entries, config, job_id):
+    max_daily_xp = config.get('max_daily_xp', 200)
+
+    today = timezone.now().date()
+    daily_xp = user_xp.daily_xp if user_xp.daily_xp_date == today else 0
+
+    grants = []
+    for entry in entries:
+        tags = entry.metadata.get('tags', []) if entry.metadata else []
+        breakdown = xp_breakdown(entry, entry.attachment_count, tags, config)
+        amount = sum(breakdown.values())
+        capped = daily_xp + amount > max_daily_xp
+        if capped:
+            amount = max(0, max_daily_xp - daily_xp)
+        if amount <= 0:
+            continue
+        daily_xp += amount
+        grants.append({
+            'amount': amount,
+            'reason': f"Entry {entry.id} quality assessment",
+            'worklog_entry': entry,
+            'idempotency_key': f"xp:{user.id}:{entry.id}:{job_id}",
+            'metadata': {'breakdown': breakdown, 'capped': capped, 'job_id': job_id},
+        })
+    return grants
+
+
+def _persist_xp(user, user_xp, grants):
+    """Insert XP events not already recorded and update the user's totals once."""
+    from apps.gamification.models import XPEvent
+
+    today = timezone.now().date()
+    if user_xp.daily_xp_date != today:
+        user_xp.daily_xp = 0
+        user_xp.daily_xp_date = today
+
+    existing = set(
+        XPEvent.objects.filter(idempotency_key__in=[grant['idempotency_key'] for grant in grants])
+        .values_list('idempotency_key', flat=True)
+    ) if grants else set()
+    events = [XPEvent(user=user, **grant) for grant in grants if grant['idempotency_key'] not in existing]
+    XPEvent.objects.bulk_create(events)
+
+    amount = sum(event.amount for event in events)
+    old_level = user_xp.level
+    user_xp.total_xp += amount
+    user_xp.daily_xp += amount
+    user_xp.level = 1 + (user_xp.total_xp // 100)
+    user_xp.save()
+    record_xp(user.id, amount, user_xp.total_xp)
+
+    return {'amount': amount, 'level_up': user_xp.level > old_level}
+
+
+def _award_badges(user, entries, badges, streak, level, job_id):
+    """Evaluate every not-yet-earned badge against the user's activity counters."""
+    from apps.gamification.models import UserBadge
+    from apps.gamification.stats import get_activity_stats
+
+    earned = set(UserBadge.objects.filter(user=user).values_list('badge_id', flat=True))
+    pending = [badge for badge in badges if badge.id not in earned]
+    if not pending:
+        return []
+
+    # Maintained counters; the batch holds the user's first entry / attachment
+    # exactly when it holds all of them.
+    stats = get_activity_stats(user.id)
+    batch_attachments = sum(entry.attachment_count for entry in entries)
+
+    new_badges, awarded = [], []
+    for badge_def in pending:
+        trigger_data = None
+        trigger_type = badge_def.trigger_type
+        try:
+            if trigger_type == 'first_entry':
+                if stats.total_entries <= len(entries):
+                    trigger_data = {'entry_count': stats.total_entries}
+            elif trigger_type.startswith('streak_'):
+                if streak.current_streak >= int(trigger_type.split('_')[1]):
+                    trigger_data = {'current_streak': streak.current_streak}
+            elif trigger_type == 'first_attachment':
+                if batch_attachments and stats.total_attachments <= batch_attachments:
+                    trigger_data = {'first_attachment': True}
+            elif trigger_type.startswith('total_entries_'):
+                if stats.total_entries >= int(trigger_type.split('_')[-1]):
+                    trigger_data = {'total_entries': stats.total_entries}
+            elif trigger_type.startswith('level_'):
+                if level >= int(trigger_type.split('_')[1]):
+                    trigger_data = {'level': level}
+        except (ValueError, IndexError):
+            logger.warning(f"Invalid badge trigger: {trigger_type}")
+
+        if trigger_data is None:
+            continue
+        new_badges.append(UserBadge(
+            user=user,
+            badge=badge_def,
+            idempotency_key=f"badge:{user.id}:{badge_def.code}:auto",
+            provenance={'job_id': job_id, 'trigger_type': trigger_type, 'trigger_data': trigger_data},
+        ))
+        awarded.append({
+            'badge_code': badge_def.code,
+            'badge_name': badge_def.name,
+            'category': badge_def.category,
+            'trigger_data': trigger_data,
+        })
+
+    UserBadge.objects.bulk_create(new_badges, ignore_conflicts=True)
+    return awarded
+
+
+def _update_challenges(user, entries, templates):
+    """
+    Update weekly challenge progress for every week the batch touches.
+
+    Returns:
+        (updates, xp_grants) where xp_grants are completion rewards to persist
+    """
+    from apps.gamification.models import UserChallenge
+
+    if not templates:
+        return [], []
+
+    weeks = defaultdict(list)
+    for entry in entries:
+        weeks[entry.occurred_on - timedelta(days=entry.occurred_on.weekday())].append(entry)
+
+    existing = {
+        (challenge.template_id, challenge.period_start): challenge
+        for challenge in UserChallenge.objects.filter(
+            user=user, template__in=templates, period_start__in=list(weeks)
+        )
+    }
+
+    now = timezone.now()
+    to_create, to_update, updates, grants = [], [], [], []
+    for week_start, week_entries in sorted(weeks.items()):
+        for template in templates:
+            challenge = existing.get((template.id, week_start))
+            if challenge is None:
+                challenge = UserChallenge(
+                    user=user,
+                    template=template,
+                    period_start=week_start,
+                    period_end=week_start + timedelta(days=6),
+                    target_progress=template.goal_target,
+                    status='active',
+                    metadata={'dates_logged': [], 'details': {}},
+                )
+                to_create.append(challenge)
+            elif challenge.status == 'completed':
+                continue
+            else:
+                to_update.append(challenge)
+
+            metadata = challenge.metadata or {'dates_logged': [], 'details': {}}
+            before = challenge.current_progress
+
+            if template.goal_type == 'log_days':
+                dates = set(metadata.get('dates_logged', []))
+                dates.update(entry.occurred_on.isoformat() for entry in week_entries)
+                metadata['dates_logged'] = sorted(dates)
+                challenge.current_progress = len(dates)
+
+            elif template.goal_type == 'attach_evidence':
+                count = sum(1 for entry in week_entries if entry.attachment_count)
+                challenge.current_progress += count
+                details = metadata.setdefault('details', {})
+                details['attachments'] = details.get('attachments', 0) + count
+
+            elif template.goal_type == 'write_outcomes':
+                count = sum(1 for entry in week_entries if _has_outcome(entry))
+                challenge.current_progress += count
+                details = metadata.setdefault('details', {})
+                details['outcomes'] = details.get('outcomes', 0) + count
+
+            challenge.metadata = metadata
+            challenge.updated_at = now
+
+            if challenge.current_progress >= challenge.target_progress and challenge.status == 'active':
+                challenge.status = 'completed'
+                challenge.completed_at = now
+                if template.xp_reward > 0:
+                    grants.append({
+                        'amount': template.xp_reward,
+                        'reason': f"Challenge completed: {template.name}",
+                        'worklog_entry': None,
+                        'idempotency_key': f"challenge_xp:{user.id}:{template.code}:{week_start}",
+                        'metadata': {'challenge_id': str(challenge.id), 'week_start': week_start.isoformat()},
+                    })
+                updates.append({
+                    'challenge_code': template.code,
+                    'challenge_name': template.name,
+                    'completed': True,
+                    'progress': challenge.current_progress,
+                    'target': challenge.target_progress,
+                    'xp_reward': template.xp_reward,
+                })
+            elif challenge.current_progress > before:
+                updates.append({
+                    'challenge_code': template.code,
+                    'challenge_name': template.name,
+                    'completed': False,
+                    'progress': challenge.current_progress,
+                    'target': challenge.target_progress,
+                })
+
+    UserChallenge.objects.bulk_create(to_create)
+    UserChallenge.objects.bulk_update(
+        to_update, ['current_progress', 'status', 'completed_at', 'metadata', 'updated_at']
+    )
+    return updates, grants
+
+
+def _has_outcome(entry) -> bool:
+    return bool(entry.metadata and (entry.metadata.get('outcome') or entry.metadata.get('impact')))
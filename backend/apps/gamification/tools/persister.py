@@ -6,6 +6,8 @@ from typing import Dict, Any, Optional
 from django.db import IntegrityError, transaction
 from django.utils import timezone
 
+from apps.gamification.leaderboard import record_xp
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,6 +52,7 @@ def persist_xp_event(user, amount: int, reason: str, worklog_entry,
             user_xp.level = new_level
             
             user_xp.save()
+            record_xp(user.id, amount, user_xp.total_xp)
             
             logger.info(f"Persisted XP event: user={user.id}, amount={amount}, new_total={user_xp.total_xp}, level={new_level}")
             
@@ -1,9 +1,17 @@
 """
 Tool: Update user streak based on worklog activity.
+
+``advance_streak`` applies one new logged date on top of the stored state,
+which only works for dates after ``last_counted_date``. Back-dated entries
+(bulk imports, back-fills) can join or split runs that were already
+counted, so those go through ``compute_streak``, which rebuilds the whole
+state from the user's distinct logged dates in one pass.
 """
 import logging
+from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Dict, Any
+from itertools import groupby
+from typing import Dict, Any, Iterable, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -47,12 +55,48 @@ def update_streak(user, entry_date: date, config: Dict) -> Dict[str, Any]:
             'changes': {'started_streak': True}
         }
     
-    # Check if this date already counted
-    if streak.last_counted_date == entry_date:
-        logger.info(f"User {user.id} already logged for {entry_date}, no streak update")
+    if streak.last_counted_date and entry_date < streak.last_counted_date:
+        # Back-dated entry: may bridge or extend runs that were already counted
+        freezes_before = streak.freezes_used
+        recompute_streak(user, config, streak=streak)
+        streak.save()
+        
         return {
             'current_streak': streak.current_streak,
             'longest_streak': streak.longest_streak,
+            'freeze_used': streak.freezes_used > freezes_before,
+            'streak_broken': False,
+            'changes': {'recomputed': True}
+        }
+    
+    step = advance_streak(streak, entry_date)
+    if not step['changes'].get('already_counted'):
+        streak.save()
+    
+    return {
+        'current_streak': streak.current_streak,
+        'longest_streak': streak.longest_streak,
+        **step,
+    }
+
+
+def advance_streak(streak, entry_date: date) -> Dict[str, Any]:
+    """
+    Apply one logged date to a UserStreak in memory (caller saves).
+    
+    Args:
+        streak: UserStreak instance
+        entry_date: Date of the worklog entry
+    
+    Returns:
+        {'freeze_used': bool, 'streak_broken': bool, 'changes': Dict}
+    """
+    user_id = streak.user_id
+    
+    # Check if this date already counted
+    if streak.last_counted_date == entry_date:
+        logger.info(f"User {user_id} already logged for {entry_date}, no streak update")
+        return {
             'freeze_used': False,
             'streak_broken': False,
             'changes': {'already_counted': True}
@@ -75,7 +119,7 @@ def update_streak(user, entry_date: date, config: Dict) -> Dict[str, Any]:
             streak.longest_streak = streak.current_streak
             changes['new_longest'] = True
         changes['incremented'] = True
-        logger.info(f"User {user.id} streak incremented to {streak.current_streak}")
+        logger.info(f"User {user_id} streak incremented to {streak.current_streak}")
     
     elif days_diff == 2 and streak.freezes_remaining > 0:
         # Missed one day but has freeze available
@@ -86,24 +130,165 @@ def update_streak(user, entry_date: date, config: Dict) -> Dict[str, Any]:
         if streak.current_streak > streak.longest_streak:
             streak.longest_streak = streak.current_streak
         changes['freeze_applied'] = True
-        logger.info(f"User {user.id} used freeze, streak continues at {streak.current_streak}")
+        logger.info(f"User {user_id} used freeze, streak continues at {streak.current_streak}")
     
     else:
         # Streak broken
         streak_broken = True
         old_streak = streak.current_streak
         streak.current_streak = 1
+        streak.longest_streak = max(streak.longest_streak, 1)
         changes['broken'] = True
         changes['old_streak'] = old_streak
-        logger.info(f"User {user.id} streak broken (was {old_streak}), restarting at 1")
+        logger.info(f"User {user_id} streak broken (was {old_streak}), restarting at 1")
     
     streak.last_counted_date = entry_date
-    streak.save()
     
     return {
-        'current_streak': streak.current_streak,
-        'longest_streak': streak.longest_streak,
         'freeze_used': freeze_used,
         'streak_broken': streak_broken,
         'changes': changes,
     }
+
+
+@dataclass
+class StreakState:
+    """Streak fields derived from a set of logged dates."""
+    current_streak: int = 0
+    longest_streak: int = 0
+    last_counted_date: Optional[date] = None
+    freezes_used: int = 0
+
+
+def compute_streak(dates: Iterable[date], max_freezes: int = 3) -> StreakState:
+    """
+    Derive streak state from logged dates, in any order and with duplicates.
+    
+    Same rules as ``advance_streak``: consecutive days extend the run, a
+    single missed day is bridged while freezes remain, anything longer
+    restarts the run at 1.
+    
+    Args:
+        dates: Logged dates
+        max_freezes: Freezes available over the whole history
+    
+    Returns:
+        StreakState
+    """
+    days = sorted(set(dates))
+    if not days:
+        return StreakState()
+    
+    run = longest = 1
+    freezes_used = 0
+    for previous, current in zip(days, days[1:]):
+        gap = (current - previous).days
+        if gap == 1:
+            run += 1
+        elif gap == 2 and freezes_used < max_freezes:
+            freezes_used += 1
+            run += 1
+        else:
+            run = 1
+        longest = max(longest, run)
+    
+    return StreakState(run, longest, days[-1], freezes_used)
+
+
+def _apply_state(streak, state: StreakState, max_freezes: int) -> None:
+    streak.current_streak = state.current_streak
+    streak.longest_streak = state.longest_streak
+    streak.last_counted_date = state.last_counted_date
+    streak.freezes_used = state.freezes_used
+    streak.freezes_remaining = max(max_freezes - state.freezes_used, 0)
+
+
+def _logged_dates(config: Dict):
+    """Distinct (user_id, occurred_on) rows of entries long enough to count."""
+    from django.db.models.functions import Length, Trim
+    from apps.worklog.models import WorkLog
+    
+    return (
+        WorkLog.objects
+        .annotate(content_length=Length(Trim('content')))
+        .filter(content_length__gte=config.get('min_entry_length', 20))
+        .values_list('user_id', 'occurred_on')
+        .order_by('user_id', 'occurred_on')
+        .distinct()
+    )
+
+
+def recompute_streak(user, config: Dict, streak=None):
+    """
+    Rebuild a user's streak from their logged dates.
+    
+    Only the content-length rule of ``is_meaningful_entry`` is applied to
+    history; the rate and duplicate rules depend on creation time.
+    
+    Args:
+        user: User instance
+        config: Reward configuration (``min_entry_length``, ``max_freezes``)
+        streak: Optional UserStreak to update in memory instead (caller saves)
+    
+    Returns:
+        The UserStreak
+    """
+    from apps.gamification.models import UserStreak
+    
+    max_freezes = config.get('max_freezes', 3)
+    dates = _logged_dates(config).filter(user_id=user.id).values_list('occurred_on', flat=True)
+    state = compute_streak(dates, max_freezes)
+    
+    if streak is not None:
+        _apply_state(streak, state, max_freezes)
+        return streak
+    
+    streak, _ = UserStreak.objects.get_or_create(user=user)
+    _apply_state(streak, state, max_freezes)
+    streak.save()
+    return streak
+
+
+def recompute_streaks(user_ids: List[int], config: Dict) -> int:
+    """
+    Rebuild streaks for a batch of users with one read and two bulk writes.
+    
+    Args:
+        user_ids: Users to recompute
+        config: Reward configuration (``min_entry_length``, ``max_freezes``)
+    
+    Returns:
+        Number of streak rows written
+    """
+    from django.utils import timezone
+    from apps.gamification.models import UserStreak
+    
+    max_freezes = config.get('max_freezes', 3)
+    rows = _logged_dates(config).filter(user_id__in=user_ids)
+    states = {
+        user_id: compute_streak((day for _, day in group), max_freezes)
+        for user_id, group in groupby(rows, key=lambda row: row[0])
+    }
+    
+    existing = {streak.user_id: streak for streak in UserStreak.objects.filter(user_id__in=user_ids)}
+    to_update, to_create = [], []
+    now = timezone.now()
+    for user_id in user_ids:
+        state = states.get(user_id, StreakState())
+        streak = existing.get(user_id)
+        if streak is None:
+            if state.last_counted_date is None:
+                continue
+            streak = UserStreak(user_id=user_id)
+            to_create.append(streak)
+        else:
+            to_update.append(streak)
+        _apply_state(streak, state, max_freezes)
+        streak.updated_at = now
+    
+    UserStreak.objects.bulk_create(to_create)
+    UserStreak.objects.bulk_update(to_update, [
+        'current_streak', 'longest_streak', 'last_counted_date',
+        'freezes_used', 'freezes_remaining', 'updated_at',
+    ])
+    return len(to_create) + len(to_update)
@@ -27,13 +27,57 @@ def compute_xp(entry, attachments_count: int, tags: list, config: Dict) -> Dict[
             'reason': str
         }
     """
+    breakdown = xp_breakdown(entry, attachments_count, tags, config)
+    max_daily_xp = config.get('max_daily_xp', 200)
+    total_xp = sum(breakdown.values())
+    
+    # Check daily cap
+    from apps.gamification.models import UserXP
+    user_xp, _ = UserXP.objects.get_or_create(user=entry.user)
+    
+    today = timezone.now().date()
+    if user_xp.daily_xp_date != today:
+        # Reset daily counter
+        user_xp.daily_xp = 0
+        user_xp.daily_xp_date = today
+    
+    capped = False
+    if user_xp.daily_xp + total_xp > max_daily_xp:
+        capped = True
+        total_xp = max(0, max_daily_xp - user_xp.daily_xp)
+        logger.info(f"XP capped for user {entry.user.id} at daily limit {max_daily_xp}")
+    
+    result = {
+        'total_xp': total_xp,
+        'breakdown': breakdown,
+        'capped': capped,
+        'reason': f"Entry {entry.id} quality assessment"
+    }
+    
+    logger.info(f"Computed XP for entry {entry.id}: {total_xp} (breakdown: {json.dumps(breakdown)})")
+    
+    return result
+
+
+def xp_breakdown(entry, attachments_count: int, tags: list, config: Dict) -> Dict[str, int]:
+    """
+    Compute the uncapped XP breakdown for an entry (no database access).
+    
+    Args:
+        entry: WorkLog instance
+        attachments_count: Number of attachments
+        tags: List of tags/skills referenced
+        config: Reward configuration with XP rules
+    
+    Returns:
+        XP per component: base, attachments, tags, length_bonus, metadata_bonus
+    """
     xp_rules = config.get('xp_rules', {})
     base_xp = xp_rules.get('base_entry', 10)
     attachment_xp = xp_rules.get('per_attachment', 5)
     tag_xp = xp_rules.get('per_tag', 3)
     length_bonus_threshold = xp_rules.get('length_bonus_threshold', 200)
     length_bonus_xp = xp_rules.get('length_bonus', 10)
-    max_daily_xp = config.get('max_daily_xp', 200)
     
     breakdown = {
         'base': base_xp,
@@ -65,31 +109,4 @@ def compute_xp(entry, attachments_count: int, tags: list, config: Dict) -> Dict[
     if metadata.get('blockers') or metadata.get('challenges'):
         breakdown['metadata_bonus'] += 5
     
-    total_xp = sum(breakdown.values())
-    
-    # Check daily cap
-    from apps.gamification.models import UserXP
-    user_xp, _ = UserXP.objects.get_or_create(user=entry.user)
-    
-    today = timezone.now().date()
-    if user_xp.daily_xp_date != today:
-        # Reset daily counter
-        user_xp.daily_xp = 0
-        user_xp.daily_xp_date = today
-    
-    capped = False
-    if user_xp.daily_xp + total_xp > max_daily_xp:
-        capped = True
-        total_xp = max(0, max_daily_xp - user_xp.daily_xp)
-        logger.info(f"XP capped for user {entry.user.id} at daily limit {max_daily_xp}")
-    
-    result = {
-        'total_xp': total_xp,
-        'breakdown': breakdown,
-        'capped': capped,
-        'reason': f"Entry {entry.id} quality assessment"
-    }
-    
-    logger.info(f"Computed XP for entry {entry.id}: {total_xp} (breakdown: {json.dumps(breakdown)})")
-    
-    return result
+    return breakdown
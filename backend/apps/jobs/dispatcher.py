@@ -1,11 +1,19 @@
 """
 Job dispatcher - enqueues jobs for execution.
-Enforces quotas and concurrency limits.
+Enforces quotas and concurrency limits, and places each job in its priority
+lane (see ``apps.jobs.lanes``).
 """
-from typing import Optional
-from datetime import datetime
+import struct
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
 from .models import Job
 
 User = get_user_model()
@@ -30,7 +38,9 @@ def enqueue(
     scheduled_for: Optional[datetime] = None,
     max_retries: int = 3,
     enforce_quotas: bool = True,
-    enforce_concurrency: bool = True
+    enforce_concurrency: bool = True,
+    dedupe_key: str = '',
+    quotas: Optional[Dict[str, int]] = None
 ) -> Job:
     """
     Enqueue a job for execution with quota and concurrency enforcement.
@@ -45,6 +55,9 @@ def enqueue(
         max_retries: Maximum retry attempts
         enforce_quotas: Whether to enforce quota limits (default: True)
         enforce_concurrency: Whether to enforce concurrency limits (default: True)
+        dedupe_key: Coalescing key (see enqueue_coalesced)
+        quotas: Extra quotas to reserve with jobs_per_day, e.g. {'reports_per_day': 1}.
+            All are reserved atomically and released if the job is not created.
     
     Returns:
         Created Job instance
@@ -54,68 +67,284 @@ def enqueue(
         ConcurrencyLimitError: If concurrency limit reached
     """
     # Import here to avoid circular dependency
+    from apps.jobs.lanes import assign
     from apps.tenants.quotas import QuotaManager, ConcurrencyLimiter
-    from apps.tenants.models import Tenant
+    from apps.tenants.services import find_tenant_for_user
     
-    # Get tenant for quota/concurrency checks
-    tenant = None
-    if user:
-        try:
-            tenant = Tenant.objects.get(owner=user)
-        except Tenant.DoesNotExist:
-            pass
+    # Get tenant for quota/concurrency checks (cached on the user instance)
+    tenant = find_tenant_for_user(user) if user else None
     
-    # Enforce quotas
+    # Enforce quotas: every quota is reserved in one atomic call
+    reservation = {}
     if enforce_quotas and tenant:
         quota_manager = QuotaManager(tenant)
-        
-        # Check job quota
-        allowed, error = quota_manager.check_quota('jobs_per_day')
+        reservation = {'jobs_per_day': 1, **(quotas or {})}
+        allowed, error = quota_manager.reserve(reservation)
         if not allowed:
             raise QuotaExceededError(error)
-        
-        # Consume job quota
-        quota_manager.consume_quota('jobs_per_day')
     
-    # Enforce concurrency limits
+    # Enforce concurrency limits: the slot is leased under the job's own id
+    job_id = uuid.uuid4()
+    concurrency_limiter = None
     if enforce_concurrency and tenant:
         concurrency_limiter = ConcurrencyLimiter(tenant, job_type)
-        
-        # Try to acquire concurrency slot
-        job_id_temp = f'pending-{job_type}-{user.id if user else "system"}'
-        acquired, error = concurrency_limiter.acquire(job_id_temp)
+        acquired, error = concurrency_limiter.acquire(str(job_id))
         if not acquired:
+            if reservation:
+                quota_manager.release(reservation)
             raise ConcurrencyLimitError(error)
     
     # Create job
-    job = Job.objects.create(
-        type=job_type,
-        status='queued',
-        trigger=trigger,
-        payload=payload,
-        user=user,
-        parent_job=parent_job,
-        scheduled_for=scheduled_for,
-        max_retries=max_retries
-    )
-    
-    # Release temporary concurrency slot and acquire with real job ID
-    if enforce_concurrency and tenant:
-        concurrency_limiter.release(job_id_temp)
-        concurrency_limiter.acquire(str(job.id))
+    try:
+        lane, (priority,) = assign(job_type, tenant)
+        job = Job.objects.create(
+            id=job_id,
+            type=job_type,
+            status='queued',
+            lane=lane,
+            executor=_executor_for(job_type),
+            holds_slot=concurrency_limiter is not None,
+            trigger=trigger,
+            payload=payload,
+            dedupe_key=dedupe_key,
+            user=user,
+            parent_job=parent_job,
+            scheduled_for=scheduled_for,
+            max_retries=max_retries
+        )
+    except Exception:
+        if concurrency_limiter:
+            concurrency_limiter.release(str(job_id))
+        if reservation:
+            quota_manager.release(reservation)
+        raise
+    
+    # LLM-bound jobs wait in the table for the asyncio worker when it is enabled
+    if job.executor == 'async':
+        return job
     
     # Import here to avoid circular dependency
     from apps.workers.execute_job import execute_job
     
     # Enqueue to Huey
     if scheduled_for:
-        execute_job.schedule(args=(str(job.id),), eta=scheduled_for)
+        execute_job.schedule(args=(str(job.id),), eta=scheduled_for, priority=priority)
     else:
-        execute_job(str(job.id))
+        execute_job(str(job.id), priority=priority)
     
     return job
 
 
+def enqueue_coalesced(
+    job_type: str,
+    dedupe_key: str,
+    ids: Iterable,
+    id_field: str = 'entry_ids',
+    window_seconds: Optional[int] = None,
+    payload: Optional[Dict] = None,
+    **kwargs
+) -> Job:
+    """
+    Enqueue a debounced job, merging into a pending one with the same key.
+    
+    The first trigger schedules a job ``window_seconds`` in the future. Later
+    triggers for the same ``(job_type, dedupe_key)`` that arrive before it
+    starts add their ids to its payload instead of creating another job, so
+    they cost no extra Job row, quota or concurrency slot. The pending job
+    itself does not hold a concurrency slot while it waits.
+    
+    Args:
+        job_type: Type of job (maps to workflow)
+        dedupe_key: Coalescing key, e.g. 'user:42'
+        ids: Ids to process; the job payload holds the union under ``id_field``
+        id_field: Payload key for the ids
+        window_seconds: Debounce window (default: settings.JOB_COALESCE_WINDOW_SECONDS);
+            0 dispatches immediately without coalescing
+        payload: Other payload fields; they must be the same for every trigger
+            sharing ``dedupe_key``, since only the ids are merged
+        **kwargs: Passed through to enqueue()
+    
+    Returns:
+        The pending Job the ids were merged into, or the newly created one
+    """
+    ids = set(ids)
+    if window_seconds is None:
+        window_seconds = getattr(settings, 'JOB_COALESCE_WINDOW_SECONDS', 10)
+    
+    if window_seconds > 0:
+        with transaction.atomic():
+            # The worker refreshes the payload after marking a job running, so
+            # anything merged while the job is still queued is picked up.
+            pending = (
+                Job.objects.select_for_update()
+                .filter(type=job_type, dedupe_key=dedupe_key, status='queued', started_at__isnull=True)
+                .order_by('created_at')
+                .first()
+            )
+            if pending:
+                merged = ids | set(pending.payload.get(id_field, []))
+                pending.payload = {**pending.payload, id_field: sorted(merged)}
+                pending.save(update_fields=['payload'])
+                return pending
+        kwargs.setdefault('scheduled_for', timezone.now() + timedelta(seconds=window_seconds))
+        # A job waiting out its debounce window is not running; don't hold a slot for it
+        kwargs.setdefault('enforce_concurrency', False)
+    
+    return enqueue(job_type, {**(payload or {}), id_field: sorted(ids)}, dedupe_key=dedupe_key, **kwargs)
+
+
+def enqueue_many(
+    specs: Iterable[Dict],
+    trigger: str = 'system',
+    parent_job: Optional[Job] = None,
+    scheduled_for: Optional[datetime] = None,
+    max_retries: int = 3,
+    enforce_quotas: bool = True,
+    batch_size: int = 1000
+) -> Tuple[List[Job], List[Dict]]:
+    """
+    Enqueue many jobs at once (fan-out).
+    
+    Tenants are resolved in one query and each tenant's ``jobs_per_day`` is
+    reserved once for all of its jobs - a tenant whose quota cannot cover
+    the whole batch gets none of them. Lanes and fair-share priorities are
+    assigned per (job type, tenant) group, Job rows are inserted with
+    ``bulk_create`` and the Huey messages are pushed in one Redis pipeline.
+    
+    Fan-out jobs queue rather than run immediately, so like coalesced jobs
+    they do not take concurrency slots.
+    
+    Args:
+        specs: Dicts with ``job_type``, ``payload`` and optional ``user``
+        trigger: How the jobs were triggered
+        parent_job: Parent job for all created jobs
+        scheduled_for: Schedule all jobs for future execution
+        max_retries: Maximum retry attempts
+        enforce_quotas: Whether to enforce quota limits (default: True)
+        batch_size: Rows per INSERT
+    
+    Returns:
+        (created_jobs, rejected) where rejected holds {'index', 'error'} per skipped spec
+    """
+    from apps.jobs.lanes import assign
+    from apps.tenants.models import Tenant
+    from apps.tenants.quotas import QuotaManager
+    
+    specs = list(specs)
+    user_ids = {spec['user'].id for spec in specs if spec.get('user')}
+    tenants = {tenant.owner_id: tenant for tenant in Tenant.objects.filter(owner_id__in=user_ids)}
+    
+    rejected = []
+    reserved = {}
+    if enforce_quotas:
+        by_tenant = defaultdict(list)
+        for index, spec in enumerate(specs):
+            tenant = tenants.get(spec['user'].id) if spec.get('user') else None
+            if tenant:
+                by_tenant[tenant].append(index)
+        for tenant, indexes in by_tenant.items():
+            allowed, error = QuotaManager(tenant).reserve({'jobs_per_day': len(indexes)})
+            if allowed:
+                reserved[tenant] = len(indexes)
+            else:
+                rejected.extend({'index': index, 'error': error} for index in indexes)
+    
+    skipped = {item['index'] for item in rejected}
+    groups = defaultdict(list)
+    for index, spec in enumerate(specs):
+        if index not in skipped:
+            tenant = tenants.get(spec['user'].id) if spec.get('user') else None
+            groups[(spec['job_type'], tenant)].append(index)
+    placement = {}
+    for (job_type, tenant), indexes in groups.items():
+        lane, priorities = assign(job_type, tenant, count=len(indexes))
+        placement.update((index, (lane, priority)) for index, priority in zip(indexes, priorities))
+    
+    indexes = sorted(placement)
+    jobs = [
+        Job(
+            type=specs[index]['job_type'],
+            status='queued',
+            lane=placement[index][0],
+            executor=_executor_for(specs[index]['job_type']),
+            trigger=trigger,
+            payload=specs[index]['payload'],
+            user=specs[index].get('user'),
+            parent_job=parent_job,
+            scheduled_for=scheduled_for,
+            max_retries=max_retries,
+        )
+        for index in indexes
+    ]
+    try:
+        jobs = Job.objects.bulk_create(jobs, batch_size=batch_size)
+        to_huey = [
+            (str(job.id), placement[index][1])
+            for job, index in zip(jobs, indexes)
+            if job.executor != 'async'
+        ]
+        _dispatch_many(
+            [job_id for job_id, _ in to_huey],
+            scheduled_for,
+            priorities=[priority for _, priority in to_huey],
+        )
+    except Exception:
+        # Nothing will run: drop the rows (a worker ignores ids it cannot
+        # find) and give back every tenant's reservation, as enqueue does
+        Job.objects.filter(id__in=[job.id for job in jobs]).delete()
+        for tenant, amount in reserved.items():
+            QuotaManager(tenant).release({'jobs_per_day': amount})
+        raise
+    
+    return jobs, rejected
+
+
+def _executor_for(job_type: str) -> str:
+    """'async' for LLM-bound types while the asyncio worker is enabled, else 'huey'."""
+    from apps.jobs.registry import is_llm_bound
+    from apps.workers.async_worker import enabled
+    
+    return 'async' if enabled() and is_llm_bound(job_type) else 'huey'
+
+
+def _dispatch_many(
+    job_ids: List[str],
+    scheduled_for: Optional[datetime] = None,
+    priorities: Optional[List[float]] = None
+):
+    """
+    Hand jobs to Huey, pipelined when the queue is Redis: one LPUSH per
+    chunk for a plain list queue, one ZADD per chunk for the priority queue.
+    """
+    from huey.contrib.djhuey import HUEY
+    from huey.storage import PriorityRedisStorage, RedisStorage
+    from apps.workers.execute_job import execute_job
+    
+    priorities = priorities or [None] * len(job_ids)
+    tasks = [
+        execute_job.s(job_id, eta=scheduled_for, priority=priority)
+        for job_id, priority in zip(job_ids, priorities)
+    ]
+    storage = HUEY.storage
+    if HUEY.immediate or type(storage) not in (RedisStorage, PriorityRedisStorage):
+        for task in tasks:
+            HUEY.enqueue(task)
+        return
+    
+    pipe = storage.conn.pipeline(transaction=False)
+    for start in range(0, len(tasks), 1000):
+        chunk = tasks[start:start + 1000]
+        if isinstance(storage, PriorityRedisStorage):
+            # Same message layout as RedisPriorityQueue.enqueue: timestamp prefix, score -priority
+            prefix = struct.pack('>Q', int(time.time() * 1e6))
+            pipe.zadd(storage.queue_key, {
+                prefix + HUEY.serialize_task(task): -(task.priority or 0) for task in chunk
+            })
+        else:
+            pipe.lpush(storage.queue_key, *[HUEY.serialize_task(task) for task in chunk])
+    pipe.execute()
+
+
 def enqueue_safe(
     job_type: str,
     payload: dict,
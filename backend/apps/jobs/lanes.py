@@ -0,0 +1,164 @@
+"""
+Priority lanes and weighted fair ordering for the worker queue.
+
+Jobs go to one of three lanes - interactive, background, bulk - chosen by
+job type (``JOB_LANES``) and tenant plan (free-plan background work runs
+in bulk). Huey's priority storage pops the lowest score first, so each
+lane is a score band and a job's score inside its band is a per-tenant
+virtual-clock finish tag:
+
+    finish = max(now, tenant's previous finish in this lane) + cost / weight
+
+A tenant enqueueing a burst pushes its own later jobs further out while
+other tenants' new jobs start at ``now``, so no tenant can monopolise the
+workers; paid plans weigh more and drain proportionally faster.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.system.redis_client import get_redis_client, redis_key
+
+logger = logging.getLogger(__name__)
+
+LANES = ('interactive', 'background', 'bulk')
+
+# Score band per lane; finish tags (epoch seconds) stay well below the band width
+LANE_BANDS = {'interactive': 0, 'background': 1e10, 'bulk': 2e10}
+
+DEFAULT_JOB_LANES = {
+    'gamification.reward_evaluate': 'interactive',
+    'worklog.analyze': 'interactive',
+    'report.generate': 'background',
+    'resume.refresh': 'background',
+    'skills.extract': 'background',
+    'system.compute_metrics': 'bulk',
+}
+
+# Virtual seconds a job of this type costs its tenant
+DEFAULT_JOB_COSTS = {
+    'report.generate': 5,
+    'resume.refresh': 5,
+    'skills.extract': 5,
+}
+
+PLAN_WEIGHTS = {'free': 1, 'starter': 2, 'professional': 4}
+
+# Plan -> {lane: lane it is demoted to}
+PLAN_DEMOTIONS = {'free': {'background': 'bulk'}}
+
+# KEYS[1]: tenant's last finish tag in a lane. ARGV: cost / weight, job count.
+# Returns the finish tags as strings (Lua numbers would be truncated).
+_FINISH_TAGS_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local step = tonumber(ARGV[1])
+local last = tonumber(redis.call('GET', KEYS[1]) or '0')
+local finish = math.max(now, last)
+local tags = {}
+for i = 1, tonumber(ARGV[2]) do
+    finish = finish + step
+    tags[i] = string.format('%.6f', finish)
+end
+redis.call('SET', KEYS[1], tags[#tags], 'EX', math.ceil(finish - now) + 60)
+return tags
+"""
+
+_local_lock = threading.Lock()
+_local_finish: Dict[str, float] = {}
+
+
+def lane_for(job_type: str, tenant=None) -> str:
+    """Lane a job type runs in for a tenant's plan."""
+    lanes = getattr(settings, 'JOB_LANES', DEFAULT_JOB_LANES)
+    lane = lanes.get(job_type, 'background')
+    plan = getattr(tenant, 'plan', 'free') if tenant else None
+    return PLAN_DEMOTIONS.get(plan, {}).get(lane, lane)
+
+
+def assign(job_type: str, tenant=None, count: int = 1) -> Tuple[str, List[float]]:
+    """
+    Pick the lane for ``count`` jobs of one type and tenant and give each a
+    Huey priority (higher runs first).
+
+    Returns:
+        (lane, priorities) with one priority per job, in enqueue order
+    """
+    lane = lane_for(job_type, tenant)
+    costs = getattr(settings, 'JOB_COSTS', DEFAULT_JOB_COSTS)
+    weight = PLAN_WEIGHTS.get(getattr(tenant, 'plan', 'free'), 1) if tenant else 1
+    step = costs.get(job_type, 1) / weight
+    key = f"lanes:finish:{lane}:{tenant.id if tenant else 'system'}"
+
+    client = get_redis_client()
+    if client is not None:
+        tags = [float(tag) for tag in client.eval(_FINISH_TAGS_LUA, 1, redis_key(key), step, count)]
+    else:
+        with _local_lock:
+            finish = max(time.time(), _local_finish.get(key, 0))
+            tags = [finish + step * n for n in range(1, count + 1)]
+            _local_finish[key] = tags[-1]
+
+    # Huey stores -priority as the score and pops the lowest score first
+    return lane, [-(LANE_BANDS[lane] + tag) for tag in tags]
+
+
+def lane_depths() -> Dict[str, int]:
+    """Messages waiting in each lane of the Huey queue."""
+    from huey.contrib.djhuey import HUEY
+    from huey.storage import PriorityRedisStorage
+
+    storage = HUEY.storage
+    if isinstance(storage, PriorityRedisStorage):
+        pipe = storage.conn.pipeline(transaction=False)
+        for lane in LANES:
+            pipe.zcount(storage.queue_key, LANE_BANDS[lane], f"({LANE_BANDS[lane] + 1e10}")
+        return dict(zip(LANES, pipe.execute()))
+
+    # Immediate/memory queues: fall back to queued Job rows that are due
+    from apps.jobs.models import Job
+    from django.db.models import Count, Q
+
+    due = Job.objects.filter(status='queued', started_at__isnull=True).filter(
+        Q(scheduled_for__isnull=True) | Q(scheduled_for__lte=timezone.now())
+    )
+    counts = dict(due.values('lane').annotate(n=Count('id')).values_list('lane', 'n'))
+    return {lane: counts.get(lane, 0) for lane in LANES}
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(len(values) * fraction), len(values) - 1)], 3)
+
+
+def lane_metrics(window_minutes: int = 60) -> Dict[str, Dict]:
+    """
+    Per-lane queue depth and wait time (enqueue/due time to start) for jobs
+    started in the last ``window_minutes``.
+    """
+    from apps.jobs.models import Job
+
+    since = timezone.now() - timedelta(minutes=window_minutes)
+    waits = {lane: [] for lane in LANES}
+    rows = Job.objects.filter(started_at__gte=since).values_list('lane', 'created_at', 'scheduled_for', 'started_at')
+    for lane, created_at, scheduled_for, started_at in rows:
+        due = max(created_at, scheduled_for) if scheduled_for else created_at
+        waits.setdefault(lane, []).append(max((started_at - due).total_seconds(), 0))
+
+    depths = lane_depths()
+    return {
+        lane: {
+            'depth': depths.get(lane, 0),
+            'started': len(waits[lane]),
+            'wait_p50_seconds': _percentile(waits[lane], 0.5),
+            'wait_p95_seconds': _percentile(waits[lane], 0.95),
+        }
+        for lane in LANES
+    }
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_dedupe_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='lane',
+            field=models.CharField(choices=[('interactive', 'Interactive'), ('background', 'Background'), ('bulk', 'Bulk')], default='background', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['lane', 'started_at'], name='jobs_job_lane_19a5d4_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_job_lane'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='executor',
+            field=models.CharField(choices=[('huey', 'Huey'), ('async', 'Async worker')], default='huey', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['executor', 'status', 'created_at'], name='jobs_job_executo_9acd7b_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_executor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='holds_slot',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -23,12 +23,33 @@ class Job(models.Model):
         ('retry', 'Retry'),
     ]
     
+    LANE_CHOICES = [
+        ('interactive', 'Interactive'),
+        ('background', 'Background'),
+        ('bulk', 'Bulk'),
+    ]
+    
+    EXECUTOR_CHOICES = [
+        ('huey', 'Huey'),
+        ('async', 'Async worker'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     type = models.CharField(max_length=100, db_index=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
     trigger = models.CharField(max_length=20, choices=TRIGGER_CHOICES, default='api')
+    # Priority lane the job was queued in (see apps.jobs.lanes)
+    lane = models.CharField(max_length=20, choices=LANE_CHOICES, default='background')
+    # Who runs the job, fixed at enqueue: only 'async' jobs are claimed by
+    # the asyncio worker (apps.workers.async_worker); 'huey' jobs were sent to Huey
+    executor = models.CharField(max_length=10, choices=EXECUTOR_CHOICES, default='huey')
+    # Enqueued with a concurrency slot (or handed one by a failed attempt);
+    # the worker re-acquires it if the lease lapsed while the job was queued
+    holds_slot = models.BooleanField(default=False)
     
     payload = models.JSONField(default=dict)
+    # Set by coalescing dispatch; pending jobs sharing (type, dedupe_key) are merged
+    dedupe_key = models.CharField(max_length=200, blank=True)
     result = models.JSONField(null=True, blank=True)
     error = models.TextField(blank=True)
     
@@ -49,6 +70,9 @@ class Job(models.Model):
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['type', 'status']),
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['type', 'dedupe_key', 'status']),
+            models.Index(fields=['lane', 'started_at']),
+            models.Index(fields=['executor', 'status', 'created_at']),
         ]
 
     def __str__(self):
@@ -0,0 +1,56 @@
+"""
+Incremental job output.
+
+Workflows that stream LLM output append chunks here as they arrive; clients
+poll ``GET /api/jobs/<id>/output/?cursor=N`` for the chunks after the ones
+they already have. Chunks live in a Redis list per job (a cached list on
+non-Redis caches) and expire an hour after the last write.
+"""
+import threading
+from typing import List, Tuple
+
+from django.core.cache import cache
+
+from apps.system.redis_client import decode, get_redis_client, redis_key
+
+OUTPUT_TTL_SECONDS = 3600
+
+_local_lock = threading.Lock()
+
+
+def _key(job_id) -> str:
+    return f'job_output:{job_id}'
+
+
+def append_output(job_id, text: str) -> None:
+    """Append a chunk to a job's output."""
+    if not text:
+        return
+    client = get_redis_client()
+    if client is not None:
+        key = redis_key(_key(job_id))
+        pipe = client.pipeline(transaction=False)
+        pipe.rpush(key, text)
+        pipe.expire(key, OUTPUT_TTL_SECONDS)
+        pipe.execute()
+        return
+    with _local_lock:
+        chunks = cache.get(_key(job_id)) or []
+        chunks.append(text)
+        cache.set(_key(job_id), chunks, OUTPUT_TTL_SECONDS)
+
+
+def read_output(job_id, cursor: int = 0) -> Tuple[List[str], int]:
+    """
+    Chunks of a job's output from position ``cursor`` on.
+
+    Returns:
+        (chunks, next_cursor)
+    """
+    cursor = max(cursor, 0)
+    client = get_redis_client()
+    if client is not None:
+        chunks = [decode(chunk) for chunk in client.lrange(redis_key(_key(job_id)), cursor, -1)]
+    else:
+        chunks = (cache.get(_key(job_id)) or [])[cursor:]
+    return chunks, cursor + len(chunks)
@@ -1,16 +1,36 @@
 """
 Job type registry - maps job types to workflow callables.
+
+Job types declare how they spend their time: CPU-bound ones run in the
+worker's process pool instead of on a Huey thread (apps.workers.process_pool),
+LLM-bound ones can be run by the asyncio worker (apps.workers.async_worker).
 """
-from typing import Callable, Dict
+from typing import Callable, Dict, Set
 
 # Registry of job_type -> workflow function
 _REGISTRY: Dict[str, Callable] = {}
 
+# Job types whose workflows are CPU-bound / spend most of their time waiting on the LLM
+_CPU_BOUND: Set[str] = set()
+_LLM_BOUND: Set[str] = set()
+
 
-def register(job_type: str):
-    """Decorator to register a workflow function."""
+def register(job_type: str, cpu_bound: bool = False, llm_bound: bool = False):
+    """
+    Decorator to register a workflow function.
+    
+    Args:
+        job_type: Type of job
+        cpu_bound: Run the workflow in a worker process rather than a thread
+        llm_bound: The workflow mostly waits on LLM calls
+    """
     def decorator(func: Callable):
         _REGISTRY[job_type] = func
+        for flag, types in ((cpu_bound, _CPU_BOUND), (llm_bound, _LLM_BOUND)):
+            if flag:
+                types.add(job_type)
+            else:
+                types.discard(job_type)
         return func
     return decorator
 
@@ -22,6 +42,21 @@ def get_workflow(job_type: str) -> Callable:
     return _REGISTRY[job_type]
 
 
+def is_cpu_bound(job_type: str) -> bool:
+    """Whether a job type was registered as CPU-bound."""
+    return job_type in _CPU_BOUND
+
+
+def is_llm_bound(job_type: str) -> bool:
+    """Whether a job type was registered as LLM-bound."""
+    return job_type in _LLM_BOUND
+
+
+def llm_bound_job_types():
+    """List job types registered as LLM-bound."""
+    return sorted(_LLM_BOUND)
+
+
 def list_job_types():
     """List all registered job types."""
     return list(_REGISTRY.keys())
@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from django.utils import timezone
 from croniter import croniter
 from .models import Schedule
-from .dispatcher import enqueue
+from .dispatcher import enqueue_many
 
 
 def tick():
@@ -15,18 +15,20 @@ def tick():
     """
     now = timezone.now()
     
-    for schedule in Schedule.objects.filter(enabled=True):
-        if should_run(schedule, now):
-            # Enqueue the job
-            enqueue(
-                job_type=schedule.job_type,
-                payload=schedule.payload,
-                trigger='schedule'
-            )
-            
-            # Update last run
-            schedule.last_run_at = now
-            schedule.save(update_fields=['last_run_at'])
+    due = [schedule for schedule in Schedule.objects.filter(enabled=True) if should_run(schedule, now)]
+    if not due:
+        return
+    
+    # Enqueue all due jobs in one batch
+    enqueue_many(
+        [{'job_type': schedule.job_type, 'payload': schedule.payload} for schedule in due],
+        trigger='schedule'
+    )
+    
+    # Update last run
+    for schedule in due:
+        schedule.last_run_at = now
+    Schedule.objects.bulk_update(due, ['last_run_at'])
 
 
 def should_run(schedule: Schedule, now: datetime) -> bool:
@@ -0,0 +1,150 @@
+"""
+Live job timeline.
+
+Events written by the event sink and the job's status transitions are
+appended to a per-job timeline and announced on the job's Redis pub/sub
+channel, so ``GET /api/jobs/<id>/stream/`` can push them to the client as
+server-sent events without re-querying the Job and its events.
+
+Like job output, the timeline is a Redis list per job (a cached list on
+non-Redis caches, where followers poll instead of subscribing) that
+expires an hour after the last write. An entry's position in the list is
+its SSE id, so a client reconnecting with ``Last-Event-ID: N`` resumes at
+entry N + 1.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Iterator, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.system.redis_client import decode, get_redis_client, redis_key
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_TTL_SECONDS = 3600
+# 'retrying' is published instead of 'queued' when a failed job hands over
+# to a retry job, which has its own timeline
+TERMINAL_STATUSES = ('success', 'failed', 'cancelled', 'retrying')
+
+_local_lock = threading.Lock()
+
+
+def _key(job_id) -> str:
+    return f'job_timeline:{job_id}'
+
+
+def publish(job_id, entries: List[dict]) -> None:
+    """Append entries to a job's timeline and wake its followers."""
+    if not entries:
+        return
+    try:
+        client = get_redis_client()
+        if client is not None:
+            key = redis_key(_key(job_id))
+            pipe = client.pipeline(transaction=False)
+            pipe.rpush(key, *[json.dumps(entry, default=str) for entry in entries])
+            pipe.expire(key, TIMELINE_TTL_SECONDS)
+            pipe.publish(key, len(entries))
+            pipe.execute()
+            return
+        with _local_lock:
+            timeline = cache.get(_key(job_id)) or []
+            timeline.extend(json.loads(json.dumps(entry, default=str)) for entry in entries)
+            cache.set(_key(job_id), timeline, TIMELINE_TTL_SECONDS)
+    except Exception as e:
+        # The live timeline is best effort; the events table stays authoritative
+        logger.warning(f"Failed to publish timeline of job {job_id}: {e}")
+
+
+def publish_events(events) -> None:
+    """Publish a batch of Events (any mix of jobs)."""
+    by_job = defaultdict(list)
+    for event in events:
+        by_job[str(event.job_id)].append({
+            'type': 'event',
+            'timestamp': event.timestamp.isoformat(),
+            'level': event.level,
+            'source': event.source,
+            'message': event.message,
+            'data': event.data,
+        })
+    for job_id, entries in by_job.items():
+        publish(job_id, entries)
+
+
+def publish_status(job, status: Optional[str] = None, **extra) -> None:
+    """
+    Publish a job's status (call after saving a transition).
+    
+    Flush buffered events first so they precede a terminal status.
+    """
+    publish(job.id, [{
+        'type': 'status',
+        'timestamp': timezone.now().isoformat(),
+        'status': status or job.status,
+        'error': job.error or None,
+        **extra,
+    }])
+
+
+def read(job_id, cursor: int = 0) -> Tuple[List[dict], int]:
+    """
+    Timeline entries from position ``cursor`` on.
+
+    Returns:
+        (entries, next_cursor)
+    """
+    cursor = max(cursor, 0)
+    client = get_redis_client()
+    if client is not None:
+        entries = [json.loads(decode(entry)) for entry in client.lrange(redis_key(_key(job_id)), cursor, -1)]
+    else:
+        entries = (cache.get(_key(job_id)) or [])[cursor:]
+    return entries, cursor + len(entries)
+
+
+def follow(job_id, cursor: int = 0, max_seconds: float = 300,
+           keepalive_seconds: float = 15) -> Iterator[Optional[Tuple[int, dict]]]:
+    """
+    Yield ``(position, entry)`` for new timeline entries as they arrive.
+
+    Yields None when nothing arrived for ``keepalive_seconds`` (so the
+    caller can keep the connection open). Stops after a terminal status
+    entry or after ``max_seconds``; clients reconnect with Last-Event-ID.
+    """
+    client = get_redis_client()
+    pubsub = None
+    if client is not None:
+        # Subscribe before reading so no publish falls between the two
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(redis_key(_key(job_id)))
+
+    deadline = time.monotonic() + max_seconds
+    last_sent = time.monotonic()
+    try:
+        while time.monotonic() < deadline:
+            entries, next_cursor = read(job_id, cursor)
+            for position, entry in enumerate(entries, start=cursor):
+                yield position, entry
+                if entry.get('type') == 'status' and entry.get('status') in TERMINAL_STATUSES:
+                    return
+            cursor = next_cursor
+            if entries:
+                last_sent = time.monotonic()
+                continue
+
+            if pubsub is not None:
+                pubsub.get_message(timeout=min(keepalive_seconds, max(deadline - time.monotonic(), 0)))
+            else:
+                time.sleep(1)
+            if time.monotonic() - last_sent >= keepalive_seconds:
+                last_sent = time.monotonic()
+                yield None
+    finally:
+        if pubsub is not None:
+            pubsub.close()
@@ -0,0 +1,101 @@
+"""
+Micro-batching of completion requests.
+
+Concurrent callers ``submit`` prompts and get a Future back. A collector
+thread gathers prompts for up to ``max_wait_ms`` (or until ``max_size`` are
+waiting), groups them by generation parameters and sends each group as one
+request; the results are fanned back out to the callers' futures.
+
+A failed batch is retried prompt by prompt, so one bad prompt (e.g. longer
+than the model context) fails only its own caller.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# send_batch(prompts, params) -> one result (or Exception) per prompt, in order
+SendBatch = Callable[[List[str], Dict[str, Any]], List[Any]]
+
+
+class MicroBatcher:
+    """Collects prompts from concurrent callers into batched requests."""
+
+    def __init__(self, send_batch: SendBatch, max_size: int = 16, max_wait_ms: float = 5,
+                 max_in_flight: int = 8):
+        self.send_batch = send_batch
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='llm-batch')
+        self._collector = None
+        self._lock = threading.Lock()
+
+    def submit(self, prompt: str, **params) -> Future:
+        """Queue a prompt; the Future resolves to its result or raises its error."""
+        future = Future()
+        self._queue.put((prompt, params, future))
+        self._ensure_collector()
+        return future
+
+    def _ensure_collector(self):
+        with self._lock:
+            if self._collector is None or not self._collector.is_alive():
+                self._collector = threading.Thread(target=self._collect, name='llm-batch-collector', daemon=True)
+                self._collector.start()
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # One request carries one set of generation parameters
+            groups = defaultdict(list)
+            for item in batch:
+                groups[tuple(sorted(item[1].items()))].append(item)
+            for key, items in groups.items():
+                self._executor.submit(self._flush, items, dict(key))
+
+    def _flush(self, items, params):
+        try:
+            results = self.send_batch([prompt for prompt, _, _ in items], params)
+        except Exception as e:
+            if len(items) > 1:
+                logger.warning(f"Batch of {len(items)} prompts failed ({e}); retrying individually")
+                for item in items:
+                    self._flush([item], params)
+                return
+            results = [e]
+
+        for (_, _, future), result in zip(items, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+_batchers: Dict[tuple, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(key: tuple, send_batch: SendBatch, max_size: int, max_wait_ms: float,
+                max_in_flight: int = 8) -> MicroBatcher:
+    """Process-wide batcher for ``key`` (e.g. endpoint and model), created on first use."""
+    with _batchers_lock:
+        if key not in _batchers:
+            _batchers[key] = MicroBatcher(send_batch, max_size=max_size, max_wait_ms=max_wait_ms,
+                                          max_in_flight=max_in_flight)
+        return _batchers[key]
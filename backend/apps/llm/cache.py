@@ -0,0 +1,112 @@
+"""
+Content-addressed cache of LLM responses.
+
+Responses are stored through ``AI_CALL_IDEMPOTENCY`` under a key hashed from
+(provider, model, prompt, sampling params), so a retried workflow or a
+prompt rebuilt from unchanged worklogs does not hit the model again.
+
+Entries expire after ``LLM_CACHE_TTL_SECONDS``. The cache is also bounded
+to ``LLM_CACHE_MAX_ENTRIES``: a Redis sorted set indexes keys by last use
+and the least recently used ones are evicted (process-local LRU index on
+non-Redis caches). Hits and misses are counted per agent.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.jobs.idempotency import AI_CALL_IDEMPOTENCY
+from apps.observability.metrics import CACHE_REQUESTS
+from apps.system.redis_client import decode, get_redis_client, redis_key
+
+INDEX_KEY = 'llm_cache:index'
+STATS_KEY = 'llm_cache:stats'
+
+_local_lock = threading.Lock()
+_local_index: 'OrderedDict[str, None]' = OrderedDict()
+
+
+def enabled() -> bool:
+    return getattr(settings, 'LLM_CACHE_ENABLED', True)
+
+
+def cache_key(provider: str, model: str, prompt: str, params: dict) -> str:
+    """Content address of a completion request."""
+    return AI_CALL_IDEMPOTENCY.generate_key(
+        provider=provider,
+        model=model,
+        prompt_hash=hashlib.sha256(prompt.encode()).hexdigest(),
+        params=params,
+    )
+
+
+def get(key: str, agent: str) -> Optional[dict]:
+    """Cached response for ``key``, counting a hit or miss for ``agent``."""
+    result = AI_CALL_IDEMPOTENCY.check(key)
+    _record(agent, 'hit' if result.is_duplicate else 'miss')
+    CACHE_REQUESTS.inc(cache='llm', result='hit' if result.is_duplicate else 'miss')
+    if result.is_duplicate:
+        _touch(key)
+        return result.cached_result
+    return None
+
+
+def put(key: str, response: dict) -> None:
+    """Store a response and evict least recently used entries beyond the bound."""
+    ttl = getattr(settings, 'LLM_CACHE_TTL_SECONDS', AI_CALL_IDEMPOTENCY.ttl)
+    AI_CALL_IDEMPOTENCY.store(key, response, ttl)
+    for evicted in _touch(key):
+        AI_CALL_IDEMPOTENCY.invalidate(evicted)
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counts per agent, e.g. {'WorklogAgent': {'hit': 3, 'miss': 1}}."""
+    client = get_redis_client()
+    if client is not None:
+        counts = {decode(field): int(value) for field, value in client.hgetall(redis_key(STATS_KEY)).items()}
+    else:
+        counts = cache.get(STATS_KEY) or {}
+    result = {}
+    for field, value in counts.items():
+        agent, outcome = field.rsplit(':', 1)
+        result.setdefault(agent, {'hit': 0, 'miss': 0})[outcome] = value
+    return result
+
+
+def _record(agent: str, outcome: str) -> None:
+    field = f'{agent}:{outcome}'
+    client = get_redis_client()
+    if client is not None:
+        client.hincrby(redis_key(STATS_KEY), field, 1)
+        return
+    with _local_lock:
+        counts = cache.get(STATS_KEY) or {}
+        counts[field] = counts.get(field, 0) + 1
+        cache.set(STATS_KEY, counts, None)
+
+
+def _touch(key: str):
+    """Mark ``key`` as just used; return the keys evicted to stay within the bound."""
+    max_entries = getattr(settings, 'LLM_CACHE_MAX_ENTRIES', 10000)
+    client = get_redis_client()
+    if client is not None:
+        index = redis_key(INDEX_KEY)
+        pipe = client.pipeline(transaction=True)
+        pipe.zadd(index, {key: time.time()})
+        pipe.zcard(index)
+        _, size = pipe.execute()
+        if size <= max_entries:
+            return []
+        return [decode(member) for member, _ in client.zpopmin(index, size - max_entries)]
+
+    with _local_lock:
+        _local_index[key] = None
+        _local_index.move_to_end(key)
+        evicted = []
+        while len(_local_index) > max_entries:
+            evicted.append(_local_index.popitem(last=False)[0])
+        return evicted
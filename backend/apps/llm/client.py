@@ -2,7 +2,7 @@
 LLM client factory and interface.
 """
 from django.conf import settings
-from typing import Protocol
+from typing import AsyncIterator, Iterator, Protocol
 
 
 class LLMProvider(Protocol):
@@ -11,7 +11,22 @@ class LLMProvider(Protocol):
     model_name: str
     
     def complete(self, prompt: str, **kwargs) -> dict:
-        """Complete a prompt and return structured response."""
+        """
+        Complete a prompt and return structured response, including
+        ``usage`` token counts and ``latency_ms`` (see apps.llm.usage).
+        """
+        ...
+    
+    async def acomplete(self, prompt: str, **kwargs) -> dict:
+        """Async variant of complete (pooled HTTP client, see apps.llm.http)."""
+        ...
+    
+    def stream(self, prompt: str, **kwargs) -> Iterator[dict]:
+        """Yield {'text': chunk}s, then {'done': True, 'response': <as complete()>}."""
+        ...
+    
+    def astream(self, prompt: str, **kwargs) -> AsyncIterator[dict]:
+        """Async variant of stream (pooled HTTP client, see apps.llm.http)."""
         ...
 
 
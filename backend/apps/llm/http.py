@@ -0,0 +1,40 @@
+"""
+Pooled async HTTP client for LLM providers.
+
+One ``httpx.AsyncClient`` per event loop (clients cannot cross loops), so
+every provider call made on a loop shares its keep-alive connections.
+"""
+import asyncio
+import weakref
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_clients = weakref.WeakKeyDictionary()
+
+# Set by the async worker for the jobs it runs: synchronous agent code then
+# sends LLM requests through ``acomplete`` on the worker's event loop.
+use_event_loop: ContextVar[bool] = ContextVar('llm_use_event_loop', default=False)
+
+
+def get_async_client():
+    """Return the pooled client for the running event loop."""
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        max_connections = getattr(settings, 'LLM_MAX_CONNECTIONS', 64)
+        client = httpx.AsyncClient(
+            timeout=getattr(settings, 'LLM_TIMEOUT_SECONDS', 30),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aclose_async_client():
+    """Close the running loop's client (call before the loop shuts down)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
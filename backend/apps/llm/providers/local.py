@@ -4,6 +4,8 @@ Local fake LLM provider for testing.
 import json
 import hashlib
 
+from apps.llm.usage import estimate_usage
+
 
 class LocalProvider:
     """
@@ -14,7 +16,24 @@ class LocalProvider:
     model_name = "local-fake"
     
     def complete(self, prompt: str, **kwargs) -> dict:
-        """Return deterministic fake response."""
+        """Return deterministic fake response with estimated usage."""
+        response = self._respond(prompt)
+        return {**response, 'usage': estimate_usage(prompt, json.dumps(response)), 'latency_ms': 0}
+    
+    def stream(self, prompt: str, **kwargs):
+        """Yield the JSON of complete() in chunks, then the full response."""
+        response = self.complete(prompt, **kwargs)
+        text = json.dumps({key: value for key, value in response.items() if key not in ('usage', 'latency_ms')})
+        for start in range(0, len(text), 32):
+            yield {'text': text[start:start + 32]}
+        yield {'done': True, 'response': response}
+    
+    async def astream(self, prompt: str, **kwargs):
+        """Async variant of stream; no I/O, so it never awaits."""
+        for event in self.stream(prompt, **kwargs):
+            yield event
+    
+    def _respond(self, prompt: str) -> dict:
         # Generate response based on prompt hash for determinism
         prompt_hash = hashlib.md5(prompt.encode()).hexdigest()[:8]
         
@@ -59,3 +78,7 @@ class LocalProvider:
             'response': f'Processed prompt {prompt_hash}',
             'success': True
         }
+    
+    async def acomplete(self, prompt: str, **kwargs) -> dict:
+        """Async variant of complete; no I/O, so it never awaits."""
+        return self.complete(prompt, **kwargs)
@@ -1,8 +1,16 @@
 """
 Ollama provider (stub for MVP).
+
+Responses carry ``usage`` and ``latency_ms`` (see apps.llm.usage).
 """
+import json
+import time
+from typing import AsyncIterator, Iterator
+
 import requests
 
+from apps.llm.usage import estimate_usage, make_usage
+
 
 class OllamaProvider:
     """Ollama provider for local generation."""
@@ -21,8 +29,89 @@ class OllamaProvider:
         - Response parsing
         - Token management
         """
-        url = f"{self.endpoint}/api/generate"
+        started = time.monotonic()
+        try:
+            response = requests.post(self._url(), json=self._payload(prompt, **kwargs), timeout=30)
+            response.raise_for_status()
+            result = self._parse(response.json(), prompt)
+
+        except Exception as e:
+            result = self._fallback(e)
+        return {**result, 'latency_ms': round((time.monotonic() - started) * 1000)}
+
+    async def acomplete(self, prompt: str, **kwargs) -> dict:
+        """Async complete over the event loop's pooled HTTP client."""
+        from apps.llm.http import get_async_client
+
+        started = time.monotonic()
+        try:
+            response = await get_async_client().post(self._url(), json=self._payload(prompt, **kwargs))
+            response.raise_for_status()
+            result = self._parse(response.json(), prompt)
+
+        except Exception as e:
+            result = self._fallback(e)
+        return {**result, 'latency_ms': round((time.monotonic() - started) * 1000)}
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[dict]:
+        """
+        Stream a generation (Ollama sends one JSON object per line).
 
+        Yields:
+            {'text': chunk} per chunk, then {'done': True, 'response': <as complete()>}
+        """
+        started = time.monotonic()
+        parts, final = [], {}
+        try:
+            payload = {**self._payload(prompt, **kwargs), 'stream': True}
+            with requests.post(self._url(), json=payload, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('response'):
+                        parts.append(chunk['response'])
+                        yield {'text': chunk['response']}
+                    if chunk.get('done'):
+                        final = chunk
+                        break
+            result = self._parse({**final, 'response': ''.join(parts)}, prompt)
+
+        except Exception as e:
+            result = self._fallback(e)
+        yield {'done': True, 'response': {**result, 'latency_ms': round((time.monotonic() - started) * 1000)}}
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[dict]:
+        """Async variant of stream over the event loop's pooled HTTP client."""
+        from apps.llm.http import get_async_client
+
+        started = time.monotonic()
+        parts, final = [], {}
+        try:
+            payload = {**self._payload(prompt, **kwargs), 'stream': True}
+            async with get_async_client().stream('POST', self._url(), json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('response'):
+                        parts.append(chunk['response'])
+                        yield {'text': chunk['response']}
+                    if chunk.get('done'):
+                        final = chunk
+                        break
+            result = self._parse({**final, 'response': ''.join(parts)}, prompt)
+
+        except Exception as e:
+            result = self._fallback(e)
+        yield {'done': True, 'response': {**result, 'latency_ms': round((time.monotonic() - started) * 1000)}}
+
+    def _url(self) -> str:
+        return f"{self.endpoint}/api/generate"
+
+    def _payload(self, prompt: str, **kwargs) -> dict:
         payload = {
             'model': self.model_name,
             'prompt': prompt,
@@ -36,17 +125,19 @@ class OllamaProvider:
             options['num_predict'] = kwargs['max_tokens']
         if options:
             payload['options'] = options
+        return payload
 
-        try:
-            response = requests.post(url, json=payload, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+    def _parse(self, data: dict, prompt: str) -> dict:
+        text = data.get('response', '')
+        if 'prompt_eval_count' in data or 'eval_count' in data:
+            usage = make_usage(data.get('prompt_eval_count', 0), data.get('eval_count', 0))
+        else:
+            usage = estimate_usage(prompt, text)
+        return {'response': text, 'raw': data, 'usage': usage}
 
-            text = data.get('response', '')
-            return {'response': text, 'raw': data}
-
-        except Exception as e:
-            return {
-                'error': str(e),
-                'response': 'Ollama unavailable, using fallback'
-            }
+    def _fallback(self, error: Exception) -> dict:
+        return {
+            'error': str(error),
+            'response': 'Ollama unavailable, using fallback',
+            'usage': make_usage(0, 0),
+        }
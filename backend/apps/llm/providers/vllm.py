@@ -1,7 +1,27 @@
 """
 vLLM provider (stub for MVP).
+
+With ``LLM_BATCH_MAX_SIZE`` > 1, prompts from concurrent callers are
+micro-batched into one ``/v1/completions`` request (see apps.llm.batching).
+Batches are sent with a blocking session on the batcher's thread pool, so
+at most ``LLM_BATCH_MAX_IN_FLIGHT`` batches (of up to LLM_BATCH_MAX_SIZE
+prompts) are outstanding per endpoint and model, for sync and async
+callers alike. Set LLM_BATCH_MAX_SIZE to 1 to have ``acomplete`` post
+directly on the event loop's async client instead.
+Responses carry ``usage`` and ``latency_ms`` (see apps.llm.usage).
 """
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Iterator, Optional
+
 import requests
+from django.conf import settings
+
+from apps.llm.usage import estimate_usage, make_usage
+
+# Keep-alive connections for batched requests
+_session = requests.Session()
 
 
 class VLLMProvider:
@@ -21,32 +41,182 @@ class VLLMProvider:
         - Response parsing
         - Token management
         """
-        url = f"{self.endpoint}/v1/completions"
+        started = time.monotonic()
+        try:
+            batcher = self._batcher()
+            if batcher:
+                result = batcher.submit(prompt, **self._params(**kwargs)).result()
+            else:
+                response = requests.post(self._url(), json=self._payload(prompt, **kwargs), timeout=30)
+                response.raise_for_status()
+                result = self._parse(response.json(), prompt)
         
-        payload = {
-            'model': self.model_name,
-            'prompt': prompt,
-            'max_tokens': kwargs.get('max_tokens', 500),
-            'temperature': kwargs.get('temperature', 0.7),
-        }
+        except Exception as e:
+            result = self._fallback(e)
+        return {**result, 'latency_ms': round((time.monotonic() - started) * 1000)}
+    
+    async def acomplete(self, prompt: str, **kwargs) -> dict:
+        """
+        Async complete.
         
+        Batched prompts wait on the shared batcher (bounded by
+        LLM_BATCH_MAX_IN_FLIGHT, not the async worker's concurrency);
+        with batching off they go over the event loop's pooled HTTP client.
+        """
+        from apps.llm.http import get_async_client
+        
+        started = time.monotonic()
         try:
-            response = requests.post(url, json=payload, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract text from response
-            text = data['choices'][0]['text']
-            
-            # Try to parse as JSON, fall back to text
-            try:
-                return {'response': text, 'raw': data}
-            except:
-                return {'response': text}
+            batcher = self._batcher()
+            if batcher:
+                result = await asyncio.wrap_future(batcher.submit(prompt, **self._params(**kwargs)))
+            else:
+                response = await get_async_client().post(self._url(), json=self._payload(prompt, **kwargs))
+                response.raise_for_status()
+                result = self._parse(response.json(), prompt)
         
         except Exception as e:
-            # Fallback to local provider behavior
-            return {
-                'error': str(e),
-                'response': 'vLLM unavailable, using fallback'
-            }
+            result = self._fallback(e)
+        return {**result, 'latency_ms': round((time.monotonic() - started) * 1000)}
+    
+    def stream(self, prompt: str, **kwargs) -> Iterator[dict]:
+        """
+        Stream a completion as server-sent chunks.
+        
+        Yields:
+            {'text': chunk} per chunk, then {'done': True, 'response': <as complete()>}
+        """
+        started = time.monotonic()
+        parts, usage = [], None
+        try:
+            with _session.post(self._url(), json=self._stream_payload(prompt, **kwargs), timeout=30, stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    chunk = self._stream_chunk(line)
+                    if chunk is None:
+                        break
+                    usage = chunk.get('usage') or usage
+                    for text in self._chunk_texts(chunk):
+                        parts.append(text)
+                        yield {'text': text}
+            result = self._parse({'choices': [{'text': ''.join(parts)}], 'usage': usage}, prompt)
+        
+        except Exception as e:
+            result = self._fallback(e)
+        yield {'done': True, 'response': {**result, 'latency_ms': round((time.monotonic() - started) * 1000)}}
+    
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[dict]:
+        """Async variant of stream over the event loop's pooled HTTP client (never batched)."""
+        from apps.llm.http import get_async_client
+        
+        started = time.monotonic()
+        parts, usage = [], None
+        try:
+            async with get_async_client().stream('POST', self._url(), json=self._stream_payload(prompt, **kwargs)) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    chunk = self._stream_chunk(line)
+                    if chunk is None:
+                        break
+                    usage = chunk.get('usage') or usage
+                    for text in self._chunk_texts(chunk):
+                        parts.append(text)
+                        yield {'text': text}
+            result = self._parse({'choices': [{'text': ''.join(parts)}], 'usage': usage}, prompt)
+        
+        except Exception as e:
+            result = self._fallback(e)
+        yield {'done': True, 'response': {**result, 'latency_ms': round((time.monotonic() - started) * 1000)}}
+    
+    def send_batch(self, prompts: list, params: dict) -> list:
+        """
+        Complete several prompts in one request.
+        
+        Returns:
+            One parsed response per prompt, or a ValueError for a prompt
+            the server returned no choice for
+        """
+        payload = {'model': self.model_name, 'prompt': prompts, **params}
+        response = _session.post(self._url(), json=payload, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        
+        choices = {choice.get('index', i): choice for i, choice in enumerate(data['choices'])}
+        results = []
+        for index, prompt in enumerate(prompts):
+            choice = choices.get(index)
+            if choice is None:
+                results.append(ValueError(f"No completion returned for prompt {index}"))
+            else:
+                results.append(self._parse({**data, 'choices': [choice], 'usage': None}, prompt))
+        
+        # The server reports usage for the whole batch; share it out by estimated size
+        usage = data.get('usage')
+        parsed = [result for result in results if isinstance(result, dict)]
+        if usage and parsed:
+            for field in ('prompt_tokens', 'completion_tokens'):
+                estimated = sum(result['usage'][field] for result in parsed) or 1
+                for result in parsed:
+                    result['usage'][field] = round(usage.get(field, 0) * result['usage'][field] / estimated)
+            for result in parsed:
+                result['usage'] = make_usage(result['usage']['prompt_tokens'], result['usage']['completion_tokens'])
+        return results
+    
+    def _batcher(self):
+        from apps.llm.batching import get_batcher
+        
+        max_size = getattr(settings, 'LLM_BATCH_MAX_SIZE', 16)
+        if max_size <= 1:
+            return None
+        return get_batcher(
+            ('vllm', self.endpoint, self.model_name),
+            self.send_batch,
+            max_size=max_size,
+            max_wait_ms=getattr(settings, 'LLM_BATCH_MAX_WAIT_MS', 5),
+            max_in_flight=getattr(settings, 'LLM_BATCH_MAX_IN_FLIGHT', 8),
+        )
+    
+    def _url(self) -> str:
+        return f"{self.endpoint}/v1/completions"
+    
+    def _params(self, **kwargs) -> dict:
+        return {
+            'max_tokens': kwargs.get('max_tokens', 500),
+            'temperature': kwargs.get('temperature', 0.7),
+        }
+    
+    def _payload(self, prompt: str, **kwargs) -> dict:
+        return {'model': self.model_name, 'prompt': prompt, **self._params(**kwargs)}
+    
+    def _stream_payload(self, prompt: str, **kwargs) -> dict:
+        return {**self._payload(prompt, **kwargs), 'stream': True, 'stream_options': {'include_usage': True}}
+    
+    def _stream_chunk(self, line: str) -> Optional[dict]:
+        """Decoded chunk of one server-sent line ({} for other lines), None at [DONE]."""
+        if not line or not line.startswith('data:'):
+            return {}
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            return None
+        return json.loads(data)
+    
+    def _chunk_texts(self, chunk: dict) -> list:
+        return [choice['text'] for choice in chunk.get('choices') or [] if choice.get('text')]
+    
+    def _parse(self, data: dict, prompt: str) -> dict:
+        # Extract text from response
+        text = data['choices'][0]['text']
+        usage = data.get('usage')
+        if usage:
+            usage = make_usage(usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0))
+        else:
+            usage = estimate_usage(prompt, text)
+        return {'response': text, 'raw': data, 'usage': usage}
+    
+    def _fallback(self, error: Exception) -> dict:
+        # Fallback to local provider behavior
+        return {
+            'error': str(error),
+            'response': 'vLLM unavailable, using fallback',
+            'usage': make_usage(0, 0),
+        }
@@ -0,0 +1,75 @@
+"""
+Token accounting for LLM calls.
+
+Provider responses carry ``usage`` ({'prompt_tokens', 'completion_tokens',
+'total_tokens', 'estimated'}) and ``latency_ms``. Counts come from the
+server when it reports them and are estimated from text length otherwise.
+
+``TokenMeter`` charges the tenant's ``ai_tokens_per_day`` quota: the
+worst case (prompt estimate + max_tokens) is reserved before the call, so a
+tenant at its limit is refused up front, and the reservation is settled
+against the real count afterwards.
+"""
+import math
+from typing import Optional
+
+from apps.tenants.quotas import QuotaManager
+
+QUOTA = 'ai_tokens_per_day'
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def make_usage(prompt_tokens: int, completion_tokens: int, estimated: bool = False) -> dict:
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+        'estimated': estimated,
+    }
+
+
+def estimate_usage(prompt: str, completion: str) -> dict:
+    return make_usage(estimate_tokens(prompt), estimate_tokens(completion), estimated=True)
+
+
+class TokenMeter:
+    """Charges one LLM call to a user's tenant."""
+
+    def __init__(self, user_id: Optional[int]):
+        from apps.tenants.models import Tenant
+
+        self.tenant = Tenant.objects.filter(owner_id=user_id).first() if user_id else None
+        self.reserved = 0
+
+    def reserve(self, prompt: str, max_tokens: int) -> None:
+        """
+        Reserve the call's worst-case token count.
+
+        Raises:
+            QuotaExceededError: If the tenant's daily token quota cannot cover it
+        """
+        from apps.jobs.dispatcher import QuotaExceededError
+
+        if not self.tenant:
+            return
+        amount = estimate_tokens(prompt) + max_tokens
+        allowed, error = QuotaManager(self.tenant).reserve({QUOTA: amount})
+        if not allowed:
+            raise QuotaExceededError(error)
+        self.reserved = amount
+
+    def settle(self, usage: Optional[dict]) -> None:
+        """Replace the reservation with the call's real token count."""
+        if not self.tenant:
+            return
+        actual = (usage or {}).get('total_tokens', 0)
+        manager = QuotaManager(self.tenant)
+        if actual > self.reserved:
+            manager.consume_quota(QUOTA, actual - self.reserved)
+        elif actual < self.reserved:
+            manager.release({QUOTA: self.reserved - actual})
+        self.reserved = 0
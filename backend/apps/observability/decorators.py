@@ -3,7 +3,9 @@ Decorators for observability instrumentation.
 """
 import functools
 import time
+from .metrics import STEP_DURATION
 from .services import log_event
+from .sink import flush_events
 
 
 def trace_step(step_name: str, source: str = 'workflow'):
@@ -31,6 +33,8 @@ def trace_step(step_name: str, source: str = 'workflow'):
                     source=source,
                     duration_seconds=duration
                 )
+                STEP_DURATION.observe(duration, step=step_name, status='success')
+                flush_events()
                 return result
             except Exception as e:
                 duration = time.time() - start_time
@@ -42,6 +46,8 @@ def trace_step(step_name: str, source: str = 'workflow'):
                     duration_seconds=duration,
                     error=str(e)
                 )
+                STEP_DURATION.observe(duration, step=step_name, status='failed')
+                flush_events()
                 raise
         
         return wrapper
@@ -0,0 +1,33 @@
+"""
+Django management command to move job events from the Redis stream into Postgres.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.observability.sink import drain_stream
+from apps.system.redis_client import get_redis_client
+
+
+class Command(BaseCommand):
+    help = 'Write job events buffered in the Redis stream (EVENT_SINK=redis) to the events table'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Events per bulk insert')
+        parser.add_argument('--consumer', default=None, help='Consumer name in the group (default: hostname)')
+        parser.add_argument('--once', action='store_true', help='Drain what is there and exit')
+    
+    def handle(self, *args, **options):
+        if get_redis_client() is None:
+            self.stdout.write(self.style.WARNING('Default cache is not Redis; nothing to drain'))
+            return
+        
+        total = 0
+        while True:
+            written = drain_stream(options['consumer'], count=max(options['batch_size'], 1))
+            total += written
+            if options['once'] and not written:
+                break
+            if not written:
+                time.sleep(0.1)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {total} events'))
@@ -0,0 +1,264 @@
+"""
+In-process metrics registry with a Prometheus text exposition.
+
+Counters, gauges and fixed-bucket histograms are kept in memory by each
+process, so recording a sample is a dict update under a lock rather than a
+``Metric`` INSERT. ``GET /metrics`` renders them in the Prometheus text
+format.
+
+Multi-process aggregation: API (gunicorn) and Huey workers are separate
+processes, so each one periodically pushes the deltas it recorded since its
+last push into one Redis hash per metric (HINCRBYFLOAT; gauges are HSET,
+last writer wins). ``/metrics`` pushes its own process's deltas and renders
+the Redis totals, so whichever process serves the scrape reports the whole
+deployment. On non-Redis caches (tests, dev) it renders the local registry.
+
+``METRICS_FLUSH_SECONDS`` sets how often a process pushes (checked when it
+records a sample).
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from apps.system.redis_client import decode, get_redis_client, redis_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_registry: Dict[str, '_Metric'] = {}
+_flush_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+        self._pending: Dict[Tuple, object] = {}
+        _registry[name] = self
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _take_pending(self) -> Dict[Tuple, object]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _label_text(self, key: Tuple, extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests served."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            self._pending[key] = self._pending.get(key, 0) + amount
+        _maybe_flush()
+
+    def _flush(self, pipe, hash_key: str) -> None:
+        for key, delta in self._take_pending().items():
+            pipe.hincrbyfloat(hash_key, json.dumps(key), delta)
+
+    def _samples(self, values: Dict[Tuple, object]) -> List[str]:
+        return [f'{self.name}{self._label_text(key)} {_number(value)}' for key, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. queue depth."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+            self._pending[key] = value
+        _maybe_flush()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            self._pending[key] = self._values[key]
+        _maybe_flush()
+
+    def _flush(self, pipe, hash_key: str) -> None:
+        for key, value in self._take_pending().items():
+            pipe.hset(hash_key, json.dumps(key), value)
+
+
+class Histogram(_Metric):
+    """Distribution over fixed buckets, e.g. request latency in seconds."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            for store in (self._values, self._pending):
+                # Per-bucket (non-cumulative) counts, then sum and count
+                entry = store.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0, 0])
+                entry[index] += 1
+                entry[-2] += value
+                entry[-1] += 1
+        _maybe_flush()
+
+    def _flush(self, pipe, hash_key: str) -> None:
+        for key, entry in self._take_pending().items():
+            for index, amount in enumerate(entry):
+                if amount:
+                    pipe.hincrbyfloat(hash_key, f'{json.dumps(key)}\t{index}', amount)
+
+    def _samples(self, values: Dict[Tuple, object]) -> List[str]:
+        lines = []
+        bounds = [_number(bound) for bound in self.buckets] + ['+Inf']
+        for key, entry in sorted(values.items()):
+            cumulative = 0
+            for bound, amount in zip(bounds, entry):
+                cumulative += amount
+                le = f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{self._label_text(key, le)} {_number(cumulative)}')
+            lines.append(f'{self.name}_sum{self._label_text(key)} {_number(entry[-2])}')
+            lines.append(f'{self.name}_count{self._label_text(key)} {_number(entry[-1])}')
+        return lines
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Registered counter ``name`` (created on first call)."""
+    return _registry.get(name) or Counter(name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Registered gauge ``name`` (created on first call)."""
+    return _registry.get(name) or Gauge(name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """Registered histogram ``name`` (created on first call)."""
+    return _registry.get(name) or Histogram(name, documentation, labelnames, buckets)
+
+
+# Metrics recorded across the codebase
+JOB_DURATION = histogram('job_duration_seconds', 'Job run time by type and outcome', ('job_type', 'status'))
+JOB_QUEUE_WAIT = histogram('job_queue_wait_seconds', 'Time from enqueue to start (started_at - created_at)',
+                           ('job_type', 'lane'))
+JOB_QUEUE_DEPTH = gauge('job_queue_depth', 'Messages waiting in each queue lane', ('lane',))
+STEP_DURATION = histogram('workflow_step_duration_seconds', 'Traced workflow step run time', ('step', 'status'))
+LLM_LATENCY = histogram('llm_request_duration_seconds', 'LLM completion latency', ('provider', 'model'))
+HTTP_DURATION = histogram('http_request_duration_seconds', 'Request latency by route',
+                          ('method', 'route', 'status'))
+HTTP_DB_QUERIES = histogram('http_request_db_queries', 'Database queries per request', ('method', 'route'),
+                            buckets=COUNT_BUCKETS)
+CACHE_REQUESTS = counter('cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ('cache', 'result'))
+
+
+def flush() -> None:
+    """Push this process's deltas to Redis (no-op on non-Redis caches)."""
+    global _last_flush
+    client = get_redis_client()
+    _last_flush = time.monotonic()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for metric in list(_registry.values()):
+            metric._flush(pipe, redis_key(f'metrics:{metric.name}'))
+        pipe.execute()
+    except Exception as e:
+        # Metrics must never fail the request or job that records them
+        logger.warning(f"Failed to push metrics: {e}")
+
+
+# Short-lived workers push what they recorded since the last interval
+atexit.register(flush)
+
+
+def _maybe_flush() -> None:
+    interval = getattr(settings, 'METRICS_FLUSH_SECONDS', 10)
+    if time.monotonic() - _last_flush < interval or not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        flush()
+    finally:
+        _flush_lock.release()
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text format (v0.0.4)."""
+    metrics = list(_registry.values())
+    totals = _aggregated(metrics)
+    lines = []
+    for metric in metrics:
+        values = totals[metric.name] if totals is not None else dict(metric._values)
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric._samples(values))
+    return '\n'.join(lines) + '\n'
+
+
+def _aggregated(metrics: List[_Metric]) -> Optional[Dict[str, Dict[Tuple, object]]]:
+    """Deployment-wide values read back from Redis, or None without Redis."""
+    client = get_redis_client()
+    if client is None:
+        return None
+    with _flush_lock:
+        flush()
+    try:
+        pipe = client.pipeline(transaction=False)
+        for metric in metrics:
+            pipe.hgetall(redis_key(f'metrics:{metric.name}'))
+        replies = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to read aggregated metrics, serving local values: {e}")
+        return None
+
+    totals = {}
+    for metric, reply in zip(metrics, replies):
+        values = {}
+        for field, value in reply.items():
+            field, value = decode(field), float(decode(value))
+            if isinstance(metric, Histogram):
+                labels, index = field.rsplit('\t', 1)
+                entry = values.setdefault(tuple(json.loads(labels)), [0] * (len(metric.buckets) + 1) + [0.0, 0])
+                entry[int(index)] = value
+            else:
+                values[tuple(json.loads(field))] = value
+        totals[metric.name] = values
+    return totals
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
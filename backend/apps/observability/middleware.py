@@ -0,0 +1,75 @@
+"""
+Request instrumentation middleware.
+"""
+import cProfile
+import hmac
+import random
+
+from django.conf import settings
+from django.db import connection
+
+from . import profiling
+from .metrics import HTTP_DB_QUERIES, HTTP_DURATION
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile every request and record latency and query metrics.
+
+    Wall time, SQL count/time, repeated statements and cache round trips
+    are kept per route (see apps.observability.profiling). Requests are
+    labelled by URL route pattern (not path), so label cardinality stays
+    bounded.
+
+    cProfile runs for PROFILING_SAMPLE_RATE of requests. ``X-Profile: 1``
+    forces a capture only when the request is privileged before the view
+    runs: it carries ``X-Profile-Token`` matching PROFILING_TOKEN, or its
+    session user is staff. Anyone else gets the sample rate.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.enabled():
+            return self.get_response(request)
+
+        profile = profiling.RequestProfile()
+        sampled = random.random() < getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        if sampled or self._profile_requested(request):
+            profile.profiler = cProfile.Profile()
+            profile.profiler.enable()
+
+        token = profiling.activate(profile)
+        try:
+            with connection.execute_wrapper(profile.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            profile.finish()
+            profiling.deactivate(token)
+
+        match = getattr(request, 'resolver_match', None)
+        route = f"{request.method} /{match.route}" if match else f"{request.method} unmatched"
+        labels = {'method': request.method, 'route': match.route if match else 'unmatched'}
+        HTTP_DURATION.observe(profile.duration_ms / 1000, status=response.status_code, **labels)
+        HTTP_DB_QUERIES.observe(profile.queries, **labels)
+
+        profile_key = None
+        if profile.profiler:
+            profile_key = profiling.store_profile(profile.profiler, getattr(request, 'correlation_id', 'request'))
+            if profile_key:
+                response['X-Profile-Key'] = profile_key
+
+        profiling.record(route, profile.as_sample(response.status_code, profile_key))
+        return response
+
+    @staticmethod
+    def _profile_requested(request) -> bool:
+        if request.headers.get('X-Profile') != '1':
+            return False
+        token = getattr(settings, 'PROFILING_TOKEN', '')
+        if token and hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token):
+            return True
+        # Session user only; token-authenticated API users are resolved in the view
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_authenticated and user.is_staff)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.jobs.models import Job
 
 
@@ -21,7 +22,8 @@ class Event(models.Model):
     ]
     
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='events')
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set when the event is logged; buffered events are written later (see sink.py)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     level = models.CharField(max_length=20, choices=LEVEL_CHOICES, default='info')
     source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='system')
     message = models.TextField()
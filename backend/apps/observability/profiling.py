@@ -0,0 +1,258 @@
+"""
+Request profiling.
+
+``RequestProfilingMiddleware`` builds a ``RequestProfile`` for every request:
+wall time, SQL query count and time, repeated statements (the same SQL run
+several times in one request is usually an N+1) and cache round trips
+(counted by the cache backends below). Each profile is appended to a
+bounded per-route sample list, from which ``slowest_endpoints`` computes
+p50/p95 for the staff view.
+
+A fraction of requests (``PROFILING_SAMPLE_RATE``), and requests sent with
+``X-Profile: 1`` by a staff session or with the ``PROFILING_TOKEN`` secret,
+also run under cProfile; the pstats dump is stored in object storage under
+``profiles/`` and its key is kept with the sample.
+"""
+import cProfile
+import hashlib
+import json
+import logging
+import marshal
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.utils import timezone
+
+from apps.system.redis_client import decode, get_redis_client, redis_key
+
+logger = logging.getLogger(__name__)
+
+ROUTES_KEY = 'profiling:routes'
+
+_local_lock = threading.Lock()
+_current: ContextVar[Optional['RequestProfile']] = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """What one request spent its time on."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.duration_ms = 0.0
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.statements = Counter()
+        self.cache_calls = 0
+        self.profiler: Optional[cProfile.Profile] = None
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook timing each query."""
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_ms += (time.monotonic() - started) * 1000
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicates(self) -> int:
+        """Queries that repeated an earlier statement of this request."""
+        return sum(count - 1 for count in self.statements.values())
+
+    def worst_duplicate(self) -> Optional[dict]:
+        if not self.statements:
+            return None
+        sql, count = self.statements.most_common(1)[0]
+        return {'sql': sql[:300], 'count': count} if count > 1 else None
+
+    def finish(self) -> None:
+        self.duration_ms = (time.monotonic() - self.started) * 1000
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def as_sample(self, status: int, profile_key: Optional[str] = None) -> dict:
+        return {
+            'at': timezone.now().isoformat(),
+            'status': status,
+            'duration_ms': round(self.duration_ms, 2),
+            'queries': self.queries,
+            'sql_ms': round(self.sql_ms, 2),
+            'duplicates': self.duplicates(),
+            'worst_duplicate': self.worst_duplicate(),
+            'cache_calls': self.cache_calls,
+            'profile': profile_key,
+        }
+
+
+def activate(profile: RequestProfile):
+    return _current.set(profile)
+
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+
+def enabled() -> bool:
+    return getattr(settings, 'PROFILING_ENABLED', True)
+
+
+class CountingCacheMixin:
+    """Counts calls to a cache backend against the active request profile."""
+
+    def _count(self):
+        profile = _current.get()
+        if profile is not None:
+            profile.cache_calls += 1
+
+    def get(self, *args, **kwargs):
+        self._count()
+        return super().get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        self._count()
+        return super().set(*args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        self._count()
+        return super().add(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._count()
+        return super().delete(*args, **kwargs)
+
+    def touch(self, *args, **kwargs):
+        self._count()
+        return super().touch(*args, **kwargs)
+
+    def has_key(self, *args, **kwargs):
+        self._count()
+        return super().has_key(*args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        self._count()
+        return super().incr(*args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        self._count()
+        return super().get_many(*args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        self._count()
+        return super().set_many(*args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        self._count()
+        return super().delete_many(*args, **kwargs)
+
+
+class CountingRedisCache(CountingCacheMixin, RedisCache):
+    pass
+
+
+class CountingLocMemCache(CountingCacheMixin, LocMemCache):
+    pass
+
+
+def store_profile(profiler: cProfile.Profile, correlation_id: str) -> Optional[str]:
+    """Upload a pstats dump (loadable with ``pstats.Stats``); returns its key."""
+    from apps.storage.minio import get_minio_client
+
+    profiler.create_stats()
+    object_key = f"profiles/{timezone.now():%Y/%m/%d}/{correlation_id}.prof"
+    try:
+        return get_minio_client().upload_file(object_key, marshal.dumps(profiler.stats))
+    except Exception as e:
+        logger.warning(f"Failed to store request profile {object_key}: {e}")
+        return None
+
+
+def record(route: str, sample: dict) -> None:
+    """Append a request sample to its route's bounded sample list."""
+    limit = getattr(settings, 'PROFILING_SAMPLES_PER_ROUTE', 200)
+    threshold = getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', 5)
+    worst = sample['worst_duplicate']
+    if worst and worst['count'] >= threshold:
+        logger.warning(f"{route} ran the same query {worst['count']} times: {worst['sql']}")
+
+    try:
+        client = get_redis_client()
+        if client is not None:
+            key = redis_key(_route_key(route))
+            pipe = client.pipeline(transaction=False)
+            pipe.sadd(redis_key(ROUTES_KEY), route)
+            pipe.lpush(key, json.dumps(sample))
+            pipe.ltrim(key, 0, limit - 1)
+            pipe.execute()
+            return
+        with _local_lock:
+            samples = cache.get(_route_key(route)) or []
+            cache.set(_route_key(route), [sample] + samples[:limit - 1], None)
+            routes = cache.get(ROUTES_KEY) or set()
+            if route not in routes:
+                cache.set(ROUTES_KEY, routes | {route}, None)
+    except Exception as e:
+        # Profiling must never fail the request it measures
+        logger.warning(f"Failed to record request profile for {route}: {e}")
+
+
+def slowest_endpoints(limit: int = 20) -> List[Dict]:
+    """
+    Routes ordered by p95 wall time over their recent samples.
+
+    Returns:
+        [{'route', 'count', 'p50_ms', 'p95_ms', 'avg_queries', 'max_duplicates',
+          'worst_duplicate', 'avg_cache_calls', 'profiles'}]
+    """
+    samples_by_route = _samples()
+    results = []
+    for route, samples in samples_by_route.items():
+        if not samples:
+            continue
+        durations = [sample['duration_ms'] for sample in samples]
+        results.append({
+            'route': route,
+            'count': len(samples),
+            'p50_ms': _percentile(durations, 0.50),
+            'p95_ms': _percentile(durations, 0.95),
+            'avg_queries': round(sum(sample['queries'] for sample in samples) / len(samples), 1),
+            'max_duplicates': max(sample['duplicates'] for sample in samples),
+            'worst_duplicate': max(
+                (sample['worst_duplicate'] for sample in samples if sample['worst_duplicate']),
+                key=lambda worst: worst['count'], default=None
+            ),
+            'avg_cache_calls': round(sum(sample['cache_calls'] for sample in samples) / len(samples), 1),
+            'profiles': [sample['profile'] for sample in samples if sample['profile']][:5],
+        })
+    results.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return results[:limit]
+
+
+def _samples() -> Dict[str, List[dict]]:
+    client = get_redis_client()
+    if client is not None:
+        routes = sorted(decode(route) for route in client.smembers(redis_key(ROUTES_KEY)))
+        pipe = client.pipeline(transaction=False)
+        for route in routes:
+            pipe.lrange(redis_key(_route_key(route)), 0, -1)
+        return {
+            route: [json.loads(decode(sample)) for sample in samples]
+            for route, samples in zip(routes, pipe.execute())
+        }
+    return {route: cache.get(_route_key(route)) or [] for route in sorted(cache.get(ROUTES_KEY) or ())}
+
+
+def _route_key(route: str) -> str:
+    # Routes contain spaces and slashes; keep cache keys portable
+    return f'profiling:route:{hashlib.md5(route.encode()).hexdigest()}'
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return round(values[min(int(len(values) * fraction), len(values) - 1)], 2)
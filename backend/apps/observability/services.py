@@ -27,6 +27,24 @@ def log_event(
         **data: Additional structured data
     """
     from apps.jobs.models import Job
+    from django.utils import timezone
+    from apps.jobs.timeline import publish_events
+    from .sink import current_buffer
+    
+    # Inside a running job: buffer the event (written in bulk, see sink.py)
+    buffer = current_buffer(ctx.job_id)
+    if buffer is not None:
+        event = Event(
+            job_id=ctx.job_id,
+            timestamp=timezone.now(),
+            level=level,
+            source=source,
+            message=message,
+            data=data
+        )
+        buffer.add(event)
+        _log_to_logger(ctx, message, level, source, data)
+        return event
     
     try:
         job = Job.objects.get(id=ctx.job_id)
@@ -37,14 +55,10 @@ def log_event(
             message=message,
             data=data
         )
+        publish_events([event])
         
         # Also log to standard logging
-        log_level = getattr(logging, level.upper(), logging.INFO)
-        logger.log(
-            log_level,
-            f"[{ctx.trace_id}] [{source}] {message}",
-            extra={'job_id': ctx.job_id, 'trace_id': ctx.trace_id, **data}
-        )
+        _log_to_logger(ctx, message, level, source, data)
         
         return event
     except Job.DoesNotExist:
@@ -52,6 +66,15 @@ def log_event(
         return None
 
 
+def _log_to_logger(ctx: ExecutionContext, message: str, level: str, source: str, data: dict):
+    log_level = getattr(logging, level.upper(), logging.INFO)
+    logger.log(
+        log_level,
+        f"[{ctx.trace_id}] [{source}] {message}",
+        extra={'job_id': ctx.job_id, 'trace_id': ctx.trace_id, **data}
+    )
+
+
 def log_metric(
     name: str,
     value: float,
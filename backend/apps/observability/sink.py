@@ -0,0 +1,204 @@
+"""
+Buffered event sink for job timelines.
+
+While a job runs, ``log_event`` appends its events to an in-process buffer
+for that job instead of writing each one (``buffered_events``). The buffer
+is written in one batch at step boundaries (``trace_step``), when it holds
+``EVENT_BUFFER_SIZE`` events, and when the job ends - including when it
+fails.
+
+Written batches are also published to the live job timeline
+(apps.jobs.timeline) for streaming clients.
+
+``EVENT_SINK`` picks where batches go:
+    db     - ``Event.objects.bulk_create`` (default)
+    redis  - XADD to the ``events:stream`` Redis stream; ``manage.py
+             drain_event_stream`` moves them into Postgres in bulk.
+             Entries that cannot be written (e.g. their job was deleted)
+             go to ``events:dead`` so they never block the drainer.
+"""
+import json
+import logging
+import socket
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+
+from apps.jobs.timeline import publish_events
+from apps.system.redis_client import decode, get_redis_client, redis_key
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = 'events:stream'
+STREAM_GROUP = 'event-writer'
+STREAM_MAXLEN = 1_000_000
+DEAD_LETTER_KEY = 'events:dead'
+DEAD_LETTER_MAXLEN = 100_000
+# Failures that belong to one entry; anything else (e.g. the database being
+# down) leaves the batch pending for the next run
+ENTRY_ERRORS = (IntegrityError, DataError, KeyError, TypeError, ValueError)
+
+_buffer: ContextVar[Optional['EventBuffer']] = ContextVar('event_buffer', default=None)
+
+
+class EventBuffer:
+    """Unsaved events of one job."""
+
+    def __init__(self, job_id):
+        self.job_id = str(job_id)
+        self.events = []
+        self.max_size = getattr(settings, 'EVENT_BUFFER_SIZE', 50)
+
+    def add(self, event) -> None:
+        self.events.append(event)
+        if len(self.events) >= self.max_size:
+            self.flush()
+
+    def flush(self) -> None:
+        events, self.events = self.events, []
+        if events:
+            write_events(events)
+
+
+@contextmanager
+def buffered_events(job_id):
+    """Buffer ``log_event`` calls for ``job_id`` in this context; flush on exit."""
+    buffer = EventBuffer(job_id)
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
+        buffer.flush()
+
+
+def current_buffer(job_id) -> Optional[EventBuffer]:
+    """The active buffer if it belongs to ``job_id``."""
+    buffer = _buffer.get()
+    if buffer is not None and buffer.job_id == str(job_id):
+        return buffer
+    return None
+
+
+def flush_events() -> None:
+    """Write out the active buffer, if any (step boundary)."""
+    buffer = _buffer.get()
+    if buffer is not None:
+        buffer.flush()
+
+
+def write_events(events: List) -> None:
+    """Persist a batch of unsaved Events to the configured sink."""
+    from apps.observability.models import Event
+
+    try:
+        client = get_redis_client() if getattr(settings, 'EVENT_SINK', 'db') == 'redis' else None
+        if client is not None:
+            pipe = client.pipeline(transaction=False)
+            for event in events:
+                pipe.xadd(redis_key(STREAM_KEY), _to_fields(event), maxlen=STREAM_MAXLEN, approximate=True)
+            pipe.execute()
+        else:
+            Event.objects.bulk_create(events)
+        publish_events(events)
+    except Exception as e:
+        # Timeline events must never fail the job that emits them
+        logger.error(f"Failed to write {len(events)} events: {e}")
+
+
+def drain_stream(consumer: Optional[str] = None, count: int = 500, block_ms: int = 5000) -> int:
+    """
+    Move one batch of events from the Redis stream into Postgres.
+
+    Uses a consumer group, so several drainers can run; a drainer first
+    re-reads its own unacknowledged entries (e.g. after a crash). When the
+    bulk insert fails the batch is retried entry by entry, and entries that
+    still fail are moved to the dead-letter stream, so every entry read is
+    acknowledged.
+
+    Returns:
+        Number of events written
+    """
+    client = get_redis_client()
+    if client is None:
+        return 0
+    stream = redis_key(STREAM_KEY)
+    consumer = consumer or socket.gethostname()
+    try:
+        client.xgroup_create(stream, STREAM_GROUP, id='0', mkstream=True)
+    except Exception as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+    entries = []
+    for start in ('0', '>'):
+        reply = client.xreadgroup(STREAM_GROUP, consumer, {stream: start}, count=count,
+                                  block=None if start == '0' else block_ms)
+        entries = reply[0][1] if reply else []
+        if entries:
+            break
+    if not entries:
+        return 0
+
+    written, dead = _insert_entries(entries)
+    if dead:
+        pipe = client.pipeline(transaction=False)
+        for entry_id, fields, error in dead:
+            fields = {decode(key): decode(value) for key, value in fields.items()}
+            pipe.xadd(redis_key(DEAD_LETTER_KEY), {**fields, 'stream_id': decode(entry_id), 'error': str(error)[:500]},
+                      maxlen=DEAD_LETTER_MAXLEN, approximate=True)
+        pipe.execute()
+        logger.error(f"Moved {len(dead)} unwritable events to {DEAD_LETTER_KEY}")
+    client.xack(stream, STREAM_GROUP, *[entry_id for entry_id, _ in entries])
+    return written
+
+
+def _insert_entries(entries):
+    """Insert stream entries; returns (written, [(entry_id, fields, error)] that could not be)."""
+    from apps.observability.models import Event
+
+    try:
+        with transaction.atomic():
+            Event.objects.bulk_create([_from_fields(fields) for _, fields in entries])
+        return len(entries), []
+    except ENTRY_ERRORS as e:
+        logger.warning(f"Bulk insert of {len(entries)} stream events failed ({e}); inserting one by one")
+
+    written, dead = 0, []
+    for entry_id, fields in entries:
+        try:
+            with transaction.atomic():
+                _from_fields(fields).save()
+            written += 1
+        except ENTRY_ERRORS as e:
+            dead.append((entry_id, fields, e))
+    return written, dead
+
+
+def _to_fields(event) -> dict:
+    return {
+        'job_id': str(event.job_id),
+        'timestamp': event.timestamp.isoformat(),
+        'level': event.level,
+        'source': event.source,
+        'message': event.message,
+        'data': json.dumps(event.data, default=str),
+    }
+
+
+def _from_fields(fields):
+    from apps.observability.models import Event
+
+    fields = {decode(key): decode(value) for key, value in fields.items()}
+    return Event(
+        job_id=fields['job_id'],
+        timestamp=datetime.fromisoformat(fields['timestamp']),
+        level=fields['level'],
+        source=fields['source'],
+        message=fields['message'],
+        data=json.loads(fields['data']),
+    )
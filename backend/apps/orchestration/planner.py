@@ -32,24 +32,31 @@ def enqueue_follow_ups(ctx, job_type: str, original_payload: dict, parent_job):
     if not should_auto_chain(job_type):
         return
     
-    from apps.jobs.dispatcher import enqueue
+    from apps.jobs.dispatcher import enqueue_many
     from apps.observability.services import log_event
     
-    for follow_up_type, payload_builder in get_follow_up_jobs(job_type):
-        payload = payload_builder(original_payload)
-        
-        job = enqueue(
-            job_type=follow_up_type,
-            payload=payload,
-            trigger='system',
-            user=parent_job.user,
-            parent_job=parent_job
-        )
-        
+    specs = [
+        {'job_type': follow_up_type, 'payload': payload_builder(original_payload), 'user': parent_job.user}
+        for follow_up_type, payload_builder in get_follow_up_jobs(job_type)
+    ]
+    if not specs:
+        return
+    
+    jobs, rejected = enqueue_many(specs, trigger='system', parent_job=parent_job)
+    
+    for job in jobs:
         log_event(
             ctx,
-            f"Enqueued follow-up job: {follow_up_type}",
+            f"Enqueued follow-up job: {job.type}",
             level='info',
             source='workflow',
             follow_up_job_id=str(job.id)
         )
+    for item in rejected:
+        log_event(
+            ctx,
+            f"Follow-up job not enqueued: {specs[item['index']]['job_type']}",
+            level='warning',
+            source='workflow',
+            error=item['error']
+        )
@@ -7,7 +7,7 @@ from apps.agents.report_agent import ReportAgent
 from apps.orchestration.persist import persist_result
 
 
-@register('report.generate')
+@register('report.generate', llm_bound=True)
 def generate_report(ctx, payload: dict) -> dict:
     """
     Generate a report (status, standup, etc).
@@ -7,7 +7,7 @@ from apps.agents.resume_agent import ResumeAgent
 from apps.orchestration.persist import persist_result
 
 
-@register('resume.refresh')
+@register('resume.refresh', llm_bound=True)
 def refresh_resume(ctx, payload: dict) -> dict:
     """
     Refresh user's resume.
@@ -7,7 +7,7 @@ from apps.agents.skill_agent import SkillAgent
 from apps.orchestration.persist import persist_result
 
 
-@register('skills.extract')
+@register('skills.extract', llm_bound=True)
 def extract_skills(ctx, payload: dict) -> dict:
     """
     Extract skills from work logs.
@@ -8,7 +8,7 @@ from apps.agents.worklog_agent import WorklogAgent
 from apps.orchestration.persist import persist_result
 
 
-@register('worklog.analyze')
+@register('worklog.analyze', llm_bound=True)
 def analyze_worklog(ctx, payload: dict) -> dict:
     """
     Analyze a work log entry.
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0001_initial'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True)),
+                ('watermark', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'system_rollup_watermark',
+            },
+        ),
+        migrations.CreateModel(
+            name='TenantDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('worklogs_created', models.IntegerField(default=0)),
+                ('jobs_created', models.IntegerField(default=0)),
+                ('jobs_succeeded', models.IntegerField(default=0)),
+                ('jobs_failed', models.IntegerField(default=0)),
+                ('costs_cents', models.BigIntegerField(default=0, help_text='Ledger debits, as a positive amount')),
+                ('credits_cents', models.BigIntegerField(default=0)),
+                ('artifacts_created', models.IntegerField(default=0)),
+                ('artifact_bytes', models.BigIntegerField(default=0)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='tenants.tenant')),
+            ],
+            options={
+                'db_table': 'system_tenant_daily_rollup',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='system_tena_day_a87f7c_idx')],
+                'unique_together': {('tenant', 'day')},
+            },
+        ),
+    ]
@@ -110,6 +110,51 @@ class MetricsSnapshot(models.Model):
         return f"{self.bucket_type.title()} {self.bucket_date} - {tenant_str}"
 
 
+class TenantDailyRollup(models.Model):
+    """
+    Per-tenant, per-day activity totals.
+    Maintained incrementally from new rows (see apps.system.rollups);
+    weekly and monthly figures are summed from these.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='daily_rollups')
+    day = models.DateField()
+    
+    worklogs_created = models.IntegerField(default=0)
+    jobs_created = models.IntegerField(default=0)
+    jobs_succeeded = models.IntegerField(default=0)
+    jobs_failed = models.IntegerField(default=0)
+    costs_cents = models.BigIntegerField(default=0, help_text="Ledger debits, as a positive amount")
+    credits_cents = models.BigIntegerField(default=0)
+    artifacts_created = models.IntegerField(default=0)
+    artifact_bytes = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'system_tenant_daily_rollup'
+        ordering = ['-day']
+        unique_together = [['tenant', 'day']]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.tenant_id}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Position up to which a rollup source has been folded into the daily rollups.
+    """
+    source = models.CharField(max_length=50, unique=True)
+    watermark = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'system_rollup_watermark'
+    
+    def __str__(self):
+        return f"{self.source} @ {self.watermark:%Y-%m-%d %H:%M:%S}"
+
+
 class MetricsConfig(models.Model):
     """
     Configuration for metrics thresholds and manual inputs.
@@ -0,0 +1,47 @@
+"""
+Raw Redis access for data structures the cache API cannot express
+(sorted sets, Lua scripts, streams, pub/sub).
+
+The client is the one behind the ``default`` cache, so it exists only when
+that cache is Redis/Valkey. Local-memory caches (tests, dev) get ``None``
+and callers fall back to their non-Redis path.
+"""
+import logging
+from typing import Optional
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def get_redis_client(write: bool = True):
+    """Return a ``redis.Redis`` client for the default cache, or None."""
+    backend = getattr(cache, '_cache', None)
+    get_client = getattr(backend, 'get_client', None)
+    if get_client is None:
+        return None
+    return get_client(write=write)
+
+
+def redis_key(name: str) -> str:
+    """Namespace a raw key with the cache's KEY_PREFIX/VERSION."""
+    return cache.make_key(name)
+
+
+def redis_available(client=None) -> bool:
+    """Whether a Redis client is configured and answering."""
+    client = client or get_redis_client()
+    if client is None:
+        return False
+    try:
+        return bool(client.ping())
+    except Exception as e:
+        logger.warning(f"Redis ping failed: {e}")
+        return False
+
+
+def decode(value) -> Optional[str]:
+    """Decode a bytes reply (clients are created without decode_responses)."""
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
@@ -0,0 +1,169 @@
+"""
+Incremental per-tenant, per-day rollups.
+
+Each source (jobs, job outcomes, worklogs, ledger entries, artifacts) keeps
+a watermark: a run only reads rows timestamped after it, groups them by
+(tenant, day) for all tenants in one aggregate query, and adds the totals
+to ``TenantDailyRollup``. The add and the watermark move happen in one
+transaction, so a failed run changes nothing and the next one retries the
+same window.
+
+Rows are read up to ``ROLLUP_LAG_SECONDS`` before now, leaving time for
+transactions that stamped a row earlier but commit later. Weekly and
+monthly buckets are summed from the daily rollups (``bucketed``).
+"""
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from apps.system.models import RollupWatermark, TenantDailyRollup
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = [
+    'worklogs_created', 'jobs_created', 'jobs_succeeded', 'jobs_failed',
+    'costs_cents', 'credits_cents', 'artifacts_created', 'artifact_bytes',
+]
+
+
+@dataclass
+class RollupSource:
+    """Rows that feed some of the rollup fields."""
+    name: str
+    queryset: Callable
+    tenant_field: str
+    time_field: str
+    aggregates: Dict  # rollup field -> aggregate expression
+
+
+def _sources() -> List[RollupSource]:
+    from apps.artifacts.models import Artifact
+    from apps.billing.models import ReserveLedgerEntry
+    from apps.jobs.models import Job
+    from apps.worklog.models import WorkLog
+
+    return [
+        RollupSource('jobs', Job.objects.all, 'user__tenant', 'created_at',
+                     {'jobs_created': Count('id')}),
+        # Outcomes are counted on the day a job finished; retried attempts are neither
+        RollupSource('job_outcomes', lambda: Job.objects.filter(status__in=['success', 'failed']),
+                     'user__tenant', 'finished_at',
+                     {'jobs_succeeded': Count('id', filter=Q(status='success')),
+                      'jobs_failed': Count('id', filter=Q(status='failed'))}),
+        RollupSource('worklogs', WorkLog.objects.all, 'user__tenant', 'created_at',
+                     {'worklogs_created': Count('id')}),
+        RollupSource('ledger', ReserveLedgerEntry.objects.all, 'tenant', 'created_at',
+                     {'costs_cents': Sum('amount_cents', filter=Q(amount_cents__lt=0)),
+                      'credits_cents': Sum('amount_cents', filter=Q(amount_cents__gt=0))}),
+        RollupSource('artifacts', Artifact.objects.all, 'tenant', 'created_at',
+                     {'artifacts_created': Count('id'), 'artifact_bytes': Sum('size')}),
+    ]
+
+
+def update_rollups(backfill_days: int = 30, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Fold rows added since each source's watermark into the daily rollups.
+
+    Args:
+        backfill_days: How far back a source with no watermark yet starts
+        now: Current time (default: timezone.now())
+
+    Returns:
+        {source: number of (tenant, day) rollups changed}
+    """
+    now = now or timezone.now()
+    upper = now - timedelta(seconds=getattr(settings, 'ROLLUP_LAG_SECONDS', 60))
+    return {
+        source.name: _update_source(source, upper, now - timedelta(days=backfill_days))
+        for source in _sources()
+    }
+
+
+def _update_source(source: RollupSource, upper: datetime, initial: datetime) -> int:
+    with transaction.atomic():
+        # The watermark row lock serialises concurrent runs per source
+        RollupWatermark.objects.get_or_create(source=source.name, defaults={'watermark': initial})
+        mark = RollupWatermark.objects.select_for_update().get(source=source.name)
+        if upper <= mark.watermark:
+            return 0
+
+        deltas = (
+            source.queryset()
+            .filter(**{
+                f'{source.time_field}__gt': mark.watermark,
+                f'{source.time_field}__lte': upper,
+                f'{source.tenant_field}__isnull': False,
+            })
+            .annotate(rollup_day=TruncDate(source.time_field))
+            .values(source.tenant_field, 'rollup_day')
+            .annotate(**{f'delta_{field}': aggregate for field, aggregate in source.aggregates.items()})
+            .order_by()
+        )
+        deltas = {(row[source.tenant_field], row['rollup_day']): row for row in deltas}
+
+        if deltas:
+            TenantDailyRollup.objects.bulk_create(
+                [TenantDailyRollup(tenant_id=tenant_id, day=day) for tenant_id, day in deltas],
+                ignore_conflicts=True,
+            )
+            tenant_ids = {tenant_id for tenant_id, _ in deltas}
+            days = {day for _, day in deltas}
+            rollups = [
+                rollup
+                for rollup in TenantDailyRollup.objects.select_for_update().filter(tenant_id__in=tenant_ids, day__in=days)
+                if (rollup.tenant_id, rollup.day) in deltas
+            ]
+            for rollup in rollups:
+                row = deltas[(rollup.tenant_id, rollup.day)]
+                for field in source.aggregates:
+                    setattr(rollup, field, getattr(rollup, field) + abs(row[f'delta_{field}'] or 0))
+            # Only this source's columns, so sources never overwrite each other
+            TenantDailyRollup.objects.bulk_update(rollups, list(source.aggregates), batch_size=500)
+
+        mark.watermark = upper
+        mark.save(update_fields=['watermark', 'updated_at'])
+
+    if deltas:
+        logger.info(f"Rollup source {source.name}: {len(deltas)} tenant-days updated")
+    return len(deltas)
+
+
+def bucketed(bucket: str = 'daily', since: Optional[date] = None,
+             tenant_id: Optional[int] = None) -> List[Dict]:
+    """
+    Rollup totals per tenant and bucket, summed from the daily rollups.
+
+    Args:
+        bucket: 'daily' | 'weekly' (ISO weeks, starting Monday) | 'monthly'
+        since: First day to include
+        tenant_id: Restrict to one tenant
+
+    Returns:
+        [{'tenant_id', 'period', <rollup fields>}] ordered by period, tenant
+    """
+    truncs = {'daily': None, 'weekly': TruncWeek('day'), 'monthly': TruncMonth('day')}
+    if bucket not in truncs:
+        raise ValueError(f"Unknown bucket '{bucket}'")
+
+    qs = TenantDailyRollup.objects.all()
+    if since:
+        qs = qs.filter(day__gte=since)
+    if tenant_id:
+        qs = qs.filter(tenant_id=tenant_id)
+
+    if truncs[bucket] is None:
+        return list(qs.order_by('day', 'tenant_id').values('tenant_id', *ROLLUP_FIELDS, period=F('day')))
+
+    return list(
+        qs.annotate(period=truncs[bucket])
+        .values('tenant_id', 'period')
+        .annotate(**{field: Sum(field) for field in ROLLUP_FIELDS})
+        .order_by('period', 'tenant_id')
+    )
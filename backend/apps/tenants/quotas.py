@@ -2,13 +2,23 @@
 Tenant quotas and concurrency limits.
 Prevents resource abuse and ensures fair platform usage.
 """
-from typing import Optional, Tuple
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
 from django.core.cache import cache
 from django.conf import settings
-from django.utils import timezone
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from apps.system.redis_client import get_redis_client, redis_key
+
+logger = logging.getLogger(__name__)
+
+# Non-Redis caches are per-process, so a process lock makes them atomic
+_local_lock = threading.Lock()
+
 
 @dataclass
 class QuotaLimit:
@@ -77,6 +87,41 @@ PLAN_QUOTAS = {
 }
 
 
+# Quota counters hold plain integers, which Django's Redis cache also reads
+# and writes unpickled, so these scripts share keys with get_usage/consume_quota.
+# KEYS: counters. ARGV: (amount, limit, ttl_seconds) per key.
+# Returns 0, or the 1-based index of the first quota that would overflow.
+_RESERVE_LUA = """
+for i, key in ipairs(KEYS) do
+    local base = (i - 1) * 3
+    local current = tonumber(redis.call('GET', key) or '0')
+    if current + tonumber(ARGV[base + 1]) > tonumber(ARGV[base + 2]) then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    local base = (i - 1) * 3
+    local amount = tonumber(ARGV[base + 1])
+    local ttl = tonumber(ARGV[base + 3])
+    if redis.call('INCRBY', key, amount) == amount and ttl > 0 then
+        redis.call('EXPIRE', key, ttl)
+    end
+end
+return 0
+"""
+
+# KEYS: counters. ARGV: amount per key. Never goes below zero.
+_RELEASE_LUA = """
+for i, key in ipairs(KEYS) do
+    local current = tonumber(redis.call('GET', key) or '0')
+    if current > 0 then
+        redis.call('DECRBY', key, math.min(current, tonumber(ARGV[i])))
+    end
+end
+return 0
+"""
+
+
 class QuotaManager:
     """Manage tenant quotas."""
     
@@ -138,6 +183,78 @@ class QuotaManager:
                 # No expiry for absolute limits
                 cache.set(cache_key, amount)
     
+    def reserve(self, amounts: Dict[str, int]) -> Tuple[bool, Optional[str]]:
+        """
+        Check and consume several quotas atomically.
+        
+        Either every quota is consumed or none is: all counters are checked
+        first, then all are incremented, in one Lua call on Redis (under a
+        process lock otherwise). Unknown quota names are ignored.
+        
+        Args:
+            amounts: Quota name -> amount, e.g. {'jobs_per_day': 1, 'reports_per_day': 1}
+        
+        Returns:
+            Tuple of (allowed, error_message)
+        """
+        quotas = [(self.get_quota(name), amount) for name, amount in amounts.items()]
+        quotas = [(quota, amount) for quota, amount in quotas if quota and amount > 0]
+        if not quotas:
+            return True, None
+        
+        keys = [self._get_cache_key(quota.name) for quota, _ in quotas]
+        client = get_redis_client()
+        if client is not None:
+            args = []
+            for quota, amount in quotas:
+                args.extend([amount, quota.limit, quota.window_hours * 3600])
+            rejected = client.eval(_RESERVE_LUA, len(keys), *[redis_key(key) for key in keys], *args)
+        else:
+            rejected = self._local_reserve(keys, quotas)
+        
+        if rejected:
+            quota = quotas[rejected - 1][0]
+            return False, f"Quota exceeded: {quota.description} (limit: {quota.limit})"
+        return True, None
+    
+    def release(self, amounts: Dict[str, int]):
+        """Give back a reservation whose work did not go ahead."""
+        names = [name for name, amount in amounts.items() if self.get_quota(name) and amount > 0]
+        if not names:
+            return
+        
+        client = get_redis_client()
+        if client is not None:
+            keys = [redis_key(self._get_cache_key(name)) for name in names]
+            client.eval(_RELEASE_LUA, len(keys), *keys, *[amounts[name] for name in names])
+            return
+        
+        with _local_lock:
+            for name in names:
+                key = self._get_cache_key(name)
+                current = cache.get(key)
+                if current:
+                    cache.set(key, max(current - amounts[name], 0), self._ttl(self.get_quota(name)))
+    
+    def _local_reserve(self, keys: List[str], quotas) -> int:
+        """Same semantics as _RESERVE_LUA for non-Redis caches."""
+        with _local_lock:
+            usage = [cache.get(key, 0) for key in keys]
+            for index, ((quota, amount), current) in enumerate(zip(quotas, usage), start=1):
+                if current + amount > quota.limit:
+                    return index
+            for key, (quota, amount), current in zip(keys, quotas, usage):
+                if current:
+                    cache.incr(key, amount)
+                else:
+                    cache.set(key, amount, self._ttl(quota))
+            return 0
+    
+    @staticmethod
+    def _ttl(quota: QuotaLimit) -> Optional[int]:
+        # No expiry for absolute limits
+        return quota.window_hours * 3600 if quota.window_hours > 0 else None
+    
     def get_usage(self, quota_name: str) -> int:
         """Get current usage for quota."""
         cache_key = self._get_cache_key(quota_name)
@@ -153,104 +270,240 @@ class QuotaManager:
         return f"quota:{self.tenant.id}:{quota_name}"
 
 
+def _lease_seconds() -> int:
+    """Default concurrency lease length."""
+    return getattr(settings, 'CONCURRENCY_LEASE_SECONDS', 300)
+
+
+# Lease scripts. Each semaphore is a sorted set of job ids scored by lease
+# expiry (ms, Redis server clock); expired holders are reaped on every call.
+# KEYS: tenant semaphore[, workflow semaphore]
+
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local lease_ms = tonumber(ARGV[2])
+for _, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+end
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+        return 1
+    end
+    if KEYS[2] and redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[4]) then
+        return 2
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now + lease_ms, ARGV[1])
+    -- Only ever extend: a shorter lease must not expire other holders
+    if redis.call('PTTL', key) < lease_ms then
+        redis.call('PEXPIRE', key, lease_ms)
+    end
+end
+return 0
+"""
+
+_RENEW_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local lease_ms = tonumber(ARGV[2])
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score or tonumber(score) <= now then
+    return 0
+end
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, 'XX', now + lease_ms, ARGV[1])
+    if redis.call('PTTL', key) < lease_ms then
+        redis.call('PEXPIRE', key, lease_ms)
+    end
+end
+return 1
+"""
+
+_TRANSFER_LUA = """
+local removed = 0
+for _, key in ipairs(KEYS) do
+    local score = redis.call('ZSCORE', key, ARGV[1])
+    if score then
+        redis.call('ZREM', key, ARGV[1])
+        redis.call('ZADD', key, score, ARGV[2])
+        removed = 1
+    end
+end
+return removed
+"""
+
 class ConcurrencyLimiter:
-    """Manage concurrent job execution per tenant and workflow."""
+    """
+    Manage concurrent job execution per tenant and workflow.
+    
+    A counting semaphore per tenant (and per tenant + workflow) holding
+    job ids with expiring leases. On Redis each operation is one Lua call,
+    so concurrent enqueues cannot overshoot the limit, and holders whose
+    lease lapses (crashed workers, lost releases) are reaped instead of
+    leaking a slot. Long-running jobs keep their lease with ``renew`` /
+    ``keep_alive``.
+    """
     
     def __init__(self, tenant, workflow_type: Optional[str] = None):
         self.tenant = tenant
         self.workflow_type = workflow_type
     
-    def _get_concurrent_count(self, cache_key: str) -> int:
-        """Get count of concurrent slots."""
-        # Store as simple counter instead of set
-        return cache.get(cache_key, 0)
+    def _keys(self) -> List[str]:
+        keys = [f"concurrency:tenant:{self.tenant.id}"]
+        if self.workflow_type:
+            keys.append(f"concurrency:workflow:{self.tenant.id}:{self.workflow_type}")
+        return keys
     
-    def acquire(self, job_id: str, timeout: int = 300) -> Tuple[bool, Optional[str]]:
+    def acquire(self, job_id: str, timeout: Optional[int] = None) -> Tuple[bool, Optional[str]]:
         """
         Try to acquire concurrency slot.
         
+        Re-acquiring a slot already held by ``job_id`` renews its lease.
+        
         Args:
             job_id: Unique job identifier
-            timeout: How long to hold the slot (seconds)
+            timeout: Lease length in seconds (default CONCURRENCY_LEASE_SECONDS)
         
         Returns:
             Tuple of (acquired, error_message)
         """
-        # Get limits
+        lease = timeout or _lease_seconds()
         tenant_limit = self._get_tenant_limit()
         workflow_limit = self._get_workflow_limit()
         
-        # Check tenant-wide concurrency
-        tenant_key = f"concurrency:tenant:{self.tenant.id}"
-        tenant_count = self._get_concurrent_count(tenant_key)
-        
-        if tenant_count >= tenant_limit:
-            return False, f"Tenant concurrency limit reached ({tenant_limit})"
-        
-        # Check workflow-specific concurrency
-        if self.workflow_type:
-            workflow_key = f"concurrency:workflow:{self.tenant.id}:{self.workflow_type}"
-            workflow_count = self._get_concurrent_count(workflow_key)
-            
-            if workflow_count >= workflow_limit:
-                return False, f"Workflow concurrency limit reached ({workflow_limit})"
-        
-        # Acquire slots
-        slot_key = f"concurrency:slot:{job_id}"
-        cache.set(slot_key, {
-            'tenant_id': self.tenant.id,
-            'workflow_type': self.workflow_type,
-            'acquired_at': timezone.now().isoformat()
-        }, timeout)
-        
-        # Increment counters
-        if tenant_count == 0:
-            cache.set(tenant_key, 1, timeout)
+        client = get_redis_client()
+        if client is not None:
+            keys = [redis_key(key) for key in self._keys()]
+            workflow_arg = workflow_limit if self.workflow_type else 0
+            outcome = client.eval(_ACQUIRE_LUA, len(keys), *keys, job_id, lease * 1000, tenant_limit, workflow_arg)
         else:
-            try:
-                cache.incr(tenant_key)
-            except ValueError:
-                cache.set(tenant_key, 1, timeout)
-        
-        if self.workflow_type:
-            workflow_key = f"concurrency:workflow:{self.tenant.id}:{self.workflow_type}"
-            workflow_count = cache.get(workflow_key, 0)
-            if workflow_count == 0:
-                cache.set(workflow_key, 1, timeout)
-            else:
-                try:
-                    cache.incr(workflow_key)
-                except ValueError:
-                    cache.set(workflow_key, 1, timeout)
+            outcome = self._local_acquire(job_id, lease, [tenant_limit, workflow_limit])
         
+        if outcome == 1:
+            return False, f"Tenant concurrency limit reached ({tenant_limit})"
+        if outcome == 2:
+            return False, f"Workflow concurrency limit reached ({workflow_limit})"
         return True, None
     
     def release(self, job_id: str):
         """Release concurrency slot."""
-        slot_key = f"concurrency:slot:{job_id}"
-        slot_data = cache.get(slot_key)
-        
-        if not slot_data:
+        client = get_redis_client()
+        if client is not None:
+            pipe = client.pipeline(transaction=True)
+            for key in self._keys():
+                pipe.zrem(redis_key(key), job_id)
+            pipe.execute()
             return
         
-        # Decrement counters
-        tenant_key = f"concurrency:tenant:{self.tenant.id}"
-        try:
-            if cache.get(tenant_key, 0) > 0:
-                cache.decr(tenant_key)
-        except ValueError:
-            pass
+        with _local_lock:
+            for key in self._keys():
+                holders = cache.get(key) or {}
+                if holders.pop(job_id, None) is not None:
+                    cache.set(key, holders, None)
+    
+    def renew(self, job_id: str, timeout: Optional[int] = None) -> bool:
+        """
+        Extend the lease of a held slot.
         
-        if self.workflow_type:
-            workflow_key = f"concurrency:workflow:{self.tenant.id}:{self.workflow_type}"
-            try:
-                if cache.get(workflow_key, 0) > 0:
-                    cache.decr(workflow_key)
-            except ValueError:
-                pass
-        
-        # Delete slot
-        cache.delete(slot_key)
+        Returns:
+            False if the slot is no longer held (released or reaped)
+        """
+        lease = timeout or _lease_seconds()
+        client = get_redis_client()
+        if client is not None:
+            keys = [redis_key(key) for key in self._keys()]
+            return bool(client.eval(_RENEW_LUA, len(keys), *keys, job_id, lease * 1000))
+        
+        with _local_lock:
+            now = time.time()
+            first = cache.get(self._keys()[0]) or {}
+            if first.get(job_id, 0) <= now:
+                return False
+            for key in self._keys():
+                holders = cache.get(key) or {}
+                if job_id in holders:
+                    holders[job_id] = now + lease
+                    cache.set(key, holders, None)
+            return True
+    
+    def transfer(self, old_job_id: str, new_job_id: str) -> bool:
+        """
+        Hand a held slot to another job id (e.g. a retry), keeping its lease.
+        
+        Returns:
+            False if ``old_job_id`` held no slot
+        """
+        client = get_redis_client()
+        if client is not None:
+            keys = [redis_key(key) for key in self._keys()]
+            return bool(client.eval(_TRANSFER_LUA, len(keys), *keys, old_job_id, new_job_id))
+        
+        with _local_lock:
+            moved = False
+            for key in self._keys():
+                holders = cache.get(key) or {}
+                if old_job_id in holders:
+                    holders[new_job_id] = holders.pop(old_job_id)
+                    cache.set(key, holders, None)
+                    moved = True
+            return moved
+    
+    def holders(self) -> int:
+        """Number of live leases on the tenant semaphore (expired ones excluded)."""
+        key = self._keys()[0]
+        client = get_redis_client()
+        if client is not None:
+            return client.zcount(redis_key(key), f"({int(time.time() * 1000)}", '+inf')
+        now = time.time()
+        return sum(1 for expires in (cache.get(key) or {}).values() if expires > now)
+    
+    @contextmanager
+    def keep_alive(self, job_id: str, timeout: Optional[int] = None):
+        """
+        Renew the lease in a background thread while the block runs.
+        
+        Renews every third of the lease so a job running longer than the
+        lease keeps its slot; the lease still lapses if the process dies.
+        """
+        lease = timeout or _lease_seconds()
+        stop = threading.Event()
+        
+        def heartbeat():
+            while not stop.wait(lease / 3):
+                try:
+                    if not self.renew(job_id, lease):
+                        logger.warning(f"Concurrency lease for job {job_id} lost before completion")
+                        return
+                except Exception as e:
+                    logger.warning(f"Concurrency lease renewal failed for job {job_id}: {e}")
+        
+        thread = threading.Thread(target=heartbeat, name=f'lease-{job_id}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join(timeout=1)
+    
+    def _local_acquire(self, job_id: str, lease: int, limits: List[float]) -> int:
+        """Same semantics as _ACQUIRE_LUA for non-Redis caches."""
+        with _local_lock:
+            now = time.time()
+            keys = self._keys()
+            semaphores = [
+                {holder: expires for holder, expires in (cache.get(key) or {}).items() if expires > now}
+                for key in keys
+            ]
+            if job_id not in semaphores[0]:
+                for outcome, (holders, limit) in enumerate(zip(semaphores, limits), start=1):
+                    if len(holders) >= limit:
+                        return outcome
+            for key, holders in zip(keys, semaphores):
+                holders[job_id] = now + lease
+                cache.set(key, holders, None)
+            return 0
     
     def _get_tenant_limit(self) -> int:
         """Get tenant-wide concurrency limit."""
@@ -295,10 +548,4 @@ def check_and_consume_quota(tenant, quota_name: str, amount: int = 1) -> Tuple[b
     Returns:
         Tuple of (allowed, error_message)
     """
-    manager = QuotaManager(tenant)
-    allowed, error = manager.check_quota(quota_name, amount)
-    
-    if allowed:
-        manager.consume_quota(quota_name, amount)
-    
-    return allowed, error
+    return QuotaManager(tenant).reserve({quota_name: amount})
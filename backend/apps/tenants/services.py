@@ -1,6 +1,8 @@
 """
 Tenant services - business logic for tenant operations.
 """
+from typing import Optional
+
 from django.contrib.auth.models import User
 from .models import Tenant
 
@@ -20,3 +22,17 @@ def create_tenant_for_user(user: User) -> Tenant:
 def get_tenant_for_user(user: User) -> Tenant:
     """Get tenant for user. Raises Tenant.DoesNotExist if not found."""
     return user.tenant
+
+
+def find_tenant_for_user(user: User) -> Optional[Tenant]:
+    """
+    Get tenant for user, or None.
+    
+    Uses the reverse one-to-one accessor, which Django caches on the user
+    instance - for ``request.user`` TenantMiddleware has already loaded it,
+    so hot paths pay no extra query.
+    """
+    try:
+        return user.tenant
+    except Tenant.DoesNotExist:
+        return None
@@ -0,0 +1,123 @@
+"""
+Asyncio worker for LLM-bound jobs.
+
+With ``LLM_ASYNC_WORKER_ENABLED`` the dispatcher leaves LLM-bound job types
+(``register(..., llm_bound=True)``) out of Huey and marks them
+``executor='async'``; this worker claims only those from the Job table
+(``SELECT ... FOR UPDATE SKIP LOCKED``, so several workers can run side by
+side). Jobs already sent to Huey are never claimed here.
+
+All jobs run on one event loop. Workflow code stays synchronous (ORM,
+agents) and runs in a worker thread, but its LLM calls are sent back to the
+loop as ``acomplete`` over the pooled HTTP client, so one process keeps up
+to ``concurrency`` requests in flight over shared keep-alive connections.
+
+Run with ``python manage.py run_async_worker``.
+"""
+import asyncio
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def enabled() -> bool:
+    """Whether LLM-bound jobs are routed to the asyncio worker."""
+    return getattr(settings, 'LLM_ASYNC_WORKER_ENABLED', False)
+
+
+def claim_jobs(limit: int) -> List[str]:
+    """
+    Mark up to ``limit`` due jobs owned by this worker as running and return their ids.
+    """
+    from apps.jobs.models import Job
+
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(executor='async', status='queued', started_at__isnull=True)
+            .filter(Q(scheduled_for__isnull=True) | Q(scheduled_for__lte=now))
+            .order_by('created_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        Job.objects.filter(id__in=ids).update(status='running', started_at=now)
+    return [str(job_id) for job_id in ids]
+
+
+class AsyncJobWorker:
+    """Runs LLM-bound jobs concurrently on one event loop."""
+
+    def __init__(self, concurrency: Optional[int] = None, poll_seconds: Optional[float] = None):
+        self.concurrency = concurrency or getattr(settings, 'LLM_ASYNC_WORKER_CONCURRENCY', 50)
+        self.poll_seconds = poll_seconds or getattr(settings, 'LLM_ASYNC_WORKER_POLL_SECONDS', 1.0)
+        self._running = set()
+        self._stopping = False
+
+    def run(self):
+        """Run until SIGINT/SIGTERM, then finish in-flight jobs."""
+        asyncio.run(self.serve())
+
+    def stop(self):
+        self._stopping = True
+
+    async def serve(self):
+        from apps.llm.http import aclose_async_client
+
+        loop = asyncio.get_running_loop()
+        # Workflow threads: one per in-flight job
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='llm-job'))
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        logger.info(f"Async worker started (concurrency={self.concurrency})")
+        try:
+            while not self._stopping:
+                if not await self.run_once():
+                    await asyncio.sleep(self.poll_seconds)
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+        finally:
+            await aclose_async_client()
+        logger.info("Async worker stopped")
+
+    async def run_once(self) -> int:
+        """Claim as many jobs as there are free slots and start them."""
+        job_ids = await sync_to_async(claim_jobs, thread_sensitive=False)(self.concurrency - len(self._running))
+        for job_id in job_ids:
+            task = asyncio.create_task(self._run_job(job_id))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        return len(job_ids)
+
+    async def _run_job(self, job_id: str):
+        from apps.llm.http import use_event_loop
+
+        use_event_loop.set(True)
+        try:
+            await sync_to_async(_run_job_in_thread, thread_sensitive=False)(job_id)
+        except Exception:
+            logger.exception(f"Async worker failed to run job {job_id}")
+
+
+def _run_job_in_thread(job_id: str):
+    from apps.workers.execute_job import run_job
+
+    close_old_connections()
+    try:
+        run_job(job_id, claimed=True)
+    finally:
+        close_old_connections()
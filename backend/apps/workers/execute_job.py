@@ -2,6 +2,7 @@
 Main job execution worker task.
 """
 import logging
+from contextlib import nullcontext
 from datetime import datetime
 from django.utils import timezone
 from .queue import db_task
@@ -11,25 +12,46 @@ logger = logging.getLogger(__name__)
 
 @db_task()
 def execute_job(job_id: str):
+    """Huey task: execute a job by ID (see run_job)."""
+    run_job(job_id)
+
+
+def run_job(job_id: str, claimed: bool = False):
     """
     Execute a job by ID.
     
-    This is the main worker task that:
+    This is the main worker task (also used by the asyncio worker) that:
     1. Loads the job
-    2. Transitions to running
+    2. Transitions to running (compare-and-set from queued, so a job that is
+       delivered twice or already started runs once; ``claimed`` jobs were
+       moved to running by the asyncio worker's claim)
     3. Executes the workflow
     4. Stores results
     5. Handles errors and retries
     6. Releases concurrency slots
+    
+    Timeline events are buffered for the whole run and written in bulk at
+    step boundaries and when the job ends, whether it succeeds or fails.
     """
+    from apps.observability.sink import buffered_events
+    
+    with buffered_events(job_id):
+        _run_job(job_id, claimed)
+
+
+def _run_job(job_id: str, claimed: bool = False):
     from apps.jobs.models import Job
-    from apps.jobs.registry import get_workflow
+    from apps.jobs.registry import get_workflow, is_cpu_bound
     from apps.jobs.policies import should_retry, calculate_retry_delay
     from apps.jobs.dispatcher import enqueue
+    from apps.jobs.timeline import publish_status
     from apps.observability.context import ExecutionContext
+    from apps.observability.metrics import JOB_DURATION, JOB_QUEUE_WAIT
     from apps.observability.services import log_event
+    from apps.observability.sink import flush_events
     from apps.tenants.quotas import ConcurrencyLimiter
     from apps.tenants.models import Tenant
+    from apps.workers.process_pool import run_workflow
     
     try:
         job = Job.objects.get(id=job_id)
@@ -49,18 +71,49 @@ def execute_job(job_id: str):
     ctx = ExecutionContext.from_job(job)
     
     # Transition to running
-    job.status = 'running'
-    job.started_at = timezone.now()
-    job.save(update_fields=['status', 'started_at'])
+    if not claimed:
+        started_at = timezone.now()
+        if not Job.objects.filter(id=job.id, status='queued', started_at__isnull=True).update(
+            status='running', started_at=started_at
+        ):
+            logger.warning(f"Job {job_id} is no longer queued; not running it again")
+            return
+        job.status = 'running'
+        job.started_at = started_at
+    publish_status(job)
+    JOB_QUEUE_WAIT.observe((job.started_at - job.created_at).total_seconds(), job_type=job.type, lane=job.lane)
+    
+    # Coalesced jobs may have had ids merged into the payload while queued
+    if job.dedupe_key:
+        job.refresh_from_db(fields=['payload'])
     
     log_event(ctx, f"Job started: {job.type}", level='info', source='worker')
     
+    # Keep the concurrency lease alive for long-running workflows (jobs
+    # enqueued without concurrency enforcement hold no slot). A lease that
+    # lapsed while the job was queued is re-acquired; if the tenant is at its
+    # limit by then, the job still runs (it was admitted at enqueue), untracked.
+    concurrency_limiter = ConcurrencyLimiter(tenant, job.type) if tenant else None
+    lease = nullcontext()
+    if concurrency_limiter and job.holds_slot:
+        held = concurrency_limiter.renew(str(job.id))
+        if not held:
+            held, error = concurrency_limiter.acquire(str(job.id))
+            if not held:
+                logger.warning(f"Job {job_id} lost its concurrency slot while queued and runs without one: {error}")
+        if held:
+            lease = concurrency_limiter.keep_alive(str(job.id))
+    
     try:
         # Get workflow function
         workflow = get_workflow(job.type)
         
-        # Execute workflow
-        result = workflow(ctx, job.payload)
+        # Execute workflow; CPU-bound types run in the process pool
+        with lease:
+            if is_cpu_bound(job.type):
+                result = run_workflow(ctx, job.type, job.payload)
+            else:
+                result = workflow(ctx, job.payload)
         
         # Mark success
         job.status = 'success'
@@ -69,10 +122,11 @@ def execute_job(job_id: str):
         job.save(update_fields=['status', 'result', 'finished_at'])
         
         log_event(ctx, f"Job completed successfully", level='info', source='worker')
+        flush_events()
+        publish_status(job)
         
         # Release concurrency slot on success
-        if tenant:
-            concurrency_limiter = ConcurrencyLimiter(tenant, job.type)
+        if concurrency_limiter:
             concurrency_limiter.release(str(job.id))
         
     except Exception as e:
@@ -100,9 +154,9 @@ def execute_job(job_id: str):
                 retry_delay_seconds=delay.total_seconds()
             )
             
-            # Do NOT release concurrency slot - it stays acquired for retry
+            # Do NOT release concurrency slot - it is handed to the retry job
             
-            enqueue(
+            retry_job = enqueue(
                 job_type=job.type,
                 payload=job.payload,
                 trigger='retry',
@@ -113,6 +167,10 @@ def execute_job(job_id: str):
                 enforce_quotas=False,  # Don't re-check quotas on retry
                 enforce_concurrency=False  # Slot already held
             )
+            if concurrency_limiter and concurrency_limiter.transfer(str(job.id), str(retry_job.id)):
+                Job.objects.filter(id=retry_job.id).update(holds_slot=True)
+            flush_events()
+            publish_status(job, status='retrying', retry_job_id=str(retry_job.id))
         else:
             job.status = 'failed'
             job.save(update_fields=['status', 'error', 'finished_at'])
@@ -124,9 +182,15 @@ def execute_job(job_id: str):
                 source='worker',
                 error=str(e)
             )
+            flush_events()
+            publish_status(job)
             
             # Release concurrency slot on permanent failure
-            if tenant:
-                concurrency_limiter = ConcurrencyLimiter(tenant, job.type)
+            if concurrency_limiter:
                 concurrency_limiter.release(str(job.id))
-
+    
+    JOB_DURATION.observe(
+        (job.finished_at - job.started_at).total_seconds(),
+        job_type=job.type,
+        status='retried' if job.status == 'queued' else job.status
+    )
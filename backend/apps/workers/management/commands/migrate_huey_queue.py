@@ -0,0 +1,41 @@
+"""
+Django management command to move pending Huey messages into the priority queue.
+
+Huey's plain Redis storage keeps the queue as a list; the priority storage
+(``PriorityRedisHuey``) keeps the same key as a sorted set and fails with
+WRONGTYPE while the old list is still there. Run this once, after stopping
+the old consumers and before starting the new ones. The schedule and
+result keys are the same in both storages and are left alone.
+"""
+from django.core.management.base import BaseCommand
+from huey.contrib.djhuey import HUEY
+
+
+class Command(BaseCommand):
+    help = 'Move messages left in the list-based Huey queue into the priority (sorted set) queue'
+
+    def handle(self, *args, **options):
+        storage = HUEY.storage
+        if not getattr(storage, 'priority', False) or not hasattr(storage, 'conn'):
+            self.stdout.write(self.style.WARNING('Huey is not using priority Redis storage; nothing to migrate'))
+            return
+
+        conn = storage.conn
+        key = storage.queue_key
+        if conn.type(key) not in (b'list', 'list'):
+            self.stdout.write(self.style.SUCCESS(f'{key} is already a sorted set (or empty)'))
+            return
+
+        # Move the list aside atomically so the new queue can be created at once
+        legacy = f'{key}.legacy'
+        conn.rename(key, legacy)
+
+        # The list storage LPUSHes and BRPOPs, so the oldest message is last.
+        # Messages are copied before the list is deleted: an interrupted run
+        # can enqueue some twice, which run_job ignores for jobs already started.
+        messages = list(reversed(conn.lrange(legacy, 0, -1)))
+        for data in messages:
+            storage.enqueue(data, priority=HUEY.deserialize_task(data).priority)
+        conn.delete(legacy)
+
+        self.stdout.write(self.style.SUCCESS(f'Moved {len(messages)} messages into {key}'))
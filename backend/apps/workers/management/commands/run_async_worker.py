@@ -0,0 +1,19 @@
+"""
+Django management command to run the asyncio worker for LLM-bound jobs.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.workers.async_worker import AsyncJobWorker, enabled
+
+
+class Command(BaseCommand):
+    help = 'Run LLM-bound jobs concurrently on one event loop (requires LLM_ASYNC_WORKER_ENABLED)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None, help='Jobs in flight at once')
+        parser.add_argument('--poll', type=float, default=None, help='Seconds between polls when idle')
+    
+    def handle(self, *args, **options):
+        if not enabled():
+            raise CommandError('LLM_ASYNC_WORKER_ENABLED is off: LLM-bound jobs go to Huey, not this worker')
+        AsyncJobWorker(concurrency=options['concurrency'], poll_seconds=options['poll']).run()
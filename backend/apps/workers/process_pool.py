@@ -0,0 +1,112 @@
+"""
+Process pool for CPU-bound workflows.
+
+Huey runs jobs on threads, which suits I/O-bound work (LLM calls, storage)
+but serialises CPU-heavy workflows on the GIL. Job types registered with
+``cpu_bound=True`` are handed to a pool of worker processes instead; the
+Huey thread only waits on the result.
+
+Children are started with ``spawn`` so they never share the parent's
+database sockets. Each child runs ``django.setup()`` once and manages its
+connections like a request handler: stale connections are closed before
+and after every job, and CONN_MAX_AGE decides reuse in between.
+
+``JOB_PROCESS_POOL_WORKERS`` sets the pool size (0 runs CPU-bound jobs on
+the calling thread, as in tests).
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    """Configured number of worker processes (0 = disabled)."""
+    return getattr(settings, 'JOB_PROCESS_POOL_WORKERS', os.cpu_count() or 1)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Shared process pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_child,
+            )
+        return _pool
+
+
+def shutdown_pool(wait: bool = True) -> None:
+    """Stop the pool; the next CPU-bound job starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+
+
+def run_workflow(ctx, job_type: str, payload: Dict[str, Any]) -> Any:
+    """
+    Run a job's workflow in the process pool and wait for its result.
+
+    Args:
+        ctx: ExecutionContext of the job (rebuilt in the child)
+        job_type: Registered job type
+        payload: Job payload
+
+    Returns:
+        The workflow's result
+
+    Raises:
+        RuntimeError: If the workflow raised in the child
+        BrokenProcessPool: If a child died; the pool is replaced for later jobs
+    """
+    if pool_size() <= 0:
+        from apps.jobs.registry import get_workflow
+        return get_workflow(job_type)(ctx, payload)
+
+    try:
+        future = get_pool().submit(_run_in_child, vars(ctx), job_type, payload)
+        return future.result()
+    except BrokenProcessPool:
+        logger.error(f"Process pool broke while running {job_type} job {ctx.job_id}; restarting it")
+        shutdown_pool(wait=False)
+        raise
+
+
+def _init_child():
+    """Set up Django once per child process."""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.dev')
+    django.setup()
+
+
+def _run_in_child(ctx_fields: Dict[str, Any], job_type: str, payload: Dict[str, Any]) -> Any:
+    from django.db import close_old_connections
+    from apps.jobs.registry import get_workflow
+    from apps.observability.context import ExecutionContext
+    from apps.observability.sink import buffered_events
+
+    close_old_connections()
+    try:
+        with buffered_events(ctx_fields['job_id']):
+            return get_workflow(job_type)(ExecutionContext(**ctx_fields), payload)
+    except Exception as e:
+        # Exceptions must cross the process boundary; not all of them pickle
+        raise RuntimeError(f"{type(e).__name__}: {e}\n{traceback.format_exc()}") from None
+    finally:
+        close_old_connections()
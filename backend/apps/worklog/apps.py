@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WorklogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.worklog'
+
+    def ready(self):
+        import apps.worklog.signals
@@ -0,0 +1,192 @@
+"""
+In-memory view of a user's client/project/agile hierarchy.
+
+Validating a WorkLog's hierarchy through model instances dereferences one
+foreign key per hop. ``HierarchyMap`` loads the parent links for every
+referenced id as plain id -> parent_id dicts in one query, so any number
+of entries can be validated and backfilled without further queries.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import IntegerField, Value
+
+# WorkLog attributes covered by the hierarchy, in resolution order.
+HIERARCHY_FIELDS = ('client_id', 'project_id', 'sprint_id', 'epic_id', 'feature_id', 'story_id', 'task_id')
+
+
+@dataclass
+class HierarchyMap:
+    """Parent links for the part of one user's hierarchy that was loaded."""
+    clients: set = field(default_factory=set)
+    projects: Dict[int, int] = field(default_factory=dict)   # project -> client
+    sprints: Dict[int, int] = field(default_factory=dict)    # sprint -> project
+    epics: Dict[int, int] = field(default_factory=dict)      # epic -> project
+    features: Dict[int, int] = field(default_factory=dict)   # feature -> epic
+    stories: Dict[int, int] = field(default_factory=dict)    # story -> feature
+    tasks: Dict[int, int] = field(default_factory=dict)      # task -> story
+
+    @classmethod
+    def for_ids(cls, user_id: Optional[int], **ids: Iterable[int]) -> 'HierarchyMap':
+        """
+        Load only the chains above the given ids, in a single query.
+
+        Keyword arguments are ``HIERARCHY_FIELDS`` names mapped to iterables
+        of ids. Each referenced object contributes one row holding its own
+        id and every ancestor id up to the client, plus the owning user;
+        chains owned by other users are left out so ``resolve`` reports them.
+        """
+        from .models import Client, Project, Sprint, Epic, Feature, Story, Task
+
+        hierarchy = cls()
+        if user_id is None:
+            return hierarchy
+
+        # Row layout: task, story, feature, epic, sprint, project, client, owner
+        null = Value(None, output_field=IntegerField())
+        chains = (
+            ('task_id', Task, ('id', 'story_id', 'story__feature_id', 'story__feature__epic_id', None,
+                               'story__feature__epic__project_id', 'story__feature__epic__project__client_id',
+                               'story__feature__epic__project__client__user_id')),
+            ('story_id', Story, (None, 'id', 'feature_id', 'feature__epic_id', None,
+                                 'feature__epic__project_id', 'feature__epic__project__client_id',
+                                 'feature__epic__project__client__user_id')),
+            ('feature_id', Feature, (None, None, 'id', 'epic_id', None,
+                                     'epic__project_id', 'epic__project__client_id',
+                                     'epic__project__client__user_id')),
+            ('epic_id', Epic, (None, None, None, 'id', None,
+                               'project_id', 'project__client_id', 'project__client__user_id')),
+            ('sprint_id', Sprint, (None, None, None, None, 'id',
+                                   'project_id', 'project__client_id', 'project__client__user_id')),
+            ('project_id', Project, (None, None, None, None, None, 'id', 'client_id', 'client__user_id')),
+            ('client_id', Client, (None, None, None, None, None, None, 'id', 'user_id')),
+        )
+        queries = []
+        for name, model, columns in chains:
+            wanted = {pk for pk in ids.get(name) or () if pk is not None}
+            if wanted:
+                queries.append(
+                    model.objects.filter(id__in=wanted).order_by().values_list(
+                        *[null if column is None else column for column in columns]
+                    )
+                )
+        if not queries:
+            return hierarchy
+
+        rows = queries[0].union(*queries[1:], all=True) if len(queries) > 1 else queries[0]
+        for task, story, feature, epic, sprint, project, client, owner in rows:
+            if owner != user_id:
+                continue
+            hierarchy.clients.add(client)
+            if project is not None:
+                hierarchy.projects[project] = client
+            if sprint is not None:
+                hierarchy.sprints[sprint] = project
+            if epic is not None:
+                hierarchy.epics[epic] = project
+            if feature is not None:
+                hierarchy.features[feature] = epic
+            if story is not None:
+                hierarchy.stories[story] = feature
+            if task is not None:
+                hierarchy.tasks[task] = story
+        return hierarchy
+
+    def resolve(
+        self,
+        client_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        sprint_id: Optional[int] = None,
+        epic_id: Optional[int] = None,
+        feature_id: Optional[int] = None,
+        story_id: Optional[int] = None,
+        task_id: Optional[int] = None,
+    ) -> Tuple[Dict[str, Optional[int]], Dict[str, str]]:
+        """
+        Validate hierarchy ids and backfill implied parents.
+
+        Mirrors ``WorkLog.clean``. Returns ``(resolved_ids, errors)`` where
+        ``resolved_ids`` is keyed by ``HIERARCHY_FIELDS`` and ``errors`` is
+        keyed by field name (empty when valid).
+        """
+        errors = {}
+
+        # --- Tenant validation: every referenced id must be in this user's hierarchy ---
+        owned = (
+            ('client', client_id, self.clients),
+            ('project', project_id, self.projects),
+            ('sprint', sprint_id, self.sprints),
+            ('epic', epic_id, self.epics),
+            ('feature', feature_id, self.features),
+            ('story', story_id, self.stories),
+            ('task', task_id, self.tasks),
+        )
+        for name, pk, known in owned:
+            if pk is not None and pk not in known:
+                errors[name] = f"{name.capitalize()} does not belong to this user."
+        if errors:
+            return {}, errors
+
+        if project_id and client_id and self.projects[project_id] != client_id:
+            errors['project'] = "Project does not belong to selected client."
+
+        # --- Backfill client from project if missing ---
+        if project_id and not client_id:
+            client_id = self.projects[project_id]
+
+        # --- Sprint must belong to project (or imply it) ---
+        if sprint_id and not project_id:
+            project_id = self.sprints[sprint_id]
+            if not client_id:
+                client_id = self.projects[project_id]
+        if sprint_id and project_id and self.sprints[sprint_id] != project_id:
+            errors['sprint'] = "Sprint does not belong to selected project."
+
+        # --- Backfill / validate agile chain bottom-up (task -> story -> feature -> epic -> project) ---
+        if task_id:
+            if not story_id:
+                story_id = self.tasks[task_id]
+            elif self.tasks[task_id] != story_id:
+                errors['task'] = "Task does not belong to selected story."
+
+        if story_id:
+            if not feature_id:
+                feature_id = self.stories[story_id]
+            elif self.stories[story_id] != feature_id:
+                errors['story'] = "Story does not belong to selected feature."
+
+        if feature_id:
+            if not epic_id:
+                epic_id = self.features[feature_id]
+            elif self.features[feature_id] != epic_id:
+                errors['feature'] = "Feature does not belong to selected epic."
+
+        if epic_id:
+            if not project_id:
+                project_id = self.epics[epic_id]
+                if not client_id:
+                    client_id = self.projects[project_id]
+            elif self.epics[epic_id] != project_id:
+                errors['epic'] = "Epic does not belong to selected project."
+
+        # If project is set, ensure any agile refs ultimately align to it (after backfills)
+        if project_id:
+            if epic_id and self.epics[epic_id] != project_id:
+                errors['epic'] = "Epic does not belong to selected project."
+            if feature_id and self.epics[self.features[feature_id]] != project_id:
+                errors['feature'] = "Feature does not belong to selected project."
+            if story_id and self.epics[self.features[self.stories[story_id]]] != project_id:
+                errors['story'] = "Story does not belong to selected project."
+            if task_id and self.epics[self.features[self.stories[self.tasks[task_id]]]] != project_id:
+                errors['task'] = "Task does not belong to selected project."
+
+        resolved = {
+            'client_id': client_id,
+            'project_id': project_id,
+            'sprint_id': sprint_id,
+            'epic_id': epic_id,
+            'feature_id': feature_id,
+            'story_id': story_id,
+            'task_id': task_id,
+        }
+        return resolved, errors
@@ -0,0 +1,13 @@
+"""
+Django management command to rebuild the worklog full-text search index.
+"""
+from django.core.management.base import BaseCommand
+from apps.worklog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the worklog full-text search index'
+    
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Reindexed {count} worklog entries'))
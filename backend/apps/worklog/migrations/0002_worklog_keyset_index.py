@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worklog', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worklog',
+            index=models.Index(fields=['user', '-occurred_on', '-created_at', '-id'], name='worklog_wor_user_id_2aa65c_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Mirrors apps.worklog.search.POSTGRES_VECTOR_SQL at the time of this migration.
+POSTGRES_VECTOR_SQL = (
+    "setweight(to_tsvector(coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector(coalesce(outcome, '') || ' ' || coalesce(impact, '')), 'B') || "
+    "setweight(to_tsvector(coalesce(tags::text, '')), 'B') || "
+    "setweight(to_tsvector(coalesce(content, '')), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE worklog_worklog ADD COLUMN search_vector tsvector')
+        schema_editor.execute(f'UPDATE worklog_worklog SET search_vector = {POSTGRES_VECTOR_SQL}')
+        schema_editor.execute(
+            'CREATE INDEX worklog_worklog_search_gin ON worklog_worklog USING gin (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS worklog_worklog_fts '
+            'USING fts5(title, content, outcome, impact, tags)'
+        )
+        WorkLog = apps.get_model('worklog', 'WorkLog')
+        rows = [
+            (pk, title, content, outcome, impact, ' '.join(str(t) for t in (tags or [])))
+            for pk, title, content, outcome, impact, tags in WorkLog.objects.values_list(
+                'id', 'title', 'content', 'outcome', 'impact', 'tags'
+            ).iterator()
+        ]
+        if rows:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    'INSERT INTO worklog_worklog_fts (rowid, title, content, outcome, impact, tags) '
+                    'VALUES (%s, %s, %s, %s, %s, %s)',
+                    rows,
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS worklog_worklog_search_gin')
+        schema_editor.execute('ALTER TABLE worklog_worklog DROP COLUMN IF EXISTS search_vector')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS worklog_worklog_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worklog', '0002_worklog_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worklog', '0003_worklog_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worklog',
+            index=models.Index(fields=['user', 'source', 'source_ref'], name='worklog_wor_user_id_f34352_idx'),
+        ),
+    ]
@@ -318,11 +318,15 @@ class WorkLog(models.Model):
         ordering = ["-occurred_on", "-created_at"]
         indexes = [
             models.Index(fields=["user", "-occurred_on"]),
+            # Keyset pagination: matches ORDER BY -occurred_on, -created_at, -id per user.
+            models.Index(fields=["user", "-occurred_on", "-created_at", "-id"]),
             models.Index(fields=["status", "-occurred_on"]),
             models.Index(fields=["work_type", "-occurred_on"]),
             models.Index(fields=["client", "-occurred_on"]),
             models.Index(fields=["project", "-occurred_on"]),
             models.Index(fields=["enrichment_status"]),
+            # Bulk import de-duplication on (user, source, source_ref)
+            models.Index(fields=["user", "source", "source_ref"]),
         ]
 
     def __str__(self) -> str:
@@ -334,77 +338,35 @@ class WorkLog(models.Model):
             return None
         return float(self.effort_minutes) / 60.0
 
+    def clean_fields(self, exclude=None) -> None:
+        # Hierarchy FKs are checked for existence and ownership by clean(),
+        # in one query, rather than by one lookup per field here.
+        from .hierarchy import HIERARCHY_FIELDS
+
+        exclude = set(exclude or ()) | {name[:-len("_id")] for name in HIERARCHY_FIELDS}
+        super().clean_fields(exclude=exclude)
+
     def clean(self) -> None:
         """
         Enforce tenant + hierarchy consistency and opportunistically backfill implied parents.
-        """
-        errors = {}
 
-        # --- Tenant validation: selected client/project/etc must belong to this user ---
-        if self.client and self.client.user_id != self.user_id:
-            errors["client"] = "Client does not belong to this user."
-
-        if self.project:
-            if self.project.client.user_id != self.user_id:
-                errors["project"] = "Project does not belong to this user."
-            # If both are set, they must match
-            if self.client and self.project.client_id != self.client_id:
-                errors["project"] = "Project does not belong to selected client."
+        The chains above every referenced id are loaded in a single query and
+        checked in memory (see ``apps.worklog.hierarchy``).
+        """
+        from .hierarchy import HierarchyMap, HIERARCHY_FIELDS
 
-        # --- Backfill client from project if missing ---
-        if self.project and not self.client:
-            self.client = self.project.client
-
-        # --- Sprint must belong to project (or imply it) ---
-        if self.sprint and not self.project:
-            self.project = self.sprint.project
-            if not self.client:
-                self.client = self.project.client
-        if self.sprint and self.project and self.sprint.project_id != self.project_id:
-            errors["sprint"] = "Sprint does not belong to selected project."
-
-        # --- Backfill / validate agile chain bottom-up (task -> story -> feature -> epic -> project) ---
-        if self.task:
-            if not self.story:
-                self.story = self.task.story
-            elif self.task.story_id != self.story_id:
-                errors["task"] = "Task does not belong to selected story."
-
-        if self.story:
-            if not self.feature:
-                self.feature = self.story.feature
-            elif self.story.feature_id != self.feature_id:
-                errors["story"] = "Story does not belong to selected feature."
-
-        if self.feature:
-            if not self.epic:
-                self.epic = self.feature.epic
-            elif self.feature.epic_id != self.epic_id:
-                errors["feature"] = "Feature does not belong to selected epic."
-
-        if self.epic:
-            # Epic implies project
-            if not self.project:
-                self.project = self.epic.project
-                if not self.client:
-                    self.client = self.project.client
-            elif self.epic.project_id != self.project_id:
-                errors["epic"] = "Epic does not belong to selected project."
-
-        # If project is set, ensure any agile refs ultimately align to it (after backfills)
-        if self.project:
-            if self.epic and self.epic.project_id != self.project_id:
-                errors["epic"] = "Epic does not belong to selected project."
-            if self.feature and self.feature.epic.project_id != self.project_id:
-                errors["feature"] = "Feature does not belong to selected project."
-            if self.story and self.story.feature.epic.project_id != self.project_id:
-                errors["story"] = "Story does not belong to selected project."
-            if self.task and self.task.story.feature.epic.project_id != self.project_id:
-                errors["task"] = "Task does not belong to selected project."
+        ids = {name: getattr(self, name) for name in HIERARCHY_FIELDS}
+        hierarchy = HierarchyMap.for_ids(self.user_id, **{name: [pk] for name, pk in ids.items() if pk})
+        resolved, errors = hierarchy.resolve(**ids)
 
         if errors:
             raise ValidationError(errors)
 
+        # Only touch changed ids so already-loaded related objects stay cached
+        for name, pk in resolved.items():
+            if ids[name] != pk:
+                setattr(self, name, pk)
+
         super().clean()
 
     def save(self, *args, **kwargs):
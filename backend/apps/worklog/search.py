@@ -0,0 +1,184 @@
+"""
+Full-text search over WorkLog content.
+
+PostgreSQL: a weighted ``search_vector`` tsvector column (GIN indexed) on
+``worklog_worklog``, refreshed whenever a WorkLog is saved. The column is
+created by migration only on PostgreSQL and is not a model field.
+
+SQLite (dev/test): an FTS5 virtual table ``worklog_worklog_fts`` keyed by
+WorkLog id, kept in sync the same way.
+
+Other backends fall back to the previous chained ``icontains`` search.
+"""
+import logging
+import re
+from typing import Iterable, List
+
+from django.db import connection, models
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'worklog_worklog_fts'
+
+# Fields that feed the search document; saves that touch none of them skip reindexing.
+INDEXED_FIELDS = ('title', 'content', 'outcome', 'impact', 'tags')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Title weighs most, then outcome/impact/tags, then the raw notes.
+POSTGRES_VECTOR_SQL = (
+    "setweight(to_tsvector(coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector(coalesce(outcome, '') || ' ' || coalesce(impact, '')), 'B') || "
+    "setweight(to_tsvector(coalesce(tags::text, '')), 'B') || "
+    "setweight(to_tsvector(coalesce(content, '')), 'C')"
+)
+
+
+def tokenize(value: str) -> List[str]:
+    """Split user input into safe search terms (drops query-syntax characters)."""
+    return _TOKEN_RE.findall(value or '')
+
+
+def _tags_text(tags) -> str:
+    if isinstance(tags, (list, tuple)):
+        return ' '.join(str(tag) for tag in tags)
+    return str(tags or '')
+
+
+_fts5_ready = False
+
+
+def _fts5_available() -> bool:
+    """Whether the FTS5 table exists (positive result cached for the process)."""
+    global _fts5_ready
+    if _fts5_ready:
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE],
+        )
+        _fts5_ready = cursor.fetchone() is not None
+    return _fts5_ready
+
+
+def search_worklogs(queryset: models.QuerySet, value: str) -> models.QuerySet:
+    """
+    Filter a WorkLog queryset to entries matching ``value``.
+
+    Every term is prefix-matched so results update as the user types.
+    The queryset is annotated with ``search_rank`` (higher is better).
+    """
+    terms = tokenize(value)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, terms)
+    if vendor == 'sqlite' and _fts5_available():
+        return _search_sqlite(queryset, terms)
+    return _search_fallback(queryset, value)
+
+
+def _search_postgres(queryset, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+    query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw')
+    vector = RawSQL('"worklog_worklog"."search_vector"', [], output_field=SearchVectorField())
+    return (
+        queryset
+        .annotate(search_document=vector)
+        .filter(search_document=query)
+        .annotate(search_rank=SearchRank(vector, query))
+    )
+
+
+def _search_sqlite(queryset, terms):
+    match = ' '.join('"{}"*'.format(term.replace('"', '')) for term in terms)
+    matching_ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    # bm25() is lower-is-better; negate so search_rank sorts like ts_rank.
+    rank = RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, 4.0, 1.0, 2.0, 2.0, 1.0) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = "worklog_worklog"."id"',
+        [match],
+        output_field=FloatField(),
+    )
+    return queryset.filter(id__in=matching_ids).annotate(search_rank=rank)
+
+
+def _search_fallback(queryset, value):
+    return queryset.filter(
+        Q(content__icontains=value) |
+        Q(outcome__icontains=value) |
+        Q(impact__icontains=value) |
+        Q(title__icontains=value) |
+        Q(tags__icontains=value)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+# ================================
+# Index maintenance
+# ================================
+
+def index_worklogs(worklog_ids: Iterable[int]) -> None:
+    """Refresh the search document for the given WorkLog ids."""
+    ids = list(worklog_ids)
+    if not ids:
+        return
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        _index_postgres(ids)
+    elif vendor == 'sqlite' and _fts5_available():
+        _index_sqlite(ids)
+
+
+def remove_worklogs(worklog_ids: Iterable[int]) -> None:
+    """Drop search documents for deleted WorkLogs (tsvector rows go with the row itself)."""
+    ids = list(worklog_ids)
+    if not ids or connection.vendor != 'sqlite' or not _fts5_available():
+        return
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', ids)
+
+
+def _index_postgres(ids):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE worklog_worklog SET search_vector = {POSTGRES_VECTOR_SQL} WHERE id = ANY(%s)',
+            [ids],
+        )
+
+
+def _index_sqlite(ids):
+    from .models import WorkLog
+
+    rows = WorkLog.objects.filter(id__in=ids).values_list(
+        'id', 'title', 'content', 'outcome', 'impact', 'tags'
+    )
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', ids)
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, content, outcome, impact, tags) '
+            f'VALUES (%s, %s, %s, %s, %s, %s)',
+            [
+                (pk, title, content, outcome, impact, _tags_text(tags))
+                for pk, title, content, outcome, impact, tags in rows
+            ],
+        )
+
+
+def rebuild_index() -> int:
+    """Reindex every WorkLog. Returns the number of rows indexed."""
+    from .models import WorkLog
+
+    ids = list(WorkLog.objects.values_list('id', flat=True))
+    for start in range(0, len(ids), 1000):
+        index_worklogs(ids[start:start + 1000])
+    logger.info(f"Rebuilt worklog search index for {len(ids)} entries")
+    return len(ids)
@@ -1,10 +1,14 @@
 """
 Selectors for worklog queries.
 """
-from typing import Optional
+import hashlib
+import json
+from typing import Optional, Tuple
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import QuerySet, Prefetch
 from datetime import date, datetime
+from apps.observability.metrics import CACHE_REQUESTS
 from .models import (
     WorkLog, Client, Project, Epic, Feature, Story, Task, Sprint,
     WorkLogSkillSignal, WorkLogBullet, WorkLogPreset, WorkLogReport,
@@ -169,6 +173,75 @@ def list_sprints(user: User, project_id: Optional[int] = None, is_active: Option
     return qs
 
 
+# ================================
+# Hierarchy tree
+# ================================
+
+HIERARCHY_TREE_CACHE_KEY = 'worklog:hierarchy_tree:{user_id}'
+HIERARCHY_TREE_TTL = 60 * 60  # safety net; signals invalidate on every change
+
+
+def build_hierarchy_tree(user: User) -> list:
+    """
+    Build the nested client -> project -> (sprints, epic -> feature -> story -> task) tree.
+    
+    One flat query per level, assembled in memory.
+    """
+    node_fields = ('id', 'name', 'is_active')
+    
+    def nodes(qs, parent_field):
+        grouped = {}
+        for row in qs.order_by('name', 'id').values(*node_fields, parent_field):
+            grouped.setdefault(row.pop(parent_field), []).append(row)
+        return grouped
+    
+    tasks = nodes(list_tasks(user), 'story_id')
+    stories = nodes(list_stories(user), 'feature_id')
+    features = nodes(list_features(user), 'epic_id')
+    epics = nodes(list_epics(user), 'project_id')
+    sprints = nodes(list_sprints(user), 'project_id')
+    projects = nodes(list_projects(user), 'client_id')
+    clients = nodes(list_clients(user), 'user_id').get(user.id, [])
+    
+    for story in (row for rows in stories.values() for row in rows):
+        story['tasks'] = tasks.get(story['id'], [])
+    for feature in (row for rows in features.values() for row in rows):
+        feature['stories'] = stories.get(feature['id'], [])
+    for epic in (row for rows in epics.values() for row in rows):
+        epic['features'] = features.get(epic['id'], [])
+    for project in (row for rows in projects.values() for row in rows):
+        project['sprints'] = sprints.get(project['id'], [])
+        project['epics'] = epics.get(project['id'], [])
+    for client in clients:
+        client['projects'] = projects.get(client['id'], [])
+    
+    return clients
+
+
+def get_hierarchy_tree(user: User) -> Tuple[list, str]:
+    """
+    Return the user's hierarchy tree and its ETag, served from cache when possible.
+    
+    Returns:
+        (tree, etag) where etag is a hash of the serialized tree
+    """
+    key = HIERARCHY_TREE_CACHE_KEY.format(user_id=user.id)
+    cached = cache.get(key)
+    CACHE_REQUESTS.inc(cache='hierarchy_tree', result='miss' if cached is None else 'hit')
+    if cached is not None:
+        return cached['tree'], cached['etag']
+    
+    tree = build_hierarchy_tree(user)
+    etag = hashlib.md5(json.dumps(tree, sort_keys=True).encode()).hexdigest()
+    cache.set(key, {'tree': tree, 'etag': etag}, HIERARCHY_TREE_TTL)
+    return tree, etag
+
+
+def invalidate_hierarchy_tree(user_id: int) -> None:
+    """Drop the cached hierarchy tree for a user."""
+    cache.delete(HIERARCHY_TREE_CACHE_KEY.format(user_id=user_id))
+
+
 # ================================
 # Preset and Report selectors
 # ================================
@@ -2,11 +2,16 @@
 Serializers for worklog API.
 """
 from rest_framework import serializers
+from .hierarchy import HierarchyMap, HIERARCHY_FIELDS
 from .models import (
     WorkLog, Attachment, Client, Project, Epic, Feature, Story, Task, Sprint,
-    WorkLogSkillSignal, WorkLogBullet, WorkLogPreset, WorkLogReport, WorkLogExternalLink
+    WorkLogSkillSignal, WorkLogBullet, WorkLogPreset, WorkLogReport, WorkLogExternalLink,
+    WorkSource
 )
 
+# Upper bound on entries accepted by a single bulk import request
+BULK_IMPORT_MAX_ENTRIES = 5000
+
 
 # ================================
 # Organizational hierarchy serializers
@@ -179,7 +184,20 @@ class WorkLogListSerializer(serializers.ModelSerializer):
 
 
 class WorkLogCreateUpdateSerializer(serializers.ModelSerializer):
-    """Serializer for creating/updating WorkLog entries with validation."""
+    """
+    Serializer for creating/updating WorkLog entries with validation.
+    
+    Hierarchy references are plain ids: ``validate`` checks ownership and
+    consistency against one ``HierarchyMap`` query, so neither a lookup per
+    field here nor ``WorkLog.full_clean`` on save repeats that work.
+    """
+    client = serializers.IntegerField(source='client_id', required=False, allow_null=True)
+    project = serializers.IntegerField(source='project_id', required=False, allow_null=True)
+    epic = serializers.IntegerField(source='epic_id', required=False, allow_null=True)
+    feature = serializers.IntegerField(source='feature_id', required=False, allow_null=True)
+    story = serializers.IntegerField(source='story_id', required=False, allow_null=True)
+    task = serializers.IntegerField(source='task_id', required=False, allow_null=True)
+    sprint = serializers.IntegerField(source='sprint_id', required=False, allow_null=True)
     
     class Meta:
         model = WorkLog
@@ -192,25 +210,67 @@ class WorkLogCreateUpdateSerializer(serializers.ModelSerializer):
         ]
     
     def validate(self, attrs):
-        """Run model-level validation."""
-        instance = WorkLog(**attrs)
+        """Validate the hierarchy and backfill implied parents (mirrors WorkLog.clean)."""
         if self.instance:
-            # Update existing instance for validation
-            for key, value in attrs.items():
-                setattr(self.instance, key, value)
-            instance = self.instance
-        
-        # Set user for validation
-        request = self.context.get('request')
-        if request and request.user:
-            instance.user = request.user
+            user_id = self.instance.user_id
+        else:
+            request = self.context.get('request')
+            user_id = request.user.id if request and request.user.is_authenticated else None
         
-        try:
-            instance.clean()
-        except Exception as e:
-            raise serializers.ValidationError(str(e))
+        # Partial updates keep the stored ids for fields they don't send
+        ids = {name: attrs.get(name, getattr(self.instance, name, None)) for name in HIERARCHY_FIELDS}
+        hierarchy = HierarchyMap.for_ids(user_id, **{name: [pk] for name, pk in ids.items() if pk})
+        resolved, errors = hierarchy.resolve(**ids)
+        if errors:
+            raise serializers.ValidationError(errors)
         
+        attrs.update(resolved)
         return attrs
+    
+    def create(self, validated_data):
+        worklog = WorkLog(**validated_data)
+        # Fields and hierarchy were validated above
+        worklog.save(validate=False)
+        return worklog
+    
+    def update(self, instance, validated_data):
+        for key, value in validated_data.items():
+            setattr(instance, key, value)
+        instance.save(validate=False)
+        return instance
+
+
+class WorkLogImportEntrySerializer(serializers.ModelSerializer):
+    """
+    One entry of a bulk import.
+    
+    Hierarchy references are plain ids here; ownership and parent/child
+    consistency are checked in bulk by ``bulk_import_worklogs`` instead of
+    one lookup per field per entry.
+    """
+    client = serializers.IntegerField(source='client_id', required=False, allow_null=True)
+    project = serializers.IntegerField(source='project_id', required=False, allow_null=True)
+    epic = serializers.IntegerField(source='epic_id', required=False, allow_null=True)
+    feature = serializers.IntegerField(source='feature_id', required=False, allow_null=True)
+    story = serializers.IntegerField(source='story_id', required=False, allow_null=True)
+    task = serializers.IntegerField(source='task_id', required=False, allow_null=True)
+    sprint = serializers.IntegerField(source='sprint_id', required=False, allow_null=True)
+    
+    class Meta:
+        model = WorkLog
+        fields = [
+            'occurred_on', 'title',
+            'client', 'project', 'epic', 'feature', 'story', 'task', 'sprint',
+            'work_type', 'status', 'content', 'outcome', 'impact', 'next_steps',
+            'effort_minutes', 'is_billable', 'tags',
+            'source', 'source_ref', 'metadata'
+        ]
+
+
+class WorkLogImportSerializer(serializers.Serializer):
+    """Request body for POST /api/worklogs/import/."""
+    source = serializers.ChoiceField(choices=WorkSource.choices, default=WorkSource.OTHER)
+    entries = WorkLogImportEntrySerializer(many=True, allow_empty=False, max_length=BULK_IMPORT_MAX_ENTRIES)
 
 
 # ================================
@@ -1,10 +1,13 @@
 """
 Services for worklog business logic.
 """
+import logging
 from datetime import date
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from .hierarchy import HierarchyMap, HIERARCHY_FIELDS
 from .models import (
     WorkLog, Client, Project, Epic, Feature, Story, Task, Sprint,
     WorkLogSkillSignal, WorkLogBullet, WorkLogPreset, WorkLogReport,
@@ -12,6 +15,10 @@ from .models import (
 )
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement for bulk imports
+BULK_IMPORT_CHUNK_SIZE = 500
 
 
 # ================================
@@ -70,7 +77,7 @@ def create_worklog(
     
     # Full clean includes hierarchy validation and backfilling
     worklog.full_clean()
-    worklog.save()
+    worklog.save(validate=False)
     
     # Trigger gamification reward evaluation
     try:
@@ -94,7 +101,7 @@ def update_worklog(worklog_id: int, user: User, **kwargs) -> Optional[WorkLog]:
         
         # Full clean includes hierarchy validation and backfilling
         worklog.full_clean()
-        worklog.save()
+        worklog.save(validate=False)
         
         # Trigger gamification reward evaluation on update
         try:
@@ -108,6 +115,113 @@ def update_worklog(worklog_id: int, user: User, **kwargs) -> Optional[WorkLog]:
         return None
 
 
+def bulk_import_worklogs(
+    user: User,
+    entries: List[Dict[str, Any]],
+    source: str,
+    chunk_size: int = BULK_IMPORT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Import many work log entries in one pass.
+    
+    The hierarchy chains referenced by the batch are loaded once and every
+    entry is validated and backfilled in memory. Valid entries are inserted with ``bulk_create`` in
+    a single transaction; entries whose ``(source, source_ref)`` already
+    exists for the user (or repeats within the batch) are skipped. One
+    reward evaluation job is enqueued for all created entries.
+    
+    Args:
+        user: Owner of the imported entries
+        entries: Dicts with the same fields accepted by ``create_worklog``
+        source: Default ``WorkSource`` for entries that do not set one
+        chunk_size: Rows per INSERT statement
+    
+    Returns:
+        {'created': int, 'created_ids': list, 'duplicates': int, 'errors': list}
+    """
+    from . import search
+    
+    # Chains for every id referenced anywhere in the batch, in one query
+    hierarchy = HierarchyMap.for_ids(
+        user.id,
+        **{name: {entry.get(name) for entry in entries} for name in HIERARCHY_FIELDS}
+    )
+    
+    # Existing (source, source_ref) pairs for this batch, fetched in one query
+    refs = {entry.get('source_ref') for entry in entries if entry.get('source_ref')}
+    seen = set()
+    if refs:
+        seen = set(
+            WorkLog.objects.filter(user=user, source_ref__in=refs).values_list('source', 'source_ref')
+        )
+    
+    to_create = []
+    duplicates = 0
+    errors = []
+    
+    for index, entry in enumerate(entries):
+        fields = dict(entry)
+        fields.setdefault('source', source)
+        
+        ref = fields.get('source_ref') or ''
+        if ref:
+            key = (fields['source'], ref)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+        
+        resolved, hierarchy_errors = hierarchy.resolve(
+            **{name: fields.pop(name, None) for name in HIERARCHY_FIELDS}
+        )
+        if hierarchy_errors:
+            errors.append({'index': index, 'errors': hierarchy_errors})
+            continue
+        
+        worklog = WorkLog(user=user, **fields, **resolved)
+        
+        # Field-level validation only; the hierarchy was resolved above
+        try:
+            worklog.clean_fields(exclude=['user'])
+        except ValidationError as e:
+            errors.append({'index': index, 'errors': e.message_dict})
+            continue
+        
+        to_create.append(worklog)
+    
+    with transaction.atomic():
+        created = WorkLog.objects.bulk_create(to_create, batch_size=chunk_size)
+        created_ids = [worklog.id for worklog in created]
+        # bulk_create skips post_save, so index the new rows explicitly
+        search.index_worklogs(created_ids)
+        if created_ids:
+            # ...and the activity counters signals would have maintained
+            try:
+                from apps.gamification.stats import recompute_activity_stats
+                recompute_activity_stats(user.id)
+            except ImportError:
+                pass
+    
+    logger.info(
+        f"Imported {len(created_ids)} worklogs for user {user.id} "
+        f"({duplicates} duplicates, {len(errors)} invalid)"
+    )
+    
+    if created_ids:
+        try:
+            from apps.gamification.services import trigger_bulk_reward_evaluation
+            trigger_bulk_reward_evaluation(created_ids, user.id)
+        except ImportError:
+            pass
+    
+    return {
+        'created': len(created_ids),
+        'created_ids': created_ids,
+        'duplicates': duplicates,
+        'errors': errors,
+    }
+
+
 def delete_worklog(worklog_id: int, user: User) -> bool:
     """Delete a work log entry."""
     try:
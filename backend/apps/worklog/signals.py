@@ -0,0 +1,54 @@
+"""
+Worklog signals - keep the full-text search index and cached hierarchy tree in sync.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import WorkLog, Client, Project, Sprint, Epic, Feature, Story, Task
+from .selectors import invalidate_hierarchy_tree
+from . import search
+
+
+@receiver(post_save, sender=WorkLog)
+def index_worklog_on_save(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search document when any indexed field may have changed."""
+    if update_fields is not None and not set(update_fields) & set(search.INDEXED_FIELDS):
+        return
+    search.index_worklogs([instance.id])
+
+
+@receiver(post_delete, sender=WorkLog)
+def remove_worklog_from_index(sender, instance, **kwargs):
+    """Remove the search document for a deleted WorkLog."""
+    search.remove_worklogs([instance.id])
+
+
+# Lookup from Client to each level's parent. Resolving the owner through the
+# parent (not the row itself) keeps this working in post_delete, including
+# cascades, where children are deleted before their parents.
+_OWNER_VIA_PARENT = {
+    Project: ('id', 'client_id'),
+    Sprint: ('projects', 'project_id'),
+    Epic: ('projects', 'project_id'),
+    Feature: ('projects__epics', 'epic_id'),
+    Story: ('projects__epics__features', 'feature_id'),
+    Task: ('projects__epics__features__stories', 'story_id'),
+}
+
+
+def _owner_id(instance):
+    if isinstance(instance, Client):
+        return instance.user_id
+    lookup, parent_attr = _OWNER_VIA_PARENT[type(instance)]
+    return Client.objects.filter(**{lookup: getattr(instance, parent_attr)}).values_list('user_id', flat=True).first()
+
+
+def invalidate_tree_on_change(sender, instance, **kwargs):
+    """Drop the owner's cached hierarchy tree when any level changes."""
+    user_id = _owner_id(instance)
+    if user_id is not None:
+        invalidate_hierarchy_tree(user_id)
+
+
+for _model in (Client, Project, Sprint, Epic, Feature, Story, Task):
+    post_save.connect(invalidate_tree_on_change, sender=_model, dispatch_uid=f'hierarchy_tree_save_{_model.__name__}')
+    post_delete.connect(invalidate_tree_on_change, sender=_model, dispatch_uid=f'hierarchy_tree_delete_{_model.__name__}')
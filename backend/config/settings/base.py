@@ -75,6 +75,7 @@ MIDDLEWARE = [
     'apps.api.security_middleware.IPAllowlistMiddleware',
     'apps.api.security_middleware.MaintenanceModeMiddleware',
     'apps.observability.correlation.CorrelationIDMiddleware',
+    'apps.observability.middleware.RequestProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
 ]
 
@@ -181,7 +182,10 @@ SIMPLE_JWT = {
 
 # Huey configuration
 HUEY = {
-    'huey_class': 'huey.RedisHuey',
+    # Sorted-set queue: jobs carry a lane/fair-share priority (apps.jobs.lanes).
+    # Upgrading from the list-based RedisHuey queue of the same name: stop the
+    # consumers, run `manage.py migrate_huey_queue`, then start them again
+    'huey_class': 'huey.PriorityRedisHuey',
     'name': 'afterresume',
     'url': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
     'immediate': False,  # Process tasks asynchronously
@@ -191,6 +195,49 @@ HUEY = {
     },
 }
 
+# Worker processes for CPU-bound job types (0 runs them on Huey threads)
+JOB_PROCESS_POOL_WORKERS = int(os.environ.get('JOB_PROCESS_POOL_WORKERS', str(os.cpu_count() or 1)))
+
+# Asyncio worker for LLM-bound job types (manage.py run_async_worker); when
+# enabled, those jobs are not sent to Huey
+LLM_ASYNC_WORKER_ENABLED = os.environ.get('LLM_ASYNC_WORKER_ENABLED', 'False') == 'True'
+LLM_ASYNC_WORKER_CONCURRENCY = int(os.environ.get('LLM_ASYNC_WORKER_CONCURRENCY', '50'))
+LLM_MAX_CONNECTIONS = int(os.environ.get('LLM_MAX_CONNECTIONS', '64'))
+
+# Repeated coalesced job triggers (e.g. reward evaluation) within this window share one job
+JOB_COALESCE_WINDOW_SECONDS = int(os.environ.get('JOB_COALESCE_WINDOW_SECONDS', '10'))
+
+# Job timeline events are buffered per job and written in batches to
+# 'db' (bulk insert) or 'redis' (stream drained by manage.py drain_event_stream)
+EVENT_SINK = os.environ.get('EVENT_SINK', 'db')
+EVENT_BUFFER_SIZE = int(os.environ.get('EVENT_BUFFER_SIZE', '50'))
+
+# Per-process metrics are pushed to Redis this often for /metrics to
+# aggregate; METRICS_TOKEN is required as a Bearer token to scrape (without
+# one, /metrics is only served when DEBUG is on)
+METRICS_FLUSH_SECONDS = int(os.environ.get('METRICS_FLUSH_SECONDS', '10'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Request profiling: per-route latency/query samples for the slow endpoint
+# view, plus cProfile captures for a sampled fraction of requests
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True') == 'True'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0.0'))
+PROFILING_SAMPLES_PER_ROUTE = int(os.environ.get('PROFILING_SAMPLES_PER_ROUTE', '200'))
+PROFILING_DUPLICATE_THRESHOLD = int(os.environ.get('PROFILING_DUPLICATE_THRESHOLD', '5'))
+# Secret sent as X-Profile-Token (with X-Profile: 1) to force a capture
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+
+# Longest a job timeline SSE connection stays open before the client
+# reconnects with Last-Event-ID (each open stream holds a server thread)
+JOB_STREAM_MAX_SECONDS = int(os.environ.get('JOB_STREAM_MAX_SECONDS', '300'))
+
+# Metrics rollups only fold in rows older than this, so rows from
+# transactions still in flight are not skipped past the watermark
+ROLLUP_LAG_SECONDS = int(os.environ.get('ROLLUP_LAG_SECONDS', '60'))
+
+# Concurrency slot lease; running jobs renew it, lapsed leases are reaped
+CONCURRENCY_LEASE_SECONDS = int(os.environ.get('CONCURRENCY_LEASE_SECONDS', '300'))
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -274,6 +321,17 @@ LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'local')
 LLM_VLLM_ENDPOINT = os.environ.get('LLM_VLLM_ENDPOINT', 'http://localhost:8000')
 LLM_MODEL_NAME = os.environ.get('LLM_MODEL_NAME', 'gpt-4')
 OLLAMA_ENDPOINT = os.environ.get('OLLAMA_ENDPOINT', 'http://ollama:11434')
+# LLM response cache (apps.llm.cache), keyed by provider/model/prompt/params
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'True') == 'True'
+LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', '7200'))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '10000'))
+# vLLM micro-batching: prompts from concurrent callers are sent together
+# (up to LLM_BATCH_MAX_SIZE, waiting at most LLM_BATCH_MAX_WAIT_MS); 1 disables
+LLM_BATCH_MAX_SIZE = int(os.environ.get('LLM_BATCH_MAX_SIZE', '16'))
+LLM_BATCH_MAX_WAIT_MS = float(os.environ.get('LLM_BATCH_MAX_WAIT_MS', '5'))
+# Batched requests run on a thread pool of this size per endpoint/model; it
+# also bounds async callers (run_async_worker), whose batched calls wait on it
+LLM_BATCH_MAX_IN_FLIGHT = int(os.environ.get('LLM_BATCH_MAX_IN_FLIGHT', '8'))
 
 # System dashboard
 SYSTEM_DASHBOARD_ENABLED = os.environ.get('SYSTEM_DASHBOARD_ENABLED', 'True') == 'True'
@@ -325,7 +383,8 @@ CSP_EXTRA_SRC = [
 # Cache configuration (Valkey/Redis)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        # RedisCache that counts round trips per request for profiling
+        'BACKEND': 'apps.observability.profiling.CountingRedisCache',
         'LOCATION': os.environ.get('REDIS_URL', 'redis://valkey:6379/0'),
         'KEY_PREFIX': 'afterresume',
     }
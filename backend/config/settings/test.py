@@ -20,10 +20,13 @@ HUEY = {
     'consumer': {'workers': 1, 'worker_type': 'thread'},
 }
 
+# In-memory SQLite is not visible to worker processes
+JOB_PROCESS_POOL_WORKERS = 0
+
 # Use local memory cache to avoid external services in tests.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'apps.observability.profiling.CountingLocMemCache',
     }
 }
 
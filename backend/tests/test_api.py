@@ -120,6 +120,38 @@ class TestSystemDashboard:
         assert response.status_code == 200
         assert 'status' in response.data
         assert 'checks' in response.data
+    
+    def test_slow_endpoints(self, api_client, test_user):
+        """Requests are profiled per route with query and cache counts."""
+        test_user.is_staff = True
+        test_user.save()
+        api_client.force_authenticate(user=test_user)
+        
+        for _ in range(3):
+            api_client.get('/api/hierarchy/tree/')
+        
+        response = api_client.get('/api/admin/slow-endpoints/')
+        
+        assert response.status_code == 200
+        endpoints = {row['route']: row for row in response.data['endpoints']}
+        tree = endpoints['GET /api/hierarchy/tree/']
+        assert tree['count'] == 3
+        assert tree['p50_ms'] <= tree['p95_ms']
+        assert tree['avg_queries'] > 0
+        assert tree['avg_cache_calls'] > 0
+    
+    def test_profile_header_requires_token(self, api_client, settings, mocker):
+        """X-Profile only forces a cProfile capture with the profiling token."""
+        settings.PROFILING_TOKEN = 'profile-secret'
+        store = mocker.patch('apps.observability.profiling.store_profile', return_value='profiles/x.prof')
+        
+        api_client.get('/api/healthz/', HTTP_X_PROFILE='1')
+        api_client.get('/api/healthz/', HTTP_X_PROFILE='1', HTTP_X_PROFILE_TOKEN='wrong')
+        assert not store.called
+        
+        response = api_client.get('/api/healthz/', HTTP_X_PROFILE='1', HTTP_X_PROFILE_TOKEN='profile-secret')
+        assert store.call_count == 1
+        assert response['X-Profile-Key'] == 'profiles/x.prof'
 
 
 @pytest.mark.django_db
@@ -140,3 +172,28 @@ class TestHealthEndpoints:
         assert response.status_code == 200
         assert 'status' in response.data
         assert 'checks' in response.data
+    
+    def test_metrics_exposition(self, api_client, settings):
+        """Histograms are rendered cumulatively; the token is enforced."""
+        from apps.observability.metrics import histogram
+        
+        latency = histogram('test_latency_seconds', 'Test latency', ('op',), buckets=(0.1, 1))
+        latency.observe(0.05, op='read')
+        latency.observe(0.5, op='read')
+        latency.observe(5, op='read')
+        api_client.get('/api/healthz/')
+        
+        # Fails closed without a token outside DEBUG
+        settings.DEBUG = False
+        settings.METRICS_TOKEN = ''
+        assert api_client.get('/metrics').status_code == 403
+        
+        settings.METRICS_TOKEN = 'secret'
+        body = api_client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').content.decode()
+        assert 'test_latency_seconds_bucket{op="read",le="0.1"} 1' in body
+        assert 'test_latency_seconds_bucket{op="read",le="1"} 2' in body
+        assert 'test_latency_seconds_bucket{op="read",le="+Inf"} 3' in body
+        assert 'test_latency_seconds_count{op="read"} 3' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="api/healthz/",status="200"}' in body
+        assert api_client.get('/metrics').status_code == 403
+        assert api_client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
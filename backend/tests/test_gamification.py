@@ -2,22 +2,26 @@
 Tests for gamification feature.
 """
 import pytest
+from io import StringIO
 from datetime import date, timedelta
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 from apps.gamification.models import (
     UserStreak, UserXP, XPEvent, BadgeDefinition, UserBadge,
-    ChallengeTemplate, UserChallenge, RewardConfig, GamificationSettings
+    ChallengeTemplate, UserChallenge, RewardConfig, GamificationSettings,
+    UserActivityStats
 )
 from apps.gamification.tools import (
     is_meaningful_entry,
     compute_xp,
     update_streak,
+    compute_streak,
     award_badges,
     update_challenges,
 )
 from apps.gamification import services, selectors
+from apps.gamification.stats import get_activity_stats, recompute_activity_stats
 from apps.worklog.models import WorkLog, Attachment
 
 User = get_user_model()
@@ -219,6 +223,49 @@ class TestStreakUpdater:
         assert result['freeze_used'] is True
         assert result['current_streak'] == 2
         assert result['streak_broken'] is False
+    
+    def test_compute_streak_from_unordered_dates(self):
+        """Dates are sorted and deduplicated; one-day gaps use freezes while available."""
+        d = date(2025, 3, 1)
+        dates = [d + timedelta(days=n) for n in (9, 0, 1, 1, 3, 4, 6, 8, 9)]
+        
+        state = compute_streak(dates, max_freezes=2)
+        
+        # 0,1,(2),3,4,(5),6 - bridged days are not counted - then freezes run out: 8,9
+        assert state.longest_streak == 5
+        assert state.current_streak == 2
+        assert state.freezes_used == 2
+        assert state.last_counted_date == d + timedelta(days=9)
+    
+    def test_backdated_entry_recomputes(self, user, reward_config):
+        """A back-filled day joins the runs around it instead of breaking the streak."""
+        text = "Meaningful entry with enough content."
+        for day in (1, 2, 5, 6):
+            WorkLog.objects.create(user=user, occurred_on=date(2025, 3, day), content=text)
+        for day in (1, 2, 5, 6):
+            update_streak(user, date(2025, 3, day), reward_config.config)
+        
+        WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 4), content=text)
+        WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 3), content=text)
+        update_streak(user, date(2025, 3, 4), reward_config.config)
+        result = update_streak(user, date(2025, 3, 3), reward_config.config)
+        
+        assert result['current_streak'] == 6
+        assert UserStreak.objects.get(user=user).last_counted_date == date(2025, 3, 6)
+    
+    def test_recompute_streaks_command(self, user, reward_config):
+        """The management command rebuilds stored streaks in batches."""
+        from django.core.management import call_command
+        
+        for day in (1, 2, 3):
+            WorkLog.objects.create(user=user, occurred_on=date(2025, 3, day),
+                                   content="Meaningful entry with enough content.")
+        UserStreak.objects.update_or_create(user=user, defaults={'current_streak': 1, 'longest_streak': 1})
+        
+        call_command('recompute_streaks', batch_size=1, stdout=StringIO())
+        
+        streak = UserStreak.objects.get(user=user)
+        assert (streak.current_streak, streak.longest_streak) == (3, 3)
 
 
 @pytest.mark.django_db
@@ -346,6 +393,137 @@ class TestChallengeUpdater:
         assert challenge.completed_at is not None
 
 
+@pytest.mark.django_db
+class TestBatchRewardEvaluation:
+    """Test the batched reward_evaluate workflow."""
+    
+    @pytest.fixture
+    def ctx(self):
+        from apps.jobs.models import Job
+        from apps.orchestration.context import ExecutionContext
+        job = Job.objects.create(type='gamification.reward_evaluate', status='running', payload={})
+        return ExecutionContext.from_job(job)
+    
+    def test_batch_evaluates_all_entries(self, user, reward_config, ctx):
+        """One run covers XP, streak, badges and challenges for every entry."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.orchestration.workflows.reward_evaluate import execute
+        
+        for code, trigger in [('batch_first', 'first_entry'), ('batch_total_3', 'total_entries_3'),
+                              ('batch_streak_3', 'streak_3')]:
+            BadgeDefinition.objects.create(code=code, name=code, description=code, trigger_type=trigger)
+        ChallengeTemplate.objects.create(code='batch_log_3', name='Log 3 Days', description='Log 3 days',
+                                         goal_type='log_days', goal_target=3, xp_reward=30)
+        
+        monday = date(2025, 3, 3)
+        entries = [
+            WorkLog.objects.create(user=user, occurred_on=monday + timedelta(days=i),
+                                   content=f"Meaningful entry number {i} with enough content.")
+            for i in range(3)
+        ]
+        
+        with CaptureQueriesContext(connection) as queries:
+            result = execute(ctx, {'entry_ids': [entry.id for entry in entries]})
+        
+        assert result['errors'] == []
+        assert result['valid'] == 3
+        assert {badge['badge_code'] for badge in result['badges_awarded']} == {
+            'batch_first', 'batch_total_3', 'batch_streak_3'
+        }
+        assert UserStreak.objects.get(user=user).current_streak == 3
+        assert UserChallenge.objects.get(user=user, template__code='batch_log_3').status == 'completed'
+        assert XPEvent.objects.filter(user=user).count() == 4
+        assert UserXP.objects.get(user=user).total_xp == 3 * 10 + 30
+        assert len(queries) < 40
+    
+    def test_rerun_is_idempotent(self, user, reward_config, ctx):
+        """Re-evaluating the same entries in the same job grants nothing twice."""
+        from apps.orchestration.workflows.reward_evaluate import execute
+        
+        entry = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 3),
+                                       content="Meaningful entry with enough content.")
+        execute(ctx, {'entry_id': entry.id})
+        execute(ctx, {'entry_ids': [entry.id]})
+        
+        assert XPEvent.objects.filter(user=user).count() == 1
+        assert UserXP.objects.get(user=user).total_xp == 10
+
+
+@pytest.mark.django_db
+class TestActivityStats:
+    """Test maintained per-user activity counters."""
+    
+    def _counters(self, user):
+        stats = UserActivityStats.objects.get(user=user)
+        return (stats.total_entries, stats.total_attachments, stats.distinct_days, stats.entries_with_outcomes)
+    
+    def test_counters_follow_creates_updates_and_deletes(self, user):
+        """Signals keep counters equal to a full recompute."""
+        first = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 3), content="Morning work")
+        second = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 3), content="Afternoon work",
+                                        outcome="Shipped the fix")
+        Attachment.objects.create(worklog=second, object_key='a/1', filename='1.png')
+        assert self._counters(user) == (2, 1, 1, 1)
+        
+        first.occurred_on = date(2025, 3, 4)
+        first.impact = "Unblocked the team"
+        first.save()
+        assert self._counters(user) == (2, 1, 2, 2)
+        
+        second.delete()
+        assert self._counters(user) == (1, 0, 1, 1)
+        
+        recompute_activity_stats(user.id)
+        assert self._counters(user) == (1, 0, 1, 1)
+    
+    def test_missing_row_is_rebuilt(self, user):
+        """Users with history but no stats row get one built on first read."""
+        WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 3), content="Some work")
+        UserActivityStats.objects.filter(user=user).delete()
+        
+        assert get_activity_stats(user.id).total_entries == 1
+    
+    def test_deleting_user_does_not_recreate_row(self, user):
+        """Cascaded deletes only decrement existing rows."""
+        WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 3), content="Some work")
+        user.delete()
+        
+        assert not UserActivityStats.objects.exists()
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+    """Test leaderboard reads (database fallback when the cache is not Redis)."""
+    
+    def test_top_rank_and_around(self, user):
+        """Ranks follow total XP; the around-me window is centred on the caller."""
+        from rest_framework.test import APIClient
+        
+        admin = User.objects.create_user(username='lb_admin', password='x', is_staff=True)
+        others = [User.objects.create_user(username=f'lb_{n}', password='x') for n in range(4)]
+        for n, other in enumerate(others):
+            services.manual_grant_xp(other.id, (n + 1) * 100, 'seed', admin.id)
+        services.manual_grant_xp(user.id, 250, 'seed', admin.id)
+        
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get('/api/gamification/leaderboard/', {'limit': 2, 'radius': 1})
+        
+        assert response.status_code == 200
+        assert [row['score'] for row in response.data['top']] == [400, 300]
+        assert response.data['me'] == {'rank': 3, 'score': 250}
+        assert [row['username'] for row in response.data['around']] == ['lb_2', user.username, 'lb_1']
+    
+    def test_unknown_board_rejected(self, user):
+        from rest_framework.test import APIClient
+        
+        client = APIClient()
+        client.force_authenticate(user=user)
+        
+        assert client.get('/api/gamification/leaderboard/', {'board': 'monthly'}).status_code == 400
+
+
 @pytest.mark.django_db
 class TestGamificationServices:
     """Test gamification services."""
@@ -0,0 +1,73 @@
+"""
+Tests for the cached hierarchy tree endpoint.
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from apps.worklog.models import Client, Project, Sprint, Epic, Feature, Story, Task
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestHierarchyTree:
+    """Test GET /api/hierarchy/tree/."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(username='planner', password='testpass123')
+
+    @pytest.fixture
+    def api_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    @pytest.fixture
+    def task(self, user):
+        client = Client.objects.create(user=user, name='Acme')
+        project = Project.objects.create(client=client, name='Portal')
+        Sprint.objects.create(project=project, name='Sprint 1')
+        epic = Epic.objects.create(project=project, name='Auth')
+        feature = Feature.objects.create(epic=epic, name='SSO')
+        story = Story.objects.create(feature=feature, name='SAML login')
+        return Task.objects.create(story=story, name='Metadata endpoint')
+
+    def test_returns_nested_tree(self, api_client, user, task):
+        """The whole hierarchy comes back in one response, scoped to the user."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        Client.objects.create(user=other, name='Not mine')
+
+        response = api_client.get('/api/hierarchy/tree/')
+        assert response.status_code == 200
+
+        [client] = response.data['clients']
+        [project] = client['projects']
+        assert client['name'] == 'Acme'
+        assert [sprint['name'] for sprint in project['sprints']] == ['Sprint 1']
+        story = project['epics'][0]['features'][0]['stories'][0]
+        assert story['tasks'] == [{'id': task.id, 'name': 'Metadata endpoint', 'is_active': True}]
+
+    def test_etag_and_invalidation(self, api_client, task):
+        """A matching ETag returns 304 until the hierarchy changes."""
+        first = api_client.get('/api/hierarchy/tree/')
+        etag = first['ETag']
+
+        cached = api_client.get('/api/hierarchy/tree/', HTTP_IF_NONE_MATCH=etag)
+        assert cached.status_code == 304
+
+        task.name = 'Metadata endpoint v2'
+        task.save()
+        changed = api_client.get('/api/hierarchy/tree/', HTTP_IF_NONE_MATCH=etag)
+        assert changed.status_code == 200
+        assert changed['ETag'] != etag
+
+        task.delete()
+        story = api_client.get('/api/hierarchy/tree/').data['clients'][0]['projects'][0]['epics'][0]['features'][0]['stories'][0]
+        assert story['tasks'] == []
@@ -3,7 +3,12 @@ Test job system functionality.
 """
 import pytest
 from django.contrib.auth import get_user_model
-from apps.jobs.dispatcher import enqueue
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from apps.jobs.dispatcher import enqueue, enqueue_coalesced, enqueue_many
+from apps.jobs.lanes import assign, lane_for, lane_metrics
+from apps.tenants.quotas import QuotaManager
 from apps.jobs.models import Job
 from apps.observability.models import Event
 
@@ -83,6 +88,317 @@ class TestJobSystem:
         # This is acceptable for testing job creation itself
 
 
+@pytest.mark.django_db
+class TestCoalescedDispatch:
+    """Test debounced job dispatch."""
+    
+    def test_triggers_merge_into_pending_job(self):
+        """Repeated triggers within the window share one job with the union of ids."""
+        first = enqueue_coalesced('gamification.reward_evaluate', 'user:1', [3], window_seconds=60)
+        second = enqueue_coalesced('gamification.reward_evaluate', 'user:1', [1, 3], window_seconds=60)
+        other_key = enqueue_coalesced('gamification.reward_evaluate', 'user:2', [5], window_seconds=60)
+        
+        assert second.id == first.id
+        assert other_key.id != first.id
+        assert Job.objects.get(id=first.id).payload == {'entry_ids': [1, 3]}
+        assert Job.objects.filter(dedupe_key='user:1').count() == 1
+    
+    def test_started_job_is_not_merged(self):
+        """Once a job starts, the next trigger opens a new one."""
+        first = enqueue_coalesced('gamification.reward_evaluate', 'user:1', [1], window_seconds=60)
+        Job.objects.filter(id=first.id).update(status='running')
+        
+        second = enqueue_coalesced('gamification.reward_evaluate', 'user:1', [2], window_seconds=60)
+        assert second.id != first.id
+        assert second.payload == {'entry_ids': [2]}
+
+
+@pytest.mark.django_db
+class TestBulkDispatch:
+    """Test fan-out job creation."""
+    
+    def setup_method(self):
+        cache.clear()
+    
+    def test_enqueue_many_reserves_quota_per_tenant(self):
+        """Each tenant's jobs are reserved together; a tenant over quota gets none."""
+        users = [User.objects.create_user(username=f'fan{n}', password='x') for n in range(3)]
+        QuotaManager(users[2].tenant).consume_quota('jobs_per_day', 99)
+        specs = [
+            {'job_type': 'report.generate', 'payload': {'user_id': user.id}, 'user': user}
+            for user in users for _ in range(2)
+        ]
+        
+        jobs, rejected = enqueue_many(specs, scheduled_for=timezone.now() + timedelta(hours=1))
+        
+        assert len(jobs) == 4
+        assert [item['index'] for item in rejected] == [4, 5]
+        assert Job.objects.filter(type='report.generate', status='queued').count() == 4
+        assert QuotaManager(users[0].tenant).get_usage('jobs_per_day') == 2
+        assert QuotaManager(users[2].tenant).get_usage('jobs_per_day') == 99
+    
+    def test_enqueue_many_releases_quota_on_failure(self, mocker):
+        """If the jobs cannot be dispatched, no rows remain and the quota is given back."""
+        user = User.objects.create_user(username='fanfail', password='x')
+        mocker.patch('apps.jobs.dispatcher._dispatch_many', side_effect=ConnectionError('redis down'))
+        specs = [{'job_type': 'report.generate', 'payload': {}, 'user': user}] * 3
+        
+        with pytest.raises(ConnectionError):
+            enqueue_many(specs)
+        
+        assert not Job.objects.filter(user=user).exists()
+        assert QuotaManager(user.tenant).get_usage('jobs_per_day') == 0
+
+
+@pytest.mark.django_db
+class TestPriorityLanes:
+    """Test lane selection and fair ordering across tenants."""
+    
+    def test_lane_depends_on_job_type_and_plan(self):
+        """Interactive work stays interactive; free-plan background work runs in bulk."""
+        user = User.objects.create_user(username='laner', password='x')
+        tenant = user.tenant
+        
+        assert lane_for('gamification.reward_evaluate', tenant) == 'interactive'
+        assert lane_for('report.generate', tenant) == 'bulk'
+        tenant.plan = 'professional'
+        assert lane_for('report.generate', tenant) == 'background'
+    
+    def test_burst_does_not_starve_other_tenants(self):
+        """A tenant's burst queues behind another tenant's next job; lanes order first."""
+        busy, quiet = [User.objects.create_user(username=name, password='x') for name in ('busy', 'quiet')]
+        
+        _, burst = assign('report.generate', busy.tenant, count=3)
+        _, (single,) = assign('report.generate', quiet.tenant)
+        _, (interactive,) = assign('gamification.reward_evaluate', busy.tenant)
+        
+        # Huey runs higher priorities first
+        assert burst[0] > burst[1] > burst[2]
+        assert single > burst[1]
+        assert interactive > max(burst + [single])
+    
+    def test_lane_metrics(self):
+        """Jobs record their lane; metrics report depth and wait per lane."""
+        user = User.objects.create_user(username='metered', password='x')
+        job = enqueue('report.generate', {}, user=user, scheduled_for=timezone.now() - timedelta(seconds=1))
+        assert job.lane == 'bulk'
+        
+        Job.objects.filter(id=job.id).update(started_at=job.created_at + timedelta(seconds=4))
+        metrics = lane_metrics()
+        
+        assert metrics['bulk']['started'] == 1
+        assert metrics['bulk']['wait_p95_seconds'] >= 3
+        assert metrics['interactive']['depth'] == 0
+
+
+@pytest.mark.django_db
+class TestCpuBoundJobs:
+    """Test routing of CPU-bound job types to the process pool."""
+    
+    def test_cpu_bound_job_runs_through_process_pool(self):
+        """CPU-bound types go through run_workflow; I/O-bound ones do not."""
+        from unittest.mock import patch
+        from apps.jobs.registry import is_cpu_bound
+        from apps.workers import process_pool
+        
+        assert is_cpu_bound('system.compute_metrics')
+        assert not is_cpu_bound('worklog.analyze')
+        
+        with patch.object(process_pool, 'run_workflow', wraps=process_pool.run_workflow) as run:
+            job = enqueue('system.compute_metrics', {}, trigger='system')
+        
+        run.assert_called_once()
+        assert Job.objects.get(id=job.id).status == 'success'
+
+
+@pytest.mark.django_db
+class TestMetricsRollups:
+    """Test incremental per-tenant daily rollups."""
+    
+    def test_rollups_only_add_new_rows(self):
+        """A second run adds only rows past the watermark; buckets sum the days."""
+        from apps.billing.models import ReserveLedgerEntry
+        from apps.system.models import TenantDailyRollup
+        from apps.system.rollups import bucketed, update_rollups
+        from apps.tenants.models import Tenant
+        
+        user = User.objects.create_user(username='rollup', password='test123')
+        tenant, _ = Tenant.objects.get_or_create(owner=user, defaults={'name': 'Rollup'})
+        noon = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+        
+        def job_at(when):
+            job = Job.objects.create(type='worklog.analyze', payload={}, user=user)
+            Job.objects.filter(id=job.id).update(created_at=when)
+        
+        job_at(noon - timedelta(days=1))
+        job_at(noon)
+        entry = ReserveLedgerEntry.objects.create(tenant=tenant, entry_type='usage', amount_cents=-250,
+                                                  balance_after_cents=0)
+        ReserveLedgerEntry.objects.filter(id=entry.id).update(created_at=noon)
+        
+        assert update_rollups(now=noon + timedelta(minutes=5))['jobs'] == 2
+        job_at(noon + timedelta(minutes=7))
+        update_rollups(now=noon + timedelta(minutes=10))
+        
+        rollups = {r.day: r for r in TenantDailyRollup.objects.filter(tenant=tenant)}
+        assert rollups[noon.date()].jobs_created == 2
+        assert rollups[noon.date()].costs_cents == 250
+        assert rollups[noon.date() - timedelta(days=1)].jobs_created == 1
+        
+        for bucket in ('weekly', 'monthly'):
+            assert sum(row['jobs_created'] for row in bucketed(bucket, tenant_id=tenant.id)) == 3
+
+
+@pytest.mark.django_db
+class TestAsyncWorker:
+    """Test routing of LLM-bound jobs to the asyncio worker."""
+    
+    def test_llm_bound_jobs_wait_for_async_worker(self, settings):
+        """With the worker enabled, LLM-bound jobs skip Huey and are claimed once."""
+        from apps.workers.async_worker import claim_jobs
+        
+        settings.LLM_ASYNC_WORKER_ENABLED = True
+        llm_job = enqueue('worklog.analyze', {'worklog_id': 1}, trigger='api')
+        other_job = enqueue('system.compute_metrics', {}, trigger='system')
+        
+        assert Job.objects.get(id=llm_job.id).status == 'queued'
+        assert Job.objects.get(id=other_job.id).status == 'success'
+        assert claim_jobs(10) == [str(llm_job.id)]
+        assert claim_jobs(10) == []
+        assert Job.objects.get(id=llm_job.id).status == 'running'
+    
+    def test_huey_jobs_are_not_claimed_or_run_twice(self, settings):
+        """Jobs sent to Huey stay with Huey; a second delivery is a no-op."""
+        from apps.workers.async_worker import claim_jobs
+        from apps.workers.execute_job import run_job
+        
+        settings.LLM_ASYNC_WORKER_ENABLED = False
+        huey_job = Job.objects.create(type='worklog.analyze', payload={'worklog_id': 1})
+        assert huey_job.executor == 'huey'
+        
+        settings.LLM_ASYNC_WORKER_ENABLED = True
+        assert claim_jobs(10) == []
+        
+        Job.objects.filter(id=huey_job.id).update(status='cancelled')
+        run_job(str(huey_job.id))
+        huey_job.refresh_from_db()
+        assert (huey_job.status, huey_job.started_at) == ('cancelled', None)
+    
+    def test_async_complete_matches_sync(self):
+        """Providers expose an awaitable complete."""
+        import asyncio
+        from apps.llm.providers.local import LocalProvider
+        
+        provider = LocalProvider()
+        prompt = 'Analyze this worklog'
+        assert asyncio.run(provider.acomplete(prompt)) == provider.complete(prompt)
+    
+    def test_streaming_call_uses_event_loop_under_async_worker(self):
+        """on_chunk calls read astream on the loop instead of the blocking stream."""
+        from unittest.mock import patch
+        from apps.agents.worklog_agent import WorklogAgent
+        from apps.llm.http import use_event_loop
+        from apps.llm.providers.local import LocalProvider
+        from apps.observability.context import ExecutionContext
+        
+        ctx = ExecutionContext.from_job(Job.objects.create(type='report.generate'))
+        prompt = 'Analyze this worklog'
+        expected = list(LocalProvider().stream(prompt))
+        chunks = []
+        token = use_event_loop.set(True)
+        try:
+            with patch.object(LocalProvider, 'astream', autospec=True, side_effect=LocalProvider.astream) as astream:
+                response = WorklogAgent()._call_llm(ctx, prompt, cache=False, on_chunk=chunks.append)
+        finally:
+            use_event_loop.reset(token)
+        
+        astream.assert_called_once()
+        assert chunks == [event['text'] for event in expected if 'text' in event]
+        assert response == expected[-1]['response']
+
+
+@pytest.mark.django_db
+class TestEventSink:
+    """Test buffering of job timeline events."""
+    
+    def test_events_written_in_batch_when_buffer_exits(self):
+        """Buffered events reach the table on exit, with their original timestamps."""
+        from apps.observability.context import ExecutionContext
+        from apps.observability.services import log_event
+        from apps.observability.sink import buffered_events
+        
+        job = Job.objects.create(type='worklog.analyze', payload={})
+        ctx = ExecutionContext.from_job(job)
+        
+        with pytest.raises(ValueError):
+            with buffered_events(job.id):
+                first = log_event(ctx, 'first')
+                log_event(ctx, 'second')
+                assert Event.objects.filter(job=job).count() == 0
+                raise ValueError('job failed')
+        
+        events = list(Event.objects.filter(job=job).order_by('timestamp'))
+        assert [e.message for e in events] == ['first', 'second']
+        assert events[0].timestamp == first.timestamp
+    
+    def test_log_event_writes_directly_outside_job(self):
+        """Without an active buffer, log_event saves immediately."""
+        from apps.observability.context import ExecutionContext
+        from apps.observability.services import log_event
+        
+        job = Job.objects.create(type='worklog.analyze', payload={})
+        log_event(ExecutionContext.from_job(job), 'direct')
+        
+        assert Event.objects.filter(job=job, message='direct').exists()
+    
+    def test_drain_dead_letters_unwritable_entries(self, mocker):
+        """A bad entry is moved aside and the whole batch is acknowledged."""
+        from apps.observability.sink import DEAD_LETTER_KEY, _to_fields, drain_stream
+        
+        job = Job.objects.create(type='worklog.analyze', payload={})
+        good = _to_fields(Event(job=job, message='kept'))
+        bad = {**good, 'timestamp': 'not-a-time'}
+        client = mocker.MagicMock()
+        client.xreadgroup.return_value = [[b'events:stream', [(b'1-0', good), (b'2-0', bad)]]]
+        mocker.patch('apps.observability.sink.get_redis_client', return_value=client)
+        
+        assert drain_stream(consumer='test') == 1
+        
+        assert list(Event.objects.filter(job=job).values_list('message', flat=True)) == ['kept']
+        dead_key, dead_fields = client.pipeline.return_value.xadd.call_args[0]
+        assert dead_key.endswith(DEAD_LETTER_KEY)
+        assert dead_fields['stream_id'] == '2-0'
+        assert client.xack.call_args[0][2:] == (b'1-0', b'2-0')
+
+
+@pytest.mark.django_db
+class TestJobStream:
+    """Test the server-sent job timeline."""
+    
+    def test_stream_replays_timeline_and_resumes(self):
+        """The stream sends events then the final status; Last-Event-ID resumes after it."""
+        import json
+        from rest_framework.test import APIClient
+        
+        user = User.objects.create_user(username='streamer', password='test123')
+        job = enqueue('system.compute_metrics', {}, trigger='api', user=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        
+        response = client.get(f'/api/jobs/{job.id}/stream/', HTTP_ACCEPT='text/event-stream')
+        assert response['Content-Type'] == 'text/event-stream'
+        messages = [m for m in b''.join(response.streaming_content).decode().split('\n\n') if m.startswith('id:')]
+        entries = [json.loads(m.split('data: ', 1)[1]) for m in messages]
+        assert entries[0] == {**entries[0], 'type': 'status', 'status': 'running'}
+        assert entries[-1]['status'] == 'success'
+        assert any(e['type'] == 'event' and e['message'] == 'Job completed successfully' for e in entries)
+        
+        resumed = client.get(f'/api/jobs/{job.id}/stream/', HTTP_LAST_EVENT_ID=str(len(entries) - 2))
+        body = b''.join(resumed.streaming_content).decode()
+        assert body.count('id: ') == 1
+        assert f'id: {len(entries) - 1}' in body
+
+
 @pytest.mark.django_db
 class TestJobRetry:
     """Test job retry logic."""
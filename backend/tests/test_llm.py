@@ -0,0 +1,155 @@
+"""
+Tests for LLM client plumbing.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from apps.llm.batching import MicroBatcher
+from apps.llm.providers.vllm import VLLMProvider
+
+
+class TestMicroBatcher:
+    """Test prompt micro-batching."""
+
+    def test_prompts_are_sent_together_and_fanned_out(self):
+        """Prompts submitted within the wait window share one request."""
+        calls = []
+
+        def send_batch(prompts, params):
+            calls.append((prompts, params))
+            return [prompt.upper() for prompt in prompts]
+
+        batcher = MicroBatcher(send_batch, max_size=10, max_wait_ms=200)
+        futures = [batcher.submit(f'p{n}', temperature=0.1) for n in range(4)]
+
+        assert [future.result(timeout=5) for future in futures] == ['P0', 'P1', 'P2', 'P3']
+        assert calls == [(['p0', 'p1', 'p2', 'p3'], {'temperature': 0.1})]
+
+    def test_failed_batch_isolates_bad_prompt(self):
+        """A batch failure is retried per prompt so only the bad one fails."""
+        def send_batch(prompts, params):
+            if 'bad' in prompts:
+                raise ValueError('prompt too long')
+            return [prompt.upper() for prompt in prompts]
+
+        batcher = MicroBatcher(send_batch, max_size=10, max_wait_ms=200)
+        good, bad = batcher.submit('good'), batcher.submit('bad')
+
+        assert good.result(timeout=5) == 'GOOD'
+        with pytest.raises(ValueError):
+            bad.result(timeout=5)
+
+    def test_vllm_send_batch_maps_choices_by_index(self):
+        """Choices are matched to prompts by index; a missing one is a per-prompt error."""
+        response = MagicMock()
+        response.json.return_value = {'choices': [{'index': 1, 'text': 'second'}]}
+        provider = VLLMProvider(endpoint='http://vllm', model='m')
+
+        with patch('apps.llm.providers.vllm._session.post', return_value=response) as post:
+            first, second = provider.send_batch(['a', 'b'], {'max_tokens': 5})
+
+        assert post.call_args.kwargs['json']['prompt'] == ['a', 'b']
+        assert isinstance(first, ValueError)
+        assert second['response'] == 'second'
+
+
+@pytest.mark.django_db
+class TestLLMResponseCache:
+    """Test the content-addressed response cache in BaseAgent._call_llm."""
+
+    def setup_method(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _ctx(self):
+        from apps.jobs.models import Job
+        from apps.observability.context import ExecutionContext
+        return ExecutionContext.from_job(Job.objects.create(type='worklog.analyze'))
+
+    def test_identical_prompt_is_served_from_cache(self):
+        """The second identical call is a hit; cache=False always calls the provider."""
+        from apps.agents.worklog_agent import WorklogAgent
+        from apps.llm import cache as llm_cache
+        from apps.llm.providers.local import LocalProvider
+
+        agent, ctx = WorklogAgent(), self._ctx()
+        with patch.object(LocalProvider, 'complete', wraps=LocalProvider().complete) as complete:
+            first = agent._call_llm(ctx, 'analyze worklog A', temperature=0)
+            second = agent._call_llm(ctx, 'analyze worklog A', temperature=0)
+            agent._call_llm(ctx, 'analyze worklog A', temperature=0.9)
+            agent._call_llm(ctx, 'analyze worklog A', cache=False, temperature=0)
+
+        assert first == second
+        assert complete.call_count == 3
+        assert llm_cache.stats() == {'WorklogAgent': {'hit': 1, 'miss': 2}}
+
+    def test_least_recently_used_entries_are_evicted(self, settings):
+        """The cache holds at most LLM_CACHE_MAX_ENTRIES responses."""
+        from apps.llm import cache as llm_cache
+
+        settings.LLM_CACHE_MAX_ENTRIES = 2
+        keys = [llm_cache.cache_key('local', 'm', f'prompt {n}', {}) for n in range(3)]
+        llm_cache.put(keys[0], {'n': 0})
+        llm_cache.put(keys[1], {'n': 1})
+        assert llm_cache.get(keys[0], 'test') == {'n': 0}
+        llm_cache.put(keys[2], {'n': 2})
+
+        assert llm_cache.get(keys[1], 'test') is None
+        assert llm_cache.get(keys[0], 'test') == {'n': 0}
+        assert llm_cache.get(keys[2], 'test') == {'n': 2}
+
+
+@pytest.mark.django_db
+class TestTokenAccounting:
+    """Test usage reporting, streaming and ai_tokens_per_day consumption."""
+
+    def setup_method(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _ctx(self, username):
+        from django.contrib.auth import get_user_model
+        from apps.jobs.models import Job
+        from apps.observability.context import ExecutionContext
+
+        user = get_user_model().objects.create_user(username=username, password='x')
+        return user, ExecutionContext.from_job(Job.objects.create(type='report.generate', user=user))
+
+    def test_tokens_are_charged_from_real_counts(self):
+        """The quota ends up charged with the response's total_tokens, not the reservation."""
+        from apps.agents.report_agent import ReportAgent
+        from apps.tenants.quotas import QuotaManager
+
+        user, ctx = self._ctx('metered')
+        response = ReportAgent()._call_llm(ctx, 'write a report', cache=False)
+
+        assert response['usage']['total_tokens'] > 0
+        assert QuotaManager(user.tenant).get_usage('ai_tokens_per_day') == response['usage']['total_tokens']
+
+    def test_exhausted_token_quota_blocks_the_call(self):
+        from apps.agents.report_agent import ReportAgent
+        from apps.jobs.dispatcher import QuotaExceededError
+        from apps.tenants.quotas import QuotaManager
+
+        user, ctx = self._ctx('spent')
+        QuotaManager(user.tenant).consume_quota('ai_tokens_per_day', 10000)
+
+        with pytest.raises(QuotaExceededError):
+            ReportAgent()._call_llm(ctx, 'write a report', cache=False)
+
+    def test_streamed_chunks_reach_job_output(self):
+        """Streaming passes every chunk on; the job output can be read incrementally."""
+        import json
+        from apps.agents.report_agent import ReportAgent
+        from apps.jobs.output import append_output, read_output
+
+        _, ctx = self._ctx('streamer')
+        response = ReportAgent()._call_llm(
+            ctx, 'write a report', cache=False, on_chunk=lambda text: append_output(ctx.job_id, text)
+        )
+
+        chunks, cursor = read_output(ctx.job_id)
+        assert len(chunks) > 1
+        assert json.loads(''.join(chunks))['completed'] == response['completed']
+        assert read_output(ctx.job_id, cursor) == ([], cursor)
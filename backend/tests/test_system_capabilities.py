@@ -4,6 +4,7 @@ Tests roles, permissions, service auth, rate limiting, quotas, and feature flags
 """
 import pytest
 import time
+from unittest.mock import patch
 from django.contrib.auth.models import User
 from django.test import RequestFactory, override_settings
 from django.core.cache import cache
@@ -228,6 +229,39 @@ class TestRateLimiting:
         assert not is_allowed
         assert retry_after is not None and retry_after > 0
     
+    def test_gcra_refills_gradually(self):
+        """Token bucket: a full burst, then one request per emission interval."""
+        limiter = RateLimiter('test-gcra', max_requests=4, window_seconds=60)
+        start = time.time()
+        
+        with patch('apps.api.rate_limiting.time.time', return_value=start):
+            assert all(limiter.is_allowed('id')[0] for _ in range(4))
+            is_allowed, retry_after = limiter.is_allowed('id')
+            assert not is_allowed
+            assert retry_after == 15
+        
+        with patch('apps.api.rate_limiting.time.time', return_value=start + 15):
+            assert limiter.is_allowed('id')[0]
+            assert not limiter.is_allowed('id')[0]
+    
+    def test_sliding_log_has_no_window_edge_burst(self):
+        """Sliding log: never more than max_requests in any window span."""
+        limiter = RateLimiter('test-log', max_requests=3, window_seconds=60, algorithm='sliding_log')
+        start = time.time()
+        
+        for offset in (0, 10, 20):
+            with patch('apps.api.rate_limiting.time.time', return_value=start + offset):
+                assert limiter.is_allowed('id')[0]
+        
+        with patch('apps.api.rate_limiting.time.time', return_value=start + 55):
+            is_allowed, retry_after = limiter.is_allowed('id')
+            assert not is_allowed
+            assert retry_after == 5
+        
+        with patch('apps.api.rate_limiting.time.time', return_value=start + 61):
+            assert limiter.is_allowed('id')[0]
+            assert not limiter.is_allowed('id')[0]
+    
     def test_rate_limiter_reset(self):
         """Test rate limit reset."""
         limiter = RateLimiter('test', max_requests=2, window_seconds=60)
@@ -347,6 +381,22 @@ class TestQuotas:
         
         manager = QuotaManager(tenant)
         assert manager.get_usage('jobs_per_day') == 5
+    
+    def test_reserve_is_all_or_nothing(self, tenant):
+        """A reservation that overflows any quota consumes none of them."""
+        manager = QuotaManager(tenant)
+        manager.consume_quota('reports_per_day', 20)
+        
+        allowed, error = manager.reserve({'jobs_per_day': 1, 'reports_per_day': 1})
+        assert not allowed
+        assert 'reports' in error.lower()
+        assert manager.get_usage('jobs_per_day') == 0
+        
+        allowed, _ = manager.reserve({'jobs_per_day': 1, 'ai_tokens_per_day': 500})
+        assert allowed
+        manager.release({'jobs_per_day': 1, 'ai_tokens_per_day': 500})
+        assert manager.get_usage('jobs_per_day') == 0
+        assert manager.get_usage('ai_tokens_per_day') == 0
 
 
 @pytest.mark.django_db
@@ -398,3 +448,41 @@ class TestConcurrency:
         # Now should succeed
         acquired, _ = limiter.acquire('job-3')
         assert acquired
+    
+    def test_expired_leases_are_reaped(self, tenant):
+        """Holders whose lease lapsed no longer count against the limit."""
+        limiter = ConcurrencyLimiter(tenant)
+        limiter.acquire('job-1')
+        limiter.acquire('job-2')
+        
+        with patch('apps.tenants.quotas.time.time', return_value=time.time() + 301):
+            acquired, _ = limiter.acquire('job-3')
+            assert acquired
+            assert not limiter.renew('job-1')
+            assert limiter.holders() == 1
+    
+    def test_renew_and_transfer(self, tenant):
+        """A held lease can be extended and handed to another job id."""
+        limiter = ConcurrencyLimiter(tenant, 'report.generate')
+        limiter.acquire('job-1', timeout=10)
+        
+        assert limiter.renew('job-1', timeout=600)
+        assert limiter.transfer('job-1', 'job-1-retry')
+        assert not limiter.renew('job-1')
+        assert limiter.renew('job-1-retry')
+        assert limiter.holders() == 1
+    
+    def test_lapsed_lease_is_reacquired_when_job_runs(self, tenant, owner_user):
+        """A job whose enqueue-time lease lapsed while queued takes a slot again."""
+        from apps.jobs.models import Job
+        from apps.workers.execute_job import run_job
+        
+        job = Job.objects.create(type='system.compute_metrics', payload={}, user=owner_user, holds_slot=True)
+        limiter = ConcurrencyLimiter(tenant, job.type)
+        
+        with patch.object(ConcurrencyLimiter, 'acquire', autospec=True, side_effect=ConcurrencyLimiter.acquire) as acquire:
+            run_job(str(job.id))
+        
+        assert acquire.call_args[0][1] == str(job.id)
+        assert Job.objects.get(id=job.id).status == 'success'
+        assert limiter.holders() == 0
@@ -206,6 +206,28 @@ class TestWorklogAPIHierarchy:
         assert len(response.data['results']) == 1
         assert response.data['results'][0]['content'] == 'Today work'
     
+    def test_worklog_hierarchy_is_validated_and_backfilled(self, api_client, user, project):
+        """Create backfills the client from the project; foreign ids are rejected per field."""
+        response = api_client.post('/api/worklogs/', {
+            'occurred_on': str(date.today()),
+            'content': 'Scoped the migration',
+            'project': project.id,
+        })
+        assert response.status_code == 201
+        worklog = WorkLog.objects.get(id=response.data['id'])
+        assert worklog.client_id == project.client_id
+        
+        other = User.objects.create_user(username='other', password='testpass123')
+        foreign = Client.objects.create(user=other, name='Not Mine')
+        response = api_client.patch(f'/api/worklogs/{worklog.id}/', {'client': foreign.id})
+        assert response.status_code == 400
+        assert response.data == {'client': ['Client does not belong to this user.']}
+        
+        response = api_client.patch(f'/api/worklogs/{worklog.id}/', {'title': 'Migration scope'})
+        assert response.status_code == 200
+        worklog.refresh_from_db()
+        assert (worklog.title, worklog.project_id) == ('Migration scope', project.id)
+    
     def test_search_worklogs(self, api_client, user):
         """Test searching worklogs by content."""
         WorkLog.objects.create(
@@ -3,7 +3,10 @@ Tests for worklog client/project hierarchy.
 """
 import pytest
 from django.contrib.auth import get_user_model
-from apps.worklog.models import Client, Project, Sprint, WorkLog
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.worklog.models import Client, Project, Sprint, Epic, Feature, Story, Task, WorkLog
 from datetime import date
 
 User = get_user_model()
@@ -173,3 +176,59 @@ class TestClientProjectHierarchy:
         # Query only published worklogs
         published = WorkLog.objects.filter(status="ready")
         assert draft not in published
+
+
+@pytest.mark.django_db
+class TestHierarchyValidation:
+    """Test WorkLog.clean() hierarchy resolution."""
+    
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(username='resolver', password='testpass123')
+    
+    @pytest.fixture
+    def task(self, user):
+        client = Client.objects.create(user=user, name='Acme')
+        project = Project.objects.create(client=client, name='Portal')
+        epic = Epic.objects.create(project=project, name='Auth')
+        feature = Feature.objects.create(epic=epic, name='SSO')
+        story = Story.objects.create(feature=feature, name='SAML login')
+        return Task.objects.create(story=story, name='Metadata endpoint')
+    
+    def test_fully_specified_entry_validates_in_one_query(self, user, task):
+        """All referenced chains are loaded with a single query."""
+        story = task.story
+        worklog = WorkLog(
+            user=user, occurred_on=date.today(), content='Work',
+            client_id=story.feature.epic.project.client_id, project_id=story.feature.epic.project_id,
+            epic_id=story.feature.epic_id, feature_id=story.feature_id, story_id=story.id, task_id=task.id,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            worklog.clean()
+        assert len(queries) == 1
+    
+    def test_task_backfills_parents(self, user, task):
+        """Setting only the task fills in every ancestor."""
+        worklog = WorkLog.objects.create(user=user, occurred_on=date.today(), content='Work', task=task)
+        assert worklog.story_id == task.story_id
+        assert worklog.feature_id == task.story.feature_id
+        assert worklog.epic_id == task.story.feature.epic_id
+        assert worklog.project_id == task.story.feature.epic.project_id
+        assert worklog.client_id == task.story.feature.epic.project.client_id
+    
+    def test_other_users_task_is_rejected(self, task):
+        """Hierarchy owned by another user fails validation."""
+        other = User.objects.create_user(username='intruder', password='testpass123')
+        worklog = WorkLog(user=other, occurred_on=date.today(), content='Work', task=task)
+        with pytest.raises(ValidationError) as exc:
+            worklog.full_clean()
+        assert exc.value.message_dict == {'task': ['Task does not belong to this user.']}
+    
+    def test_mismatched_project(self, user, task):
+        """A task outside the selected project is reported."""
+        other_project = Project.objects.create(client=task.story.feature.epic.project.client, name='Other')
+        worklog = WorkLog(user=user, occurred_on=date.today(), content='Work',
+                          project=other_project, task=task)
+        with pytest.raises(ValidationError) as exc:
+            worklog.clean()
+        assert 'task' in exc.value.message_dict
@@ -0,0 +1,149 @@
+"""
+Tests for bulk worklog import.
+"""
+from datetime import date, timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from apps.gamification.models import UserStreak, UserXP
+from apps.worklog.models import WorkLog, Client, Project, Epic, Feature
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestWorklogImport:
+    """Test POST /api/worklogs/import/."""
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(username='importer', password='testpass123')
+
+    @pytest.fixture
+    def api_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    @pytest.fixture
+    def feature(self, user):
+        client = Client.objects.create(user=user, name='Acme')
+        project = Project.objects.create(client=client, name='Portal')
+        epic = Epic.objects.create(project=project, name='Auth')
+        return Feature.objects.create(epic=epic, name='SSO')
+
+    def test_import_backfills_hierarchy(self, api_client, user, feature):
+        """Entries are created and parents implied by the deepest id are filled in."""
+        response = api_client.post('/api/worklogs/import/', {
+            'source': 'ticket',
+            'entries': [
+                {'occurred_on': '2025-04-01', 'content': 'Wired up SAML', 'feature': feature.id, 'source_ref': 'T-1'},
+                {'occurred_on': '2025-04-02', 'content': 'Reviewed PRs', 'source_ref': 'T-2'},
+            ],
+        }, format='json')
+
+        assert response.status_code == 201
+        assert response.data['created'] == 2
+        assert response.data['errors'] == []
+
+        worklog = WorkLog.objects.get(source_ref='T-1')
+        assert worklog.source == 'ticket'
+        assert worklog.epic_id == feature.epic_id
+        assert worklog.project_id == feature.epic.project_id
+        assert worklog.client_id == feature.epic.project.client_id
+
+    def test_duplicates_are_skipped(self, api_client, user):
+        """Re-importing the same source_ref is a no-op, within and across batches."""
+        payload = {
+            'source': 'email',
+            'entries': [
+                {'occurred_on': '2025-04-01', 'content': 'Replied to vendor', 'source_ref': 'msg-1'},
+                {'occurred_on': '2025-04-01', 'content': 'Replied to vendor', 'source_ref': 'msg-1'},
+            ],
+        }
+        first = api_client.post('/api/worklogs/import/', payload, format='json')
+        second = api_client.post('/api/worklogs/import/', payload, format='json')
+
+        assert first.data['created'] == 1
+        assert first.data['duplicates'] == 1
+        assert second.data['created'] == 0
+        assert second.data['duplicates'] == 2
+        assert WorkLog.objects.filter(user=user, source_ref='msg-1').count() == 1
+
+    def test_foreign_hierarchy_is_rejected(self, api_client, user):
+        """Ids from another user's hierarchy are reported without blocking the batch."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        foreign_client = Client.objects.create(user=other, name='Theirs')
+
+        response = api_client.post('/api/worklogs/import/', {
+            'entries': [
+                {'occurred_on': '2025-04-01', 'content': 'Sneaky', 'client': foreign_client.id},
+                {'occurred_on': '2025-04-01', 'content': 'Fine'},
+            ],
+        }, format='json')
+
+        assert response.status_code == 201
+        assert response.data['created'] == 1
+        assert response.data['errors'] == [
+            {'index': 0, 'errors': {'client': 'Client does not belong to this user.'}}
+        ]
+
+    def test_large_import_earns_rewards(self, api_client, user, settings):
+        """An import over the hourly entry limit is not rejected as spam."""
+        settings.JOB_COALESCE_WINDOW_SECONDS = 0
+        start = date(2025, 3, 1)
+        entries = [
+            {'occurred_on': (start + timedelta(days=day)).isoformat(),
+             'content': f'Migrated billing reports, part {day}', 'source_ref': f'R-{day}'}
+            for day in range(12)
+        ]
+        # Two entries on one day are not duplicates of each other either
+        entries.append({'occurred_on': start.isoformat(), 'content': 'Followed up on the report migration',
+                        'source_ref': 'R-extra'})
+
+        response = api_client.post('/api/worklogs/import/', {'source': 'ticket', 'entries': entries}, format='json')
+
+        assert response.data['created'] == 13
+        assert UserXP.objects.get(user=user).total_xp > 0
+        streak = UserStreak.objects.get(user=user)
+        assert streak.longest_streak == 12
+        assert streak.last_counted_date == start + timedelta(days=11)
+
+    def test_import_updates_rewards_and_activity(self, api_client, user, settings):
+        """Imported entries count towards XP, the streak and the activity counters."""
+        settings.JOB_COALESCE_WINDOW_SECONDS = 0
+        response = api_client.post('/api/worklogs/import/', {
+            'source': 'ticket',
+            'entries': [
+                {'occurred_on': '2025-04-01', 'content': 'Drafted the onboarding checklist', 'source_ref': 'T-1'},
+                {'occurred_on': '2025-04-02', 'content': 'Reviewed the onboarding checklist',
+                 'outcome': 'Checklist approved', 'source_ref': 'T-2'},
+                {'occurred_on': '2025-04-03', 'content': 'Shipped the onboarding checklist', 'source_ref': 'T-3'},
+            ],
+        }, format='json')
+
+        assert response.data['created'] == 3
+        assert UserXP.objects.get(user=user).total_xp > 0
+        streak = UserStreak.objects.get(user=user)
+        assert (streak.current_streak, streak.longest_streak) == (3, 3)
+        assert streak.last_counted_date == date(2025, 4, 3)
+        stats = user.activity_stats
+        assert (stats.total_entries, stats.distinct_days, stats.entries_with_outcomes) == (3, 3, 1)
+
+    def test_backdated_import_rebuilds_streak(self, api_client, user, settings):
+        """Entries imported before the last counted day join the run they extend."""
+        settings.JOB_COALESCE_WINDOW_SECONDS = 0
+        api_client.post('/api/worklogs/import/', {'entries': [
+            {'occurred_on': '2025-04-10', 'content': 'Planned the quarterly roadmap'},
+        ]}, format='json')
+        api_client.post('/api/worklogs/import/', {'entries': [
+            {'occurred_on': '2025-04-08', 'content': 'Collected roadmap input from sales'},
+            {'occurred_on': '2025-04-09', 'content': 'Sorted roadmap input by theme'},
+            {'occurred_on': '2025-04-01', 'content': 'Too short'},
+        ]}, format='json')
+
+        streak = UserStreak.objects.get(user=user)
+        assert (streak.current_streak, streak.longest_streak) == (3, 3)
+        assert streak.last_counted_date == date(2025, 4, 10)
@@ -0,0 +1,80 @@
+"""
+Tests for keyset (cursor) pagination on the worklog list endpoint.
+"""
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from apps.worklog.models import WorkLog
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestWorklogKeysetPagination:
+    """Test cursor pagination mode for /api/worklogs/."""
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(
+            username='pager',
+            email='pager@example.com',
+            password='testpass123'
+        )
+
+    @pytest.fixture
+    def api_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    @pytest.fixture
+    def worklogs(self, user):
+        start = date(2025, 1, 1)
+        # Two entries per day so ties on occurred_on are exercised
+        return [
+            WorkLog.objects.create(
+                user=user,
+                occurred_on=start + timedelta(days=i // 2),
+                content=f'Entry {i}'
+            )
+            for i in range(7)
+        ]
+
+    def test_walks_all_pages_in_order(self, api_client, worklogs):
+        """Following next links yields every entry exactly once, newest first."""
+        seen = []
+        url = '/api/worklogs/?pagination=cursor&page_size=3'
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == 200
+            assert 'count' not in response.data
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+
+        expected = list(
+            WorkLog.objects.order_by('-occurred_on', '-created_at', '-id').values_list('id', flat=True)
+        )
+        assert seen == expected
+
+    def test_default_mode_is_page_number(self, api_client, worklogs):
+        """Without the cursor flag the existing page-number response is returned."""
+        response = api_client.get('/api/worklogs/')
+        assert response.status_code == 200
+        assert response.data['count'] == len(worklogs)
+
+    def test_invalid_cursor(self, api_client, worklogs):
+        """A garbage cursor returns 404 instead of a server error."""
+        response = api_client.get('/api/worklogs/?cursor=not-a-cursor')
+        assert response.status_code == 404
+
+    def test_cursor_rejects_reordering(self, api_client, worklogs):
+        """Cursor mode has a fixed order, so ordering and search are a 400."""
+        response = api_client.get('/api/worklogs/?pagination=cursor&ordering=status')
+        assert response.status_code == 400
+        assert 'ordering' in response.data
+
+        response = api_client.get('/api/worklogs/?pagination=cursor&search=deploy')
+        assert response.status_code == 400
+        assert 'search' in response.data
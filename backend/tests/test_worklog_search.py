@@ -0,0 +1,70 @@
+"""
+Tests for worklog full-text search.
+"""
+import pytest
+from datetime import date
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from apps.worklog.models import WorkLog
+from apps.worklog.search import search_worklogs
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestWorklogSearch:
+    """Test the search index and the ?search= filter."""
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(username='searcher', password='testpass123')
+
+    @pytest.fixture
+    def api_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def test_prefix_match_across_fields(self, user):
+        """Partial terms match title, impact and tags."""
+        by_title = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 1),
+                                          title='Kubernetes rollout', content='Did things')
+        by_impact = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 2),
+                                           content='Did things', impact='Cut kubernetes costs')
+        by_tag = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 3),
+                                        content='Did things', tags=['kubernetes'])
+        WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 4), content='Unrelated')
+
+        ids = set(search_worklogs(WorkLog.objects.all(), 'kube').values_list('id', flat=True))
+        assert ids == {by_title.id, by_impact.id, by_tag.id}
+
+    def test_index_follows_updates_and_deletes(self, user):
+        """Saving reindexes the entry and deleting removes it."""
+        worklog = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 1), content='Old notes')
+        assert not search_worklogs(WorkLog.objects.all(), 'refactor').exists()
+
+        worklog.content = 'Refactored the billing module'
+        worklog.save()
+        assert search_worklogs(WorkLog.objects.all(), 'refactor').exists()
+
+        worklog.delete()
+        assert not search_worklogs(WorkLog.objects.all(), 'refactor').exists()
+
+    def test_title_hits_rank_first(self, api_client, user):
+        """API results are ordered by relevance while searching."""
+        content_hit = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 5),
+                                             content='Paired on the migration script')
+        title_hit = WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 1),
+                                           title='Migration', content='Database work')
+
+        response = api_client.get('/api/worklogs/?search=migration')
+        assert response.status_code == 200
+        assert [row['id'] for row in response.data['results']] == [title_hit.id, content_hit.id]
+
+    def test_punctuation_only_query(self, api_client, user):
+        """Queries without searchable terms return nothing rather than erroring."""
+        WorkLog.objects.create(user=user, occurred_on=date(2025, 3, 1), content='Anything')
+        response = api_client.get('/api/worklogs/?search=%22*(')
+        assert response.status_code == 200
+        assert response.data['results'] == []